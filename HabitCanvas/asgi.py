@@ -2,6 +2,9 @@
 ASGI config for HabitCanvas project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+
+Run it with uvicorn workers so the async JSON endpoints share one event loop:
+    gunicorn HabitCanvas.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
@@ -0,0 +1,23 @@
+"""
+Django settings for HabitCanvas project.
+
+The profile is picked with the DJANGO_ENV environment variable:
+    dev  (default)  local development, DEBUG on
+    test            used automatically by `manage.py test`
+    prod            Render / production, refuses to start with dev settings
+"""
+
+import os
+
+DJANGO_ENV = os.getenv("DJANGO_ENV", "dev").lower()
+
+if DJANGO_ENV == "prod":
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == "test":
+    from .test import *  # noqa: F401,F403
+elif DJANGO_ENV == "dev":
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(f"Unknown DJANGO_ENV {DJANGO_ENV!r}; use dev, test or prod.")
@@ -0,0 +1,286 @@
+"""
+Django settings shared by every HabitCanvas profile (dev, test, prod).
+"""
+
+from pathlib import Path
+import os
+# import dj_database_url
+# from dotenv import load_dotenv
+
+# Load environment variables from .env (for local development)
+# load_dotenv()
+
+# Base directory
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Secret key used when none is configured; prod refuses to start with it
+DEV_SECRET_KEY = "dev-secret-key"
+
+
+# --------------------------
+# SECURITY & DEBUG SETTINGS
+# --------------------------
+
+# SECRET_KEY should come from Render Environment Variables
+SECRET_KEY = os.getenv("SECRET_KEY", DEV_SECRET_KEY)
+
+# DEBUG is False in production, True only on local machine (see dev.py / prod.py)
+DEBUG = False
+
+# Allow all hosts — Render URL included
+ALLOWED_HOSTS = ['*']
+
+
+# --------------------------
+# APPLICATIONS
+# --------------------------
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'main',
+]
+
+
+# --------------------------
+# MIDDLEWARE
+# --------------------------
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'main.middleware.AsyncWhiteNoiseMiddleware',  # ✅ REQUIRED FOR RENDER STATIC FILES (WhiteNoise + async path)
+    'main.middleware.RequestMetricsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.PrimaryPinMiddleware',  # only with a read replica (main.replicas)
+    'main.middleware.ProfilingMiddleware',  # staff-only, opt-in via X-Profile header / ?_profile=1
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+# --------------------------
+# REQUEST METRICS (main.middleware.RequestMetricsMiddleware)
+# --------------------------
+
+# Adds a Server-Timing header (db / tpl / total) to every response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+
+# Max SQL queries per view (by URL name) before a warning is logged
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    "dashboard": 10,
+    "tasks": 10,
+    "get_events": 5,
+    "get_timer_stats": 15,
+    "get_subtasks": 5,
+}
+
+
+# Bearer token Prometheus sends to /metrics (main.metrics); unset = DEBUG only
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+# Opt-in per-request profiling (main.middleware.ProfilingMiddleware); on in dev only
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+PROFILE_DIR = BASE_DIR / "profiles"
+PROFILING_SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+
+
+# --------------------------
+# URL / WSGI CONFIG
+# --------------------------
+
+ROOT_URLCONF = 'HabitCanvas.urls'
+WSGI_APPLICATION = 'HabitCanvas.wsgi.application'
+
+
+# --------------------------
+# TEMPLATES
+# --------------------------
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [
+            BASE_DIR / "main" / "templates",
+            BASE_DIR / "main" / "templates" / "registration",
+        ],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+
+# --------------------------
+# DATABASE (Local = SQLite, Render = PostgreSQL)
+# --------------------------
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        # Web requests and run_worker write concurrently: take the write lock at
+        # BEGIN and wait for it, instead of failing with "database is locked"
+        # when a read transaction tries to upgrade
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+    }
+}
+
+# Read replica for the read-only views (main.replicas). Locally, point
+# REPLICA_DB_PATH at a second SQLite file and refresh it with `manage.py sync_replica`.
+if os.getenv("REPLICA_DB_PATH"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.getenv("REPLICA_DB_PATH"),
+        "TEST": {"MIRROR": "default"},
+    }
+REPLICA_DATABASE = "replica" if "replica" in DATABASES else None
+DATABASE_ROUTERS = ["main.replicas.ReplicaRouter"]
+# Reads stay on the primary this long after a user writes (longer than the replication lag)
+REPLICA_STICKY_SECONDS = 15
+
+
+# --------------------------
+# CACHE
+# --------------------------
+
+# Per-process is enough: cached fragments are keyed by version, never invalidated
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+# Seconds a rendered task card (main.fragments) stays cached
+TASK_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a user's task analytics (main.analytics) stay cached
+TASK_ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a shared calendar's events for one range (main.calendars) stay cached
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+
+# Default age in days for `manage.py archive_data` (main.archive)
+ARCHIVE_AFTER_DAYS = 365
+
+
+# --------------------------
+# BACKGROUND JOBS
+# --------------------------
+
+# False: views queue jobs for `manage.py run_worker`; True: jobs run inline (main.jobs)
+JOBS_EAGER = False
+JOB_MAX_ATTEMPTS = 5
+# Retry delays double from JOB_BACKOFF_SECONDS up to JOB_BACKOFF_MAX_SECONDS
+JOB_BACKOFF_SECONDS = 10
+JOB_BACKOFF_MAX_SECONDS = 60 * 60
+# A job RUNNING this long belonged to a worker that died, and is requeued
+JOB_LOCK_TIMEOUT = 60 * 10
+
+
+# --------------------------
+# EMAIL
+# --------------------------
+
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "HabitCanvas <noreply@habitcanvas.app>")
+# Outbox (main.mail): messages per SMTP connection, and a send rate the provider accepts (0 = no limit)
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_PER_SECOND = 5
+EMAIL_MAX_ATTEMPTS = 5
+# Sent messages are kept this long, so reminder keys can't be queued twice
+EMAIL_KEEP_SENT_DAYS = 30
+
+
+# --------------------------
+# PASSWORD VALIDATION
+# --------------------------
+
+AUTH_PASSWORD_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', 'OPTIONS': {'min_length': 8}},
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
+    {'NAME': 'main.validators.CustomPasswordValidator'},
+]
+
+
+# --------------------------
+# INTERNATIONALIZATION
+# --------------------------
+
+LANGUAGE_CODE = 'en-us'
+TIME_ZONE = 'Asia/Manila'
+USE_I18N = True
+USE_TZ = True
+
+
+# --------------------------
+# STATIC FILES (REQUIRED FOR RENDER)
+# --------------------------
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [BASE_DIR / "main" / "static"]  # assets inside your app
+STATIC_ROOT = BASE_DIR / "staticfiles"  # folder Render will collect static files into
+
+# WhiteNoise: minify, hash & compress static files. Hashed bundles are
+# served with far-future immutable cache headers, so repeat page loads
+# only fetch the HTML. (STATICFILES_STORAGE is ignored since Django 5.1.)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "main.storage.MinifiedManifestStaticFilesStorage"},
+}
+
+
+# --------------------------
+# AUTH REDIRECTS
+# --------------------------
+
+LOGIN_URL = '/login/'
+LOGIN_REDIRECT_URL = '/dashboard/'
+LOGOUT_REDIRECT_URL = '/'
+
+
+# --------------------------
+# DEFAULT PRIMARY KEY
+# --------------------------
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# --------------------------
+# LOGGING
+# --------------------------
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "main.requests": {
+            "handlers": ["console"],
+            # One JSON record per request; REQUEST_LOG_LEVEL=WARNING keeps only budget warnings
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
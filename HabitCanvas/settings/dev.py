@@ -0,0 +1,19 @@
+"""
+Local development profile.
+"""
+
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = True
+
+ALLOWED_HOSTS = ['*']
+
+# Staff can profile requests with ?_profile=1 (main.middleware.ProfilingMiddleware)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+
+# runserver works without a job worker; set to False to try `manage.py run_worker`
+JOBS_EAGER = os.getenv("JOBS_EAGER", "true").lower() == "true"
+
+# Password resets and reminders are printed instead of sent
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
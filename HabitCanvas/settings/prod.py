@@ -0,0 +1,147 @@
+"""
+Production profile (Render). Every value that differs per deployment comes
+from environment variables; startup fails if anything still has its dev value.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = [h.strip() for h in os.getenv("ALLOWED_HOSTS", ".onrender.com").split(",") if h.strip()]
+CSRF_TRUSTED_ORIGINS = [
+    o.strip() for o in os.getenv("CSRF_TRUSTED_ORIGINS", "https://*.onrender.com").split(",") if o.strip()
+]
+
+
+# --------------------------
+# DATABASE
+# --------------------------
+
+if os.getenv("DATABASE_URL"):
+    import dj_database_url
+
+    DATABASES["default"] = dj_database_url.config(conn_max_age=60, conn_health_checks=True)
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = 60
+
+if os.getenv("REPLICA_DATABASE_URL"):
+    import dj_database_url
+
+    DATABASES["replica"] = dj_database_url.parse(
+        os.environ["REPLICA_DATABASE_URL"], conn_max_age=60, conn_health_checks=True,
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    REPLICA_DATABASE = "replica"
+
+
+# --------------------------
+# MIDDLEWARE
+# --------------------------
+
+# GZip before anything that reads the body; ConditionalGet after it so the
+# ETag is computed on the uncompressed content and unchanged pages get a 304.
+MIDDLEWARE = MIDDLEWARE.copy()
+_after = MIDDLEWARE.index('main.middleware.AsyncWhiteNoiseMiddleware') + 1
+MIDDLEWARE[_after:_after] = [
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+]
+
+
+# --------------------------
+# TEMPLATES
+# --------------------------
+
+# Parse each template once per process instead of on every render
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS'] = {
+    **TEMPLATES[0]['OPTIONS'],
+    'context_processors': [
+        cp for cp in TEMPLATES[0]['OPTIONS']['context_processors']
+        if cp != 'django.template.context_processors.debug'
+    ],
+    'loaders': [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ],
+}
+
+
+# --------------------------
+# SECURITY
+# --------------------------
+
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_SSL_REDIRECT = os.getenv("SECURE_SSL_REDIRECT", "True").lower() == "true"
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_HSTS_SECONDS = int(os.getenv("SECURE_HSTS_SECONDS", "3600"))
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_REFERRER_POLICY = 'same-origin'
+
+# Timings reveal internals; only expose them when asked to
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"
+
+
+# --------------------------
+# EMAIL
+# --------------------------
+
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
+EMAIL_TIMEOUT = 20
+EMAIL_MAX_PER_SECOND = int(os.getenv("EMAIL_MAX_PER_SECOND", EMAIL_MAX_PER_SECOND))
+
+
+# --------------------------
+# LOGGING
+# --------------------------
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "root": {"handlers": ["console"], "level": "WARNING"},
+    "loggers": {
+        "django": {"handlers": ["console"], "level": os.getenv("DJANGO_LOG_LEVEL", "WARNING"), "propagate": False},
+        "django.request": {"handlers": ["console"], "level": "ERROR", "propagate": False},
+        "main": {"handlers": ["console"], "level": os.getenv("APP_LOG_LEVEL", "INFO"), "propagate": False},
+        "main.requests": {
+            "handlers": ["console"],
+            # One JSON record per request; REQUEST_LOG_LEVEL=WARNING keeps only budget warnings
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+
+# --------------------------
+# STARTUP CHECK
+# --------------------------
+
+_problems = []
+if SECRET_KEY == DEV_SECRET_KEY or len(SECRET_KEY) < 32:
+    _problems.append("SECRET_KEY is unset or the dev key (set a long random SECRET_KEY)")
+if os.getenv("DEBUG", "").lower() == "true":
+    _problems.append("DEBUG=True in the environment")
+if not ALLOWED_HOSTS or "*" in ALLOWED_HOSTS:
+    _problems.append("ALLOWED_HOSTS must list the real host names, not '*'")
+
+if _problems:
+    raise ImproperlyConfigured(
+        "Refusing to start with DJANGO_ENV=prod: " + "; ".join(_problems)
+    )
@@ -0,0 +1,34 @@
+"""
+Profile used by `manage.py test`.
+"""
+
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+# Hashing with the default PBKDF2 dominates test setup time
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Templates are rendered without running collectstatic first
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Rolled-back test data reuses ids and versions; tests that cover caching opt back in
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+# View tests see job results immediately; JobTests turn this off
+JOBS_EAGER = True
+
+SERVER_TIMING_ENABLED = True
+PROFILING_ENABLED = False
+
+# Query budgets are asserted by the tests themselves
+LOGGING["loggers"]["main.requests"]["level"] = "ERROR"
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+EMAIL_MAX_PER_SECOND = 0
@@ -0,0 +1,27 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this directory.
+
+With PROMETHEUS_MULTIPROC_DIR set, workers share their metrics through files
+in that directory (main.metrics). Files left by an earlier run would add old
+counts to the new ones, so the directory is emptied at startup, and a worker's
+live gauges are dropped when it exits.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(worker.pid)
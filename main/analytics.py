@@ -0,0 +1,151 @@
+"""
+Task analytics for the dashboard header, the filter dropdowns and
+/tasks/analytics/.
+
+Completion rates, overdue counts and facet counts all roll up from one GROUP BY
+(category, difficulty) with conditional aggregates, plus the same grouping over
+archived tasks for the rates; weekly throughput is a GROUP BY over completed_at.
+The result is cached per user under DataVersion.tasks, which database triggers
+bump on every create, delete and relevant edit of a task or archived task,
+including the bulk endpoint's UPDATEs. Like the card cache, nothing has to be
+invalidated, and a warm request costs one primary-key lookup.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ArchivedTask, DataVersion, Task
+from .stats import local_date, local_day_bounds
+
+
+THROUGHPUT_WEEKS = 12
+COUNTS = ("total", "completed", "active", "overdue", "due_today", "archived")
+
+
+def stamp(user_id):
+    """Changes whenever one of the user's tasks is created, completed, edited or deleted."""
+    return DataVersion.of(user_id)[0]
+
+
+def task_analytics(user_id, today=None):
+    """
+    {"date", "totals", "by_category", "by_difficulty", "cells", "throughput"},
+    from the cache when the user's tasks haven't changed since it was computed.
+    """
+    today = today or timezone.localdate()
+    key = f"task_analytics:{user_id}:{today.isoformat()}:{stamp(user_id)}"
+    data = cache.get(key)
+    if data is None:
+        data = compute(user_id, today)
+        cache.set(key, data, settings.TASK_ANALYTICS_CACHE_TIMEOUT)
+    return data
+
+
+def compute(user_id, today):
+    cells = list(
+        Task.objects
+        .filter(user_id=user_id)
+        .values("category", "difficulty")
+        .annotate(
+            total=Count("id"),
+            done=Count("id", filter=Q(completed=True)),
+            overdue=Count("id", filter=Q(completed=False, due_date__lt=today)),
+            due_today=Count("id", filter=Q(completed=False, due_date=today)),
+        )
+        .order_by("category", "difficulty")
+    )
+    archived = dict(
+        ((category, difficulty), count) for category, difficulty, count in
+        ArchivedTask.objects
+        .filter(user_id=user_id)
+        .values("category", "difficulty")
+        .annotate(count=Count("id"))
+        .order_by()
+        .values_list("category", "difficulty", "count")
+    )
+    for cell in cells:
+        # Annotated as "done" because "completed" would shadow the field in the other filters
+        cell["completed"] = cell.pop("done")
+        cell["active"] = cell["total"] - cell["completed"]
+        cell["archived"] = archived.pop((cell["category"], cell["difficulty"]), 0)
+    cells += [
+        {"category": category, "difficulty": difficulty, "archived": count,
+         **dict.fromkeys(COUNTS[:-1], 0)}
+        for (category, difficulty), count in archived.items()
+    ]
+
+    return {
+        "date": today.isoformat(),
+        "totals": rollup(cells),
+        "by_category": {
+            value: rollup(c for c in cells if c["category"] == value) for value, _ in Task.CATEGORY_CHOICES
+        },
+        "by_difficulty": {
+            value: rollup(c for c in cells if c["difficulty"] == value) for value, _ in Task.DIFFICULTY_CHOICES
+        },
+        "cells": cells,
+        "throughput": weekly_throughput(user_id, today),
+    }
+
+
+def rollup(cells):
+    """Sums over cells. Counts are of hot tasks; the rate also counts archived ones, which are all completed."""
+    sums = dict.fromkeys(COUNTS, 0)
+    for cell in cells:
+        for name in COUNTS:
+            sums[name] += cell[name]
+    everything = sums["total"] + sums["archived"]
+    sums["completion_rate"] = round((sums["completed"] + sums["archived"]) / everything, 3) if everything else 0.0
+    return sums
+
+
+def weekly_throughput(user_id, today, weeks=THROUGHPUT_WEEKS):
+    """Tasks completed in each of the last `weeks` Monday-based weeks, oldest first."""
+    first = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    start, end = local_day_bounds(first, today)
+    counts = [0] * weeks
+
+    completed = (
+        Task.objects
+        .filter(user_id=user_id, completed_at__gte=start, completed_at__lt=end)
+        .annotate(day=local_date("completed_at", first, today))
+        .values("day")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for day, count in completed.values_list("day", "count"):
+        counts[(day - first).days // 7] += count
+
+    return [
+        {"week": (first + timedelta(weeks=n)).isoformat(), "completed": count}
+        for n, count in enumerate(counts)
+    ]
+
+
+def facets(data, category=None, difficulty=None):
+    """
+    Task counts for every filter option, each narrowed by the other filter the
+    way the dashboard applies them, plus the active count for the current pair.
+    """
+    def matches(cell, field, value):
+        return not value or cell[field] == value
+
+    cells = data["cells"]
+    return {
+        "category": {
+            value: sum(c["total"] for c in cells if c["category"] == value and matches(c, "difficulty", difficulty))
+            for value, _ in Task.CATEGORY_CHOICES
+        },
+        "difficulty": {
+            value: sum(c["total"] for c in cells if c["difficulty"] == value and matches(c, "category", category))
+            for value, _ in Task.DIFFICULTY_CHOICES
+        },
+        "active": sum(
+            c["active"] for c in cells
+            if matches(c, "category", category) and matches(c, "difficulty", difficulty)
+        ),
+    }
@@ -0,0 +1,194 @@
+"""
+Hot/cold archival.
+
+archive_tasks() moves completed tasks older than a cutoff, with their
+subtasks, into ArchivedTask and ArchivedSubTask. archive_sessions() moves
+timer sessions started before the cutoff day into ArchivedTimerSession and
+keeps FocusRollup equal to the archived focus sessions per local day. The
+restore_*() functions move rows back. All of them work one user and one batch
+at a time, with each batch in its own transaction and copied by
+INSERT ... SELECT. An interrupted run leaves every row in exactly one table
+and can simply be rerun.
+
+Readers that cover all history add the cold side to the hot tables: the stats
+heatmap, streaks, timer totals and task analytics. The dashboard and search
+show hot tasks only. Rows younger than MIN_AGE_DAYS are never archived, so
+the rolling windows (last 7 days, this month, 12 weeks of throughput) only
+ever need the hot tables.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.utils import timezone
+
+from .models import (
+    Task, SubTask, TimerSession, CalendarEvent,
+    ArchivedTask, ArchivedSubTask, ArchivedTimerSession, FocusRollup,
+    PATH_ID_WIDTH, path_segment,
+)
+from .stats import local_date, local_day_bounds
+
+
+MIN_AGE_DAYS = 90
+
+
+def cutoff(days, today=None):
+    """Aware start of the local day `days` ago; older rows get archived."""
+    if days < MIN_AGE_DAYS:
+        raise ValueError(f"Only rows older than {MIN_AGE_DAYS} days can be archived")
+    today = today or timezone.localdate()
+    return local_day_bounds(today - timedelta(days=days), today)[0]
+
+
+def _user_ids(user_ids):
+    if user_ids is not None:
+        return list(user_ids)
+    return list(User.objects.order_by("id").values_list("id", flat=True))
+
+
+def _copy(source, target, ids, **constants):
+    """INSERT INTO target SELECT the columns both tables share FROM source, for `ids`."""
+    source_columns = {f.column for f in source._meta.concrete_fields}
+    columns = [
+        f.column for f in target._meta.concrete_fields
+        if f.column in source_columns and f.column not in constants
+    ]
+    quote = connection.ops.quote_name
+    names = ", ".join(quote(c) for c in [*columns, *constants])
+    selected = ", ".join([quote(c) for c in columns] + ["%s"] * len(constants))
+    key = "task_id" if source in (SubTask, ArchivedSubTask) else "id"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(target._meta.db_table)} ({names}) "
+            f"SELECT {selected} FROM {quote(source._meta.db_table)} "
+            f"WHERE {quote(key)} IN ({', '.join(['%s'] * len(ids))})",
+            [*constants.values(), *ids],
+        )
+        return cursor.rowcount
+
+
+def _move_tasks(ids, to_archive):
+    """Copy tasks and their subtasks across, then delete the originals (subtasks cascade)."""
+    tasks, subtasks = (Task, SubTask) if to_archive else (ArchivedTask, ArchivedSubTask)
+    archived_tasks, archived_subtasks = (ArchivedTask, ArchivedSubTask) if to_archive else (Task, SubTask)
+    constants = {"archived_at": timezone.now()} if to_archive else {}
+
+    with transaction.atomic():
+        moved = _copy(tasks, archived_tasks, ids, **constants)
+        moved_subtasks = _copy(subtasks, archived_subtasks, ids)
+        tasks.objects.filter(id__in=ids).delete()
+        if not to_archive:
+            Task.objects.filter(id__in=ids, linked_calendar_event__isnull=False).exclude(
+                Exists(CalendarEvent.objects.filter(pk=OuterRef("linked_calendar_event_id")))
+            ).update(linked_calendar_event=None)
+    return moved, moved_subtasks
+
+
+def archive_tasks(before, user_ids=None, batch_size=1000):
+    """Archive tasks completed before `before`; returns (tasks, subtasks) moved."""
+    totals = [0, 0]
+    for user_id in _user_ids(user_ids):
+        old = Task.objects.filter(user_id=user_id, completed=True, completed_at__lt=before)
+        while ids := list(old.order_by("completed_at").values_list("id", flat=True)[:batch_size]):
+            for i, count in enumerate(_move_tasks(ids, to_archive=True)):
+                totals[i] += count
+    return tuple(totals)
+
+
+def restore_tasks(user_ids=None, since=None, batch_size=1000):
+    """Move archived tasks (completed at or after `since`, if given) back; returns (tasks, subtasks)."""
+    totals = [0, 0]
+    for user_id in _user_ids(user_ids):
+        archived = ArchivedTask.objects.filter(user_id=user_id)
+        if since is not None:
+            archived = archived.filter(completed_at__gte=since)
+        while ids := list(archived.order_by("completed_at").values_list("id", flat=True)[:batch_size]):
+            for i, count in enumerate(_move_tasks(ids, to_archive=False)):
+                totals[i] += count
+    return tuple(totals)
+
+
+def restore_task(user, task_id):
+    """Move one archived task back and return it, or None if the user has no such archived task."""
+    if not ArchivedTask.objects.filter(id=task_id, user=user).exists():
+        return None
+    _move_tasks([task_id], to_archive=False)
+    return Task.objects.get(id=task_id)
+
+
+def refresh_rollups(user_id, first, last):
+    """Recompute FocusRollup for local days first..last from the archived sessions."""
+    start, end = local_day_bounds(first, last)
+    days = (
+        ArchivedTimerSession.objects
+        .filter(user_id=user_id, mode="focus", completed=True, start_time__gte=start, start_time__lt=end)
+        .annotate(day=local_date("start_time", first, last))
+        .values("day")
+        .annotate(minutes=Sum("duration_minutes"), sessions=Count("id"))
+        .order_by()
+    )
+    FocusRollup.objects.filter(user_id=user_id, date__gte=first, date__lte=last).delete()
+    FocusRollup.objects.bulk_create([
+        FocusRollup(user_id=user_id, date=day, focus_minutes=minutes, focus_sessions=sessions)
+        for day, minutes, sessions in days.values_list("day", "minutes", "sessions")
+    ])
+
+
+def _move_sessions(user_id, sessions, to_archive, batch_size):
+    source, target = (TimerSession, ArchivedTimerSession) if to_archive else (ArchivedTimerSession, TimerSession)
+    moved = 0
+    while rows := list(sessions.order_by("start_time").values_list("id", "start_time")[:batch_size]):
+        ids = [session_id for session_id, _ in rows]
+        with transaction.atomic():
+            moved += _copy(source, target, ids)
+            source.objects.filter(id__in=ids).delete()
+            refresh_rollups(user_id, timezone.localdate(rows[0][1]), timezone.localdate(rows[-1][1]))
+    return moved
+
+
+def archive_sessions(before, user_ids=None, batch_size=5000):
+    """Archive timer sessions that started before `before`; returns the number moved."""
+    return sum(
+        _move_sessions(
+            user_id, TimerSession.objects.filter(user_id=user_id, start_time__lt=before), True, batch_size,
+        )
+        for user_id in _user_ids(user_ids)
+    )
+
+
+def restore_sessions(user_ids=None, since=None, batch_size=5000):
+    """Move archived sessions (started at or after `since`, if given) back; returns the number moved."""
+    moved = 0
+    for user_id in _user_ids(user_ids):
+        archived = ArchivedTimerSession.objects.filter(user_id=user_id)
+        if since is not None:
+            archived = archived.filter(start_time__gte=since)
+        moved += _move_sessions(user_id, archived, False, batch_size)
+    return moved
+
+
+def archived_tasks_page(user, page=1, page_size=50):
+    """({"id", "title", ..., "subtasks"} for one page of archived tasks, newest first, has_more)."""
+    offset = (max(page, 1) - 1) * page_size
+    tasks = list(
+        ArchivedTask.objects.filter(user=user).prefetch_related("subtasks")[offset:offset + page_size + 1]
+    )
+    return [
+        {
+            "id": task.id,
+            "title": task.title,
+            "category": task.category,
+            "difficulty": task.difficulty,
+            "completed_at": task.completed_at.isoformat() if task.completed_at else None,
+            "archived_at": task.archived_at.isoformat(),
+            "subtasks": [
+                {"title": s.title, "completed": s.completed, "depth": len(s.path) // (PATH_ID_WIDTH + 1)}
+                for s in sorted(task.subtasks.all(), key=lambda s: s.path + path_segment(s.id))
+            ],
+        }
+        for task in tasks[:page_size]
+    ], len(tasks) > page_size
@@ -0,0 +1,184 @@
+"""
+Shared calendars.
+
+An event with no calendar is personal: only its user sees it, as before
+calendars existed. An event in a Calendar is seen by every member of that
+calendar (CalendarMembership), and the member's role decides the rest:
+
+- viewer: sees the events;
+- editor: also adds, edits, moves and deletes them;
+- owner: also shares the calendar and deletes it (whoever created it).
+
+events_between() is the merged view the calendar page loads: the user's
+personal events plus those of every calendar they belong to, for a date
+range. It costs the same queries for one calendar or fifty:
+
+- one query lists the user's memberships with each calendar's version;
+- each calendar's events for the range are cached under its id and version,
+  all read with one get_many. Calendar.version goes up on every write to the
+  calendar's events, like Task.version for task cards, so nothing has to be
+  invalidated, and a team of 50 builds a calendar's payload once per change
+  instead of once per member;
+- one query reads the personal events and the events of every calendar that
+  missed, off the (user, event_date) and (calendar, event_date) indexes.
+"""
+
+import heapq
+import re
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Calendar, CalendarEvent, CalendarMembership
+
+
+# Longest range one get_events call may ask for
+MAX_RANGE_DAYS = 366 * 5
+COLOR = re.compile(r"#[0-9a-fA-F]{6}")
+
+
+class CalendarError(ValueError):
+    pass
+
+
+def parse_range(params, today):
+    """
+    (start, end), both inclusive, from "start" and "end" ISO dates, or from
+    "year" and "month" (that month), defaulting to the current month.
+    Raises ValueError for a malformed or too long range.
+    """
+    if params.get("start") or params.get("end"):
+        start, end = date.fromisoformat(params.get("start", "")), date.fromisoformat(params.get("end", ""))
+    else:
+        year, month = int(params.get("year", today.year)), int(params.get("month", today.month))
+        start = date(year, month, 1)
+        end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    if not start <= end <= start + timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f"The range must run forwards, over at most {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+def _time(t):
+    return None if t is None else t.strftime("%H:%M")
+
+
+def event_json(event):
+    return {
+        "id": event.id,
+        "title": event.title,
+        "description": event.description,
+        "date": event.event_date.strftime("%Y-%m-%d"),
+        "start_time": _time(event.start_time),
+        "end_time": _time(event.end_time),
+        "category": event.category,
+        "color": event.color,
+        "type": "event",
+        "calendar_id": event.calendar_id,
+        "reminder_enabled": event.reminder_enabled,
+        "reminder_minutes_before": event.reminder_minutes_before,
+        "is_recurring": event.is_recurring or (event.parent_event_id is not None),
+    }
+
+
+def _sort_key(event):
+    # Events without a time come first, as NULLs do in the (event_date, start_time) ordering
+    return event["date"], event["start_time"] or ""
+
+
+def memberships(user):
+    """[{"id", "name", "color", "role", "version"}] for every calendar the user belongs to (one query)."""
+    return [
+        {"id": calendar_id, "name": name, "color": color, "role": role, "version": version}
+        for calendar_id, name, color, role, version in
+        CalendarMembership.objects.filter(user=user).order_by("calendar__name", "calendar_id").values_list(
+            "calendar_id", "calendar__name", "calendar__color", "role", "calendar__version",
+        )
+    ]
+
+
+def cache_key(calendar_id, version, start, end):
+    return f"calendar_events:{calendar_id}:{version}:{start.isoformat()}:{end.isoformat()}"
+
+
+def events_between(user, start, end):
+    """
+    (events, calendars): the event payloads the user sees from start to end,
+    in (date, start time) order, and memberships(user).
+    """
+    calendars = memberships(user)
+    keys = {cache_key(c["id"], c["version"], start, end): c["id"] for c in calendars}
+    cached = cache.get_many(keys)
+    missed = {calendar_id: key for key, calendar_id in keys.items() if key not in cached}
+
+    personal, built = [], {key: [] for key in missed.values()}
+    for event in CalendarEvent.objects.filter(
+        Q(user=user, calendar__isnull=True) | Q(calendar_id__in=missed),
+        event_date__range=(start, end),
+    ).order_by("event_date", "start_time", "id"):
+        rows = personal if event.calendar_id is None else built[missed[event.calendar_id]]
+        rows.append(event_json(event))
+    if built:
+        cache.set_many(built, settings.CALENDAR_CACHE_TIMEOUT)
+
+    # Every list is already sorted, so merging them is linear
+    events = list(heapq.merge(personal, *cached.values(), *built.values(), key=_sort_key))
+    return events, calendars
+
+
+def editable_events(user):
+    """The events the user may change: their personal ones and those of calendars they edit."""
+    edited = CalendarMembership.objects.filter(
+        user=user, role__in=CalendarMembership.EDIT_ROLES,
+    ).values("calendar_id")
+    return CalendarEvent.objects.filter(Q(user=user, calendar__isnull=True) | Q(calendar_id__in=edited))
+
+
+def editable_calendar(user, calendar_id):
+    """The id of a calendar the user may add events to (None for personal), or CalendarError."""
+    if calendar_id in (None, ""):
+        return None
+    if not CalendarMembership.objects.filter(
+        user=user, calendar_id=calendar_id, role__in=CalendarMembership.EDIT_ROLES,
+    ).exists():
+        raise CalendarError("You can't add events to that calendar")
+    return int(calendar_id)
+
+
+def create(owner, name, color=None):
+    name = (name or "").strip()
+    if not name:
+        raise CalendarError("A calendar needs a name")
+    if color and not COLOR.fullmatch(color):
+        raise CalendarError(f"Invalid color {color!r}")
+    with transaction.atomic():
+        calendar = Calendar.objects.create(owner=owner, name=name[:100], color=color or "#1f6feb")
+        CalendarMembership.objects.create(calendar=calendar, user=owner, role=CalendarMembership.OWNER)
+    return calendar
+
+
+def share(calendar, actor, username, role):
+    """
+    Give `username` `role` in the calendar, or take them off it when role is
+    None. Only the owner shares; any member may take themselves off.
+    Returns the membership, or None when it was removed.
+    """
+    member = User.objects.filter(username=username).first()
+    if member is None:
+        raise CalendarError(f"No user {username!r}")
+    if actor.pk != calendar.owner_id and not (role is None and member.pk == actor.pk):
+        raise CalendarError("Only the owner can share this calendar")
+    if member.pk == calendar.owner_id:
+        raise CalendarError("The owner's role can't change")
+    if role is None:
+        CalendarMembership.objects.filter(calendar=calendar, user=member).delete()
+        return None
+    if role not in (CalendarMembership.VIEWER, CalendarMembership.EDITOR):
+        raise CalendarError(f"Unknown role {role!r}")
+    membership, _ = CalendarMembership.objects.update_or_create(
+        calendar=calendar, user=member, defaults={"role": role},
+    )
+    return membership
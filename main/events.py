@@ -0,0 +1,80 @@
+"""
+Calendar work that runs as background jobs (main.jobs): materializing the
+instances of a recurring event, and creating the event linked to a task.
+Both are idempotent, so a retried job doesn't duplicate anything.
+"""
+
+import calendar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from .jobs import job
+from .models import Calendar, CalendarEvent, Task
+
+
+def occurrence_dates(first, end, pattern):
+    """Dates after `first`, up to and including `end`, repeating daily, weekly or monthly."""
+    day = first
+    while day < end:
+        if pattern == "daily":
+            day += timedelta(days=1)
+        elif pattern == "monthly":
+            year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+            # Clamp to the end of shorter months (Jan 31 -> Feb 28)
+            day = day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+        else:
+            day += timedelta(weeks=1)
+        if day <= end:
+            yield day
+
+
+@job
+def materialize_recurrence(event_id):
+    """Create the instances of a recurring event, once."""
+    with transaction.atomic():
+        event = CalendarEvent.objects.select_for_update().filter(
+            id=event_id, is_recurring=True, recurrence_end_date__isnull=False,
+        ).first()
+        if event is None or event.recurring_instances.exists():
+            return
+
+        CalendarEvent.objects.bulk_create([
+            CalendarEvent(
+                user_id=event.user_id,
+                calendar_id=event.calendar_id,
+                title=event.title,
+                description=event.description,
+                event_date=day,
+                start_time=event.start_time,
+                end_time=event.end_time,
+                category=event.category,
+                color=event.color,
+                reminder_enabled=event.reminder_enabled,
+                reminder_minutes_before=event.reminder_minutes_before,
+                parent_event=event,
+            )
+            for day in occurrence_dates(event.event_date, event.recurrence_end_date, event.recurrence_pattern or "weekly")
+        ], batch_size=500)
+        Calendar.bump_version(event.calendar_id)
+
+
+@job
+def link_task_event(task_id):
+    """Create the calendar event for a task added to the calendar, unless it already has one."""
+    with transaction.atomic():
+        task = Task.objects.select_for_update().filter(id=task_id, linked_calendar_event__isnull=True).first()
+        if task is None or not task.add_to_calendar or not task.due_date:
+            return
+
+        event = CalendarEvent(
+            user_id=task.user_id,
+            title=task.title,
+            description=f"Task: {task.title}",
+            event_date=task.due_date,
+            category=task.category,
+        )
+        event.color = event.get_category_color()
+        event.save()
+        Task.objects.filter(id=task.id).update(linked_calendar_event=event, version=F("version") + 1)
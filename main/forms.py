@@ -1,5 +1,9 @@
 from django import forms
-from .models import Task, CalendarEvent
+from django.contrib.auth.forms import PasswordResetForm
+from django.template.loader import render_to_string
+
+from . import mail
+from .models import Task, CalendarEvent, Habit, OutboundEmail
 
 class TaskForm(forms.ModelForm):
     class Meta:
@@ -19,3 +23,23 @@ class CalendarEventForm(forms.ModelForm):
             'end_time': forms.TimeInput(attrs={'type': 'time'}),
             'description': forms.Textarea(attrs={'rows': 3}),
         }
+
+class HabitForm(forms.ModelForm):
+    class Meta:
+        model = Habit
+        fields = ["title", "schedule", "times_per_week"]
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Renders the reset email during the request and puts it in the outbox (main.mail)."""
+
+    def send_mail(self, subject_template_name, email_template_name, context,
+                  from_email, to_email, html_email_template_name=None):
+        mail.queue(OutboundEmail(
+            kind="password_reset",
+            to=to_email,
+            from_email=from_email or "",
+            subject="".join(render_to_string(subject_template_name, context).splitlines()),
+            body=render_to_string(email_template_name, context),
+            html=render_to_string(html_email_template_name, context) if html_email_template_name else "",
+        ))
@@ -0,0 +1,64 @@
+"""
+Cached HTML for task cards.
+
+A card is cached under the task id and Task.version, which goes up on every
+write to the task or its subtasks. An edited card therefore misses the cache
+instead of needing an explicit delete, and old versions age out on their own.
+The hash of the partial's source is part of the key, so a deploy that changes
+the template doesn't serve old markup.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+
+TASK_CARD_TEMPLATE = "main/partials/task_card.html"
+
+
+@functools.cache
+def template_digest():
+    source = get_template(TASK_CARD_TEMPLATE).template.source
+    return hashlib.md5(source.encode()).hexdigest()[:12]
+
+
+def task_card_key(task):
+    return f"task_card:{template_digest()}:{task.pk}:{task.version}"
+
+
+def render_task_card(task):
+    """HTML for one card, rendered and cached on a miss."""
+    key = task_card_key(task)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(TASK_CARD_TEMPLATE, {"task": task})
+        cache.set(key, html, settings.TASK_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def render_task_cards(tasks):
+    """
+    Set `card_html` on every task using one cache round trip for the whole list.
+    Subtasks are only fetched for the cards that have to be rendered.
+    """
+    keys = {task_card_key(task): task for task in tasks}
+    cached = cache.get_many(keys)
+
+    misses = [task for key, task in keys.items() if key not in cached]
+    prefetch_related_objects(misses, "subtasks")
+    rendered = {}
+    for key, task in keys.items():
+        if key in cached:
+            html = cached[key]
+        else:
+            html = rendered[key] = render_to_string(TASK_CARD_TEMPLATE, {"task": task})
+        task.card_html = mark_safe(html)
+
+    if rendered:
+        cache.set_many(rendered, settings.TASK_CARD_CACHE_TIMEOUT)
+    return tasks
@@ -0,0 +1,85 @@
+"""
+Bitmap arithmetic for Habit completion history.
+
+A habit's history is one integer, stored little-endian in Habit.history, where
+bit i is set when the habit was done on start_date + i days. Ten years fit in
+about 460 bytes, and streaks, rates and heatmaps are a handful of shifts, masks
+and popcounts on that integer, computed from the single Habit row.
+"""
+
+from datetime import date, timedelta
+
+
+WEEKDAYS = 0b0011111  # Monday..Friday, Monday = bit 0
+
+# No check-ins or heatmaps before this year: an older day would only pad the
+# history with empty bits (year 1 is about 92 KB of them)
+FIRST_YEAR = 1970
+
+
+def to_int(history):
+    return int.from_bytes(history or b"", "little")
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def low_mask(n):
+    """Bits 0..n-1 set."""
+    return (1 << max(n, 0)) - 1
+
+
+def weekly_pattern(pattern, first_weekday, n):
+    """Repeat a 7-bit Monday-first weekday pattern over n days starting on first_weekday."""
+    # Rotate so bit 0 is first_weekday, then double the pattern until it covers n days
+    week = ((pattern >> first_weekday) | (pattern << (7 - first_weekday))) & 0b1111111
+    bits, width = week, 7
+    while width < n:
+        bits |= bits << width
+        width *= 2
+    return bits & low_mask(n)
+
+
+def run_ending_at(bits, end):
+    """Length of the run of set bits that ends at bit `end` (inclusive)."""
+    window = bits & low_mask(end + 1)
+    holes = ~window & low_mask(end + 1)
+    return end - holes.bit_length() + 1
+
+
+def runs(bits):
+    """Yield (start, length) for every run of set bits, lowest first."""
+    while bits:
+        start = (bits & -bits).bit_length() - 1
+        shifted = bits >> start
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        yield start, length
+        bits &= ~(low_mask(length) << start)
+
+
+def week_counts(bits, start_date, end):
+    """Completions in each Monday-based week covering bits 0..end, oldest first."""
+    offset = start_date.weekday()
+    # Pad so bit 0 is a Monday, then take 7 bits at a time
+    padded = (bits & low_mask(end + 1)) << offset
+    weeks = (end + offset) // 7 + 1
+    return [((padded >> (7 * w)) & 0b1111111).bit_count() for w in range(weeks)]
+
+
+def year_slice(bits, start_date, year):
+    """(days in year, bits for that year with bit 0 = Jan 1)."""
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    length = (last - first).days + 1
+    shift = (first - start_date).days
+    if shift >= 0:
+        return length, (bits >> shift) & low_mask(length)
+    return length, (bits << -shift) & low_mask(length)
+
+
+def day_offset(start_date, day):
+    return (day - start_date).days
+
+
+def offset_day(start_date, offset):
+    return start_date + timedelta(days=offset)
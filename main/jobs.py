@@ -0,0 +1,155 @@
+"""
+A small job queue in the application database.
+
+Decorate a module-level function with @job and call enqueue(func, *args) from
+a view. That inserts a Job row. Requests run in autocommit (ATOMIC_REQUESTS is
+off), so the row commits at once and a worker may start on it before the view
+returns: enqueue after the writes the job reads, or inside the same
+transaction.atomic() block when the job must only run if they commit.
+`manage.py run_worker` claims due jobs, runs them, retries failures with
+exponential backoff, and leaves a job FAILED after max_attempts. Arguments
+must be JSON-serializable: pass ids and ISO dates, not model instances.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports
+it (PostgreSQL). On SQLite, where writes are serialized anyway, a worker
+claims a job with a conditional UPDATE and skips it when another worker's
+UPDATE got there first.
+
+With JOBS_EAGER (dev and test profiles) enqueue() runs the function inline,
+so nothing needs a worker.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+def job(func):
+    """Mark a module-level function as runnable by the worker."""
+    func.job_name = f"{func.__module__}.{func.__qualname__}"
+    return func
+
+
+def enqueue(func, *args, delay=0, max_attempts=None, **kwargs):
+    """Queue func(*args, **kwargs) to run in `delay` seconds; returns the Job (None when eager)."""
+    if settings.JOBS_EAGER:
+        func(*args, **kwargs)
+        return None
+    return Job.objects.create(
+        name=func.job_name,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+aenqueue = sync_to_async(enqueue)
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`, doubling from JOB_BACKOFF_SECONDS with 20% jitter."""
+    delay = min(settings.JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.JOB_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(1, 1.2)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(worker):
+    """Lock the next due job for `worker` and return it, or None when nothing is due."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by("run_at", "id")
+    claimed = {"status": Job.RUNNING, "locked_by": worker, "locked_at": now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            found = due.select_for_update(skip_locked=True).first()
+            if found is None:
+                return None
+            found.attempts += 1
+            for field, value in claimed.items():
+                setattr(found, field, value)
+            found.save(update_fields=[*claimed, "attempts"])
+            return found
+
+    # No row locks: claim with a conditional UPDATE and move on if another worker won
+    for found in due[:10]:
+        if Job.objects.filter(id=found.id, status=Job.QUEUED).update(**claimed, attempts=found.attempts + 1):
+            found.attempts += 1
+            for field, value in claimed.items():
+                setattr(found, field, value)
+            return found
+    return None
+
+
+def execute(found):
+    """Run a claimed job. Success deletes it; a failure is rescheduled or marked FAILED."""
+    try:
+        func = import_string(found.name)
+        if not getattr(func, "job_name", None):
+            raise TypeError(f"{found.name} is not a @job function")
+        func(*found.args, **found.kwargs)
+    except Exception:
+        found.last_error = traceback.format_exc()
+        if found.attempts >= found.max_attempts:
+            found.status = Job.FAILED
+            logger.error("Job %s (%s) failed for good:\n%s", found.id, found.name, found.last_error)
+        else:
+            found.status = Job.QUEUED
+            found.run_at = timezone.now() + timedelta(seconds=backoff(found.attempts))
+            logger.warning("Job %s (%s) failed, retrying at %s", found.id, found.name, found.run_at)
+        found.locked_by, found.locked_at = "", None
+        found.save(update_fields=["status", "run_at", "last_error", "locked_by", "locked_at"])
+        return False
+
+    found.delete()
+    return True
+
+
+def requeue_stale(timeout=None):
+    """Put RUNNING jobs whose worker vanished (locked longer than `timeout` seconds) back in the queue."""
+    timeout = timeout or settings.JOB_LOCK_TIMEOUT
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.QUEUED, locked_by="", locked_at=None)
+
+
+def work(stop, poll=1.0, burst=False):
+    """
+    Claim and run jobs until `stop` (a threading/multiprocessing Event) is set,
+    sleeping `poll` seconds when the queue is empty. With `burst`, return as
+    soon as nothing is due. Returns the number of jobs run.
+    """
+    worker = worker_name()
+    ran = 0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            found = claim(worker)
+            if found is None:
+                if burst:
+                    break
+                stop.wait(poll)
+                continue
+            execute(found)
+            ran += 1
+    finally:
+        connection.close()
+    return ran
@@ -0,0 +1,213 @@
+"""
+Outgoing email.
+
+Messages go into an outbox table (OutboundEmail) and the flush_outbox job
+(main.jobs) sends them, so a slow SMTP server never holds up a request. A
+flush claims up to EMAIL_BATCH_SIZE due messages and sends them over a single
+connection, no faster than EMAIL_MAX_PER_SECOND. Then it claims the next
+batch, until nothing is due. A message that fails is retried with the job
+queue's backoff and marked FAILED after EMAIL_MAX_ATTEMPTS; the rest of its
+batch still goes out. When the server answers with a temporary 4xx ("slow
+down"), the flush stops and puts the remaining messages back for later.
+
+Messages with a key go into the outbox once only, so the reminder scan can
+run every minute without sending twice.
+"""
+
+import logging
+import smtplib
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .jobs import backoff, enqueue, job
+from .models import CalendarEvent, Job, OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue(*messages):
+    """
+    Save unsaved OutboundEmail rows to the outbox and make sure a flush is
+    scheduled. Rows whose key is already in the outbox are skipped; returns
+    the number queued.
+    """
+    keys = [m.key for m in messages if m.key]
+    taken = set(OutboundEmail.objects.filter(key__in=keys).values_list("key", flat=True)) if keys else set()
+    new = [m for m in messages if not m.key or m.key not in taken]
+    if not new:
+        return 0
+    # ignore_conflicts covers a concurrent scan queueing the same key
+    OutboundEmail.objects.bulk_create(new, ignore_conflicts=True)
+    schedule_flush()
+    return len(new)
+
+
+def schedule_flush():
+    """Queue a flush_outbox job unless one is already waiting to run."""
+    if settings.JOBS_EAGER or not Job.objects.filter(name=flush_outbox.job_name, status=Job.QUEUED).exists():
+        enqueue(flush_outbox)
+
+
+@job
+def flush_outbox():
+    flush()
+
+
+def claim(batch_size):
+    """Mark up to batch_size due messages SENDING and return them."""
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(status=OutboundEmail.QUEUED, send_after__lte=now).order_by("send_after", "id")
+    # Row locks where there are any; on SQLite the IMMEDIATE transaction serializes claims
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboundEmail.objects.filter(id__in=[m.id for m in batch]).update(status=OutboundEmail.SENDING, locked_at=now)
+    return batch
+
+
+def release(messages, delay=0):
+    """Put claimed messages back in the queue without counting an attempt."""
+    OutboundEmail.objects.filter(id__in=[m.id for m in messages], status=OutboundEmail.SENDING).update(
+        status=OutboundEmail.QUEUED, locked_at=None, send_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def requeue_stale(timeout=None):
+    """
+    Requeue messages left SENDING by a flush that died. The server may have
+    accepted one of them already, so this can deliver it twice.
+    """
+    timeout = timeout or settings.JOB_LOCK_TIMEOUT
+    return OutboundEmail.objects.filter(
+        status=OutboundEmail.SENDING, locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=OutboundEmail.QUEUED, locked_at=None)
+
+
+def as_email(message, backend):
+    email = EmailMultiAlternatives(
+        message.subject, message.body, message.from_email or settings.DEFAULT_FROM_EMAIL, [message.to],
+        connection=backend,
+    )
+    if message.html:
+        email.attach_alternative(message.html, "text/html")
+    return email
+
+
+def failed(message, error):
+    """Schedule a retry for a message that couldn't be sent, or give up on it."""
+    message.attempts += 1
+    message.last_error = f"{type(error).__name__}: {error}"
+    message.locked_at = None
+    if message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        message.status = OutboundEmail.FAILED
+        logger.error("Email %s (%s to %s) failed for good: %s", message.id, message.kind, message.to, error)
+    else:
+        message.status = OutboundEmail.QUEUED
+        message.send_after = timezone.now() + timedelta(seconds=backoff(message.attempts))
+        logger.warning("Email %s (%s) failed, retrying at %s: %s", message.id, message.kind, message.send_after, error)
+    message.save(update_fields=["attempts", "last_error", "locked_at", "status", "send_after"])
+
+
+def throttled(error):
+    """A temporary SMTP rejection (421, 450-452): the server wants us to back off."""
+    return isinstance(error, smtplib.SMTPResponseException) and 400 <= error.smtp_code < 500
+
+
+def flush(batch_size=None, max_per_second=None):
+    """Send every due message in the outbox; returns (sent, failed)."""
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    rate = settings.EMAIL_MAX_PER_SECOND if max_per_second is None else max_per_second
+    interval = 1 / rate if rate else 0
+    sent = failures = 0
+    last_send = 0.0
+
+    requeue_stale()
+    OutboundEmail.objects.filter(
+        status=OutboundEmail.SENT, sent_at__lt=timezone.now() - timedelta(days=settings.EMAIL_KEEP_SENT_DAYS),
+    ).delete()
+
+    while batch := claim(batch_size):
+        backend = get_connection(fail_silently=False)
+        done = []
+        try:
+            # One connection (and login) for the whole batch
+            backend.open()
+            for i, message in enumerate(batch):
+                wait = last_send + interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                last_send = time.monotonic()
+                try:
+                    backend.send_messages([as_email(message, backend)])
+                except Exception as error:
+                    failures += 1
+                    failed(message, error)
+                    if throttled(error):
+                        release(batch[i + 1:], delay=backoff(1))
+                        return sent + len(done), failures
+                    # The connection may be gone: start a new one for the rest
+                    backend.close()
+                    backend.open()
+                    continue
+                done.append(message.id)
+        finally:
+            OutboundEmail.objects.filter(id__in=done).update(
+                status=OutboundEmail.SENT, sent_at=timezone.now(), locked_at=None, attempts=F("attempts") + 1,
+            )
+            # Whatever was neither sent nor failed goes back, e.g. after open() raised
+            release(batch)
+            backend.close()
+        sent += len(done)
+
+    return sent, failures
+
+
+# ---------- event reminders ----------
+
+def reminder_time(event):
+    """Aware local start of the event (midnight for all-day events) minus its reminder lead time."""
+    start = timezone.make_aware(datetime.combine(event.event_date, event.start_time or datetime.min.time()))
+    return start, start - timedelta(minutes=event.reminder_minutes_before)
+
+
+def queue_reminders(now=None):
+    """
+    Queue an email for every event whose reminder time has come and which
+    hasn't started yet. The templates are loaded once per scan, not per
+    message. Returns the number of messages queued.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    upcoming = CalendarEvent.objects.filter(
+        reminder_enabled=True, event_date__gte=today, user__email__gt="",
+    )
+    lead = upcoming.aggregate(longest=Max("reminder_minutes_before"))["longest"]
+    if lead is None:
+        return 0
+    horizon = timezone.localdate(now + timedelta(minutes=max(lead, 0)))
+
+    subject_template = get_template("main/emails/event_reminder_subject.txt")
+    body_template = get_template("main/emails/event_reminder.txt")
+    messages = []
+    for event in upcoming.filter(event_date__lte=horizon).select_related("user"):
+        start, remind_at = reminder_time(event)
+        if not remind_at <= now < start:
+            continue
+        context = {"event": event, "user": event.user, "start": timezone.localtime(start)}
+        messages.append(OutboundEmail(
+            kind="event_reminder",
+            key=f"reminder:{event.id}:{event.event_date.isoformat()}:{event.start_time or ''}",
+            to=event.user.email,
+            subject="".join(subject_template.render(context).splitlines()),
+            body=body_template.render(context),
+        ))
+    return queue(*messages)
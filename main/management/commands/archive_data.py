@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main import archive
+
+
+def user_ids_for(usernames):
+    """Ids for --user options, or None for every user."""
+    if not usernames:
+        return None
+    found = dict(User.objects.filter(username__in=usernames).values_list("username", "id"))
+    missing = sorted(set(usernames) - set(found))
+    if missing:
+        raise CommandError(f"Unknown user(s): {', '.join(missing)}")
+    return list(found.values())
+
+
+class Command(BaseCommand):
+    help = "Move completed tasks (with subtasks) and timer sessions older than --days into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help=f"Archive rows older than this many days (at least {archive.MIN_AGE_DAYS})",
+        )
+        parser.add_argument("--user", action="append", default=[], help="Username to archive (repeatable; default all users)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows moved per transaction")
+        parser.add_argument("--skip-tasks", action="store_true")
+        parser.add_argument("--skip-sessions", action="store_true")
+
+    def handle(self, *args, **opts):
+        try:
+            before = archive.cutoff(opts["days"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        user_ids = user_ids_for(opts["user"])
+
+        started = time.perf_counter()
+        if not opts["skip_tasks"]:
+            tasks, subtasks = archive.archive_tasks(before, user_ids, batch_size=opts["batch_size"])
+            self.stdout.write(f"Archived {tasks} task(s) and {subtasks} subtask(s)")
+        if not opts["skip_sessions"]:
+            sessions = archive.archive_sessions(before, user_ids, batch_size=opts["batch_size"])
+            self.stdout.write(f"Archived {sessions} timer session(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived rows older than {before:%Y-%m-%d} in {time.perf_counter() - started:.1f}s"
+        ))
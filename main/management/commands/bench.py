@@ -0,0 +1,259 @@
+import json
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from main import urls as main_urls
+from main.models import Task, SubTask, Calendar, CalendarEvent, Habit, ArchivedTask
+
+
+XHR = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class QueryCounter:
+    """execute_wrapper that counts statements (unbounded, unlike connection.queries)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def build_requests(user):
+    """Map every URL name in main/urls.py to (method, path, kwargs for the test client)."""
+    task = Task.objects.filter(user=user).first()
+    subtask = SubTask.objects.filter(task__user=user).first()
+    event = CalendarEvent.objects.filter(user=user, parent_event__isnull=True).first()
+    habit = Habit.objects.filter(user=user).first()
+    archived = ArchivedTask.objects.filter(user=user).first()
+    calendar = Calendar.objects.filter(owner=user).first()
+    member = calendar.memberships.exclude(user=user).select_related("user").first() if calendar else None
+    if not (task and subtask and event and habit):
+        raise CommandError(f"{user.username} has no tasks/subtasks/events/habits; run seed_habitcanvas first.")
+
+    # Drop the first task between the second and third
+    neighbours = list(Task.objects.filter(user=user).values_list("id", flat=True)[1:3]) + ["", ""]
+
+    today = timezone.localdate()
+    now = timezone.now()
+    event_json = {
+        "title": "Bench event", "event_date": today.isoformat(),
+        "start_time": "09:00", "end_time": "10:00", "category": "Work",
+    }
+    task_form = {"title": "Bench task", "category": "Work", "difficulty": "Easy", "priority": 1}
+    as_json = {"content_type": "application/json"}
+
+    return {
+        "landing": ("get", reverse("landing"), {}),
+        "register": ("get", reverse("register"), {}),
+        "login": ("get", reverse("login"), {}),
+        "logout": ("get", reverse("logout"), {}),
+        "dashboard": ("get", reverse("dashboard"), {}),
+        "tasks": ("get", reverse("tasks"), {}),
+        "add_task": ("post", reverse("add_task"), {"data": task_form, **XHR}),
+        "edit_task": ("post", reverse("edit_task", args=[task.id]), {"data": task_form, **XHR}),
+        "delete_task": ("post", reverse("delete_task", args=[task.id]), XHR),
+        "toggle_complete": ("post", reverse("toggle_complete", args=[task.id]), XHR),
+        "toggle_favorite": ("post", reverse("toggle_favorite", args=[task.id]), XHR),
+        "move_task": ("post", reverse("move_task", args=[task.id]), {
+            "data": {"above": neighbours[0], "below": neighbours[1]}, **XHR,
+        }),
+        "bulk_tasks": ("post", reverse("bulk_tasks"), {
+            "data": json.dumps({
+                "action": "complete",
+                "ids": list(Task.objects.filter(user=user).values_list("id", flat=True)[:100]),
+            }), **as_json,
+        }),
+        "timer": ("get", reverse("timer"), {}),
+        "save_session": ("post", reverse("save_session"), {
+            "data": json.dumps({
+                "startTime": (now - timedelta(minutes=25)).isoformat(),
+                "endTime": now.isoformat(), "duration": 25, "mode": "focus",
+            }), **as_json,
+        }),
+        "get_timer_stats": ("get", reverse("get_timer_stats"), {}),
+        "calendar": ("get", reverse("calendar"), {}),
+        # The range the calendar page loads
+        "get_events": ("get", reverse("get_events"), {"data": {
+            "start": (today - timedelta(days=365)).isoformat(), "end": (today + timedelta(days=365)).isoformat(),
+        }}),
+        "add_event": ("post", reverse("add_event"), {"data": json.dumps(event_json), **as_json}),
+        "edit_event": ("post", reverse("edit_event", args=[event.id]), {"data": json.dumps(event_json), **as_json}),
+        "delete_event": ("post", reverse("delete_event", args=[event.id]), {}),
+        "reschedule_event": ("post", reverse("reschedule_event", args=[event.id]), {
+            "data": json.dumps({"new_date": today.isoformat()}), **as_json,
+        }),
+        "add_calendar": ("post", reverse("add_calendar"), {"data": json.dumps({"name": "Bench"}), **as_json}),
+        # 404s unless the account owns a shared calendar (seed_habitcanvas --team-events)
+        "share_calendar": ("post", reverse("share_calendar", args=[calendar.id if calendar else 0]), {
+            "data": json.dumps({"username": member.user.username if member else "", "role": "editor"}), **as_json,
+        }),
+        "delete_calendar": ("post", reverse("delete_calendar", args=[calendar.id if calendar else 0]), {}),
+        "get_subtasks": ("get", reverse("get_subtasks", args=[task.id]), XHR),
+        "add_subtask": ("post", reverse("add_subtask", args=[task.id]), {"data": {"title": "Bench step"}, **XHR}),
+        "toggle_subtask": ("post", reverse("toggle_subtask", args=[subtask.id]), XHR),
+        "delete_subtask": ("post", reverse("delete_subtask", args=[subtask.id]), XHR),
+        # Moves the subtask to the top level
+        "move_subtask": ("post", reverse("move_subtask", args=[subtask.id]), {"data": {"parent": ""}}),
+        "get_habits": ("get", reverse("get_habits"), {}),
+        "add_habit": ("post", reverse("add_habit"), {"data": {"title": "Bench habit", "schedule": "daily", "times_per_week": 3}}),
+        "check_habit": ("post", reverse("check_habit", args=[habit.id]), {"data": "{}", **as_json}),
+        "delete_habit": ("post", reverse("delete_habit", args=[habit.id]), {}),
+        "habit_heatmap": ("get", reverse("habit_heatmap", args=[habit.id]), {"data": {"year": today.year}}),
+        "stats_heatmap": ("get", reverse("stats_heatmap"), {"data": {"year": today.year}}),
+        "task_analytics": ("get", reverse("task_analytics"), {}),
+        "archived_tasks": ("get", reverse("archived_tasks"), {}),
+        # 404s unless the account has been through archive_data
+        "restore_archived_task": ("post", reverse("restore_archived_task", args=[archived.id if archived else 0]), {}),
+        "search": ("get", reverse("search"), {"data": {"q": "study"}}),
+        "search_suggest": ("get", reverse("search_suggest"), {"data": {"q": "st"}}),
+        "export_account": ("get", reverse("export_account"), {"data": {"format": "zip"}}),
+        # 404s unless prometheus_client is installed and METRICS_TOKEN is set (or DEBUG is on)
+        "metrics": ("get", reverse("metrics"), {"HTTP_AUTHORIZATION": f"Bearer {settings.METRICS_TOKEN}"}),
+        "service_worker": ("get", reverse("service_worker"), {}),
+        # A reconnecting client's queue: one round trip for writes of every kind
+        "sync_mutations": ("post", reverse("sync_mutations"), {"data": json.dumps({"mutations": [
+            {"id": 1, "key": "bench-1", "method": "POST", "url": reverse("toggle_complete", args=[task.id]),
+             "body": "completed=true", "content_type": "application/x-www-form-urlencoded"},
+            {"id": 2, "key": "bench-2", "method": "POST", "url": reverse("toggle_favorite", args=[task.id]),
+             "body": "favorite=true", "content_type": "application/x-www-form-urlencoded"},
+            {"id": 3, "key": "bench-3", "method": "POST", "url": reverse("toggle_subtask", args=[subtask.id]),
+             "body": "completed=true", "content_type": "application/x-www-form-urlencoded"},
+            {"id": 4, "key": "bench-4", "method": "POST", "url": reverse("reschedule_event", args=[event.id]),
+             "body": json.dumps({"new_date": today.isoformat()}), "content_type": "application/json"},
+            {"id": 5, "key": "bench-5", "method": "POST", "url": reverse("check_habit", args=[habit.id]),
+             "body": json.dumps({"done": True}), "content_type": "application/json"},
+        ]}), **as_json}),
+        "password_reset": ("get", reverse("password_reset"), {}),
+        "password_reset_done": ("get", reverse("password_reset_done"), {}),
+        "password_reset_confirm": ("get", reverse("password_reset_confirm", kwargs={
+            "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+            "token": default_token_generator.make_token(user),
+        }), {}),
+        "password_reset_complete": ("get", reverse("password_reset_complete"), {}),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every URL in main/urls.py through the test client as a seeded user and "
+        "report p50/p95 latency, query counts and peak memory as JSON. "
+        "Each request runs inside a rolled-back transaction, so the database is left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed0@gmail.com", help="Username of the account to benchmark as")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", nargs="*", help="Restrict to these URL names")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **opts):
+        try:
+            user = User.objects.get(username=opts["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {opts['user']} not found; run seed_habitcanvas first.")
+
+        requests = build_requests(user)
+        names = [p.name for p in main_urls.urlpatterns if p.name]
+        missing = [name for name in names if name not in requests]
+        if missing:
+            raise CommandError(f"No benchmark request defined for: {', '.join(missing)}")
+        if opts["only"]:
+            names = [name for name in names if name in opts["only"]]
+
+        # Per-request metric logs and budget warnings would drown the report.
+        logging.getLogger("main.requests").setLevel(logging.ERROR)
+
+        client = Client()
+        results = {}
+        for name in names:
+            method, path, kwargs = requests[name]
+            results[name] = self.bench(client, user, method, path, kwargs, opts["iterations"], opts["warmup"])
+            self.stderr.write(f"{name:<24} p50={results[name]['p50_ms']:.2f}ms queries={results[name]['queries']}")
+
+        report = {
+            "meta": {
+                "user": user.username,
+                "iterations": opts["iterations"],
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "timestamp": timezone.now().isoformat(),
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def call(self, client, user, method, path, kwargs):
+        """Issue one request inside a rolled-back transaction; return (response, ms, queries)."""
+        # Re-login every time so logout (and other session changes) don't leak into the next run.
+        client.force_login(user)
+        with transaction.atomic():
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    # The body is built while it's read (account export)
+                    b"".join(response.streaming_content)
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        return response, elapsed, counter.count
+
+    def bench(self, client, user, method, path, kwargs, iterations, warmup):
+        for _ in range(warmup):
+            self.call(client, user, method, path, kwargs)
+
+        timings = []
+        query_counts = []
+        status = None
+        for _ in range(iterations):
+            response, elapsed, queries = self.call(client, user, method, path, kwargs)
+            timings.append(elapsed)
+            query_counts.append(queries)
+            status = response.status_code
+
+        # Memory is measured on a separate run so tracemalloc overhead does not skew latency.
+        tracemalloc.start()
+        self.call(client, user, method, path, kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "method": method.upper(),
+            "path": path,
+            "status": status,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": max(query_counts),
+            "peak_kb": round(peak / 1024, 1),
+        }
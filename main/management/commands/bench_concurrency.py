@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from HabitCanvas.asgi import application
+from main.models import Task
+from main.management.commands.bench import XHR, percentile
+
+
+class DelayWrapper:
+    """execute_wrapper that sleeps before each query to mimic a remote or busy database."""
+
+    def __init__(self, delay_ms):
+        self.delay = delay_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the async JSON endpoints served through the ASGI handler "
+        "at several concurrency levels against a single synchronous worker, in one process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed0@gmail.com")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--endpoints", nargs="+", default=["get_events", "get_timer_stats", "get_subtasks"])
+        parser.add_argument(
+            "--db-latency-ms", type=float, default=0,
+            help="Add this much latency to every query (e.g. 5 to approximate a networked Postgres)",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **opts):
+        try:
+            user = User.objects.get(username=opts["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {opts['user']} not found; run seed_habitcanvas first.")
+        task = Task.objects.filter(user=user).first()
+        if task is None:
+            raise CommandError(f"{user.username} has no tasks; run seed_habitcanvas first.")
+
+        logging.getLogger("main.requests").setLevel(logging.ERROR)
+        if opts["db_latency_ms"]:
+            delay = DelayWrapper(opts["db_latency_ms"])
+            connection.execute_wrappers.append(delay)
+            # ASGI requests run their ORM calls on per-request threads with their own connections
+            connection_created.connect(
+                lambda sender, connection, **kw: connection.execute_wrappers.append(delay), weak=False
+            )
+
+        paths = {
+            "get_events": reverse("get_events"),
+            "get_timer_stats": reverse("get_timer_stats"),
+            "get_subtasks": reverse("get_subtasks", args=[task.id]),
+        }
+        unknown = set(opts["endpoints"]) - set(paths)
+        if unknown:
+            raise CommandError(f"Unsupported endpoints: {', '.join(sorted(unknown))}")
+
+        results = {}
+        for name in opts["endpoints"]:
+            path = paths[name]
+            sync_result = self.run_sync(user, path, opts["requests"])
+            levels = [
+                asyncio.run(self.run_async(user, path, opts["requests"], level))
+                for level in opts["concurrency"]
+            ]
+            best = max(levels, key=lambda r: r["rps"])
+            results[name] = {
+                "path": path,
+                "sync_worker": sync_result,
+                "asgi": levels,
+                "speedup": round(best["rps"] / sync_result["rps"], 2),
+            }
+            self.stderr.write(
+                f"{name:<18} sync={sync_result['rps']:.0f} req/s  "
+                + "  ".join(f"c{r['concurrency']}={r['rps']:.0f} req/s" for r in levels)
+            )
+
+        output = json.dumps({
+            "meta": {
+                "user": user.username,
+                "requests": opts["requests"],
+                "db_latency_ms": opts["db_latency_ms"],
+                "timestamp": timezone.now().isoformat(),
+            },
+            "results": results,
+        }, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def summarize(self, latencies, elapsed, concurrency):
+        return {
+            "concurrency": concurrency,
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        }
+
+    def run_sync(self, user, path, total):
+        """One synchronous worker: requests are handled strictly one after another."""
+        client = Client()
+        client.force_login(user)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(total):
+            t0 = time.perf_counter()
+            client.get(path, **XHR)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return self.summarize(latencies, time.perf_counter() - started, 1)
+
+    async def run_async(self, user, path, total, concurrency):
+        """HabitCanvas.asgi.application with up to `concurrency` requests in flight on one event loop."""
+        client = Client()
+        await sync_to_async(client.force_login)(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with gate:
+                t0 = time.perf_counter()
+                status = await asgi_get(application, path, cookie)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if status != 200:
+                    raise CommandError(f"GET {path} returned {status}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return self.summarize(latencies, time.perf_counter() - started, concurrency)
+
+
+async def asgi_get(app, path, cookie):
+    """Issue one XHR GET straight at an ASGI application, the way uvicorn would; return the status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"cookie", cookie.encode()),
+            (b"x-requested-with", b"XMLHttpRequest"),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = None
+    body_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status
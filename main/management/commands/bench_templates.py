@@ -0,0 +1,148 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.template import RequestContext
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from main.forms import TaskForm
+from main.management.commands.bench import percentile
+from main.models import Task
+
+
+UNCACHED_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+CONTEXT_PROCESSORS = [
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+]
+
+
+def make_engine(name, debug, loaders, context_processors):
+    return DjangoTemplates({
+        "NAME": name,
+        "DIRS": settings.TEMPLATES[0]["DIRS"],
+        "APP_DIRS": False,
+        "OPTIONS": {"debug": debug, "loaders": loaders, "context_processors": context_processors},
+    }).engine
+
+
+def build_engines():
+    """The template setups being compared, from the old dev default to the prod profile."""
+    cached = [("django.template.loaders.cached.Loader", UNCACHED_LOADERS)]
+    debug_processors = ["django.template.context_processors.debug", *CONTEXT_PROCESSORS]
+    return {
+        # Template debug info on and every render re-reads and re-parses the files
+        "debug_uncached": make_engine("debug_uncached", True, UNCACHED_LOADERS, debug_processors),
+        # Current dev profile: Django caches templates by default but keeps debug info
+        "debug_cached": make_engine("debug_cached", True, cached, debug_processors),
+        # prod profile
+        "prod_cached": make_engine("prod_cached", False, cached, CONTEXT_PROCESSORS),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what the prod settings profile saves over dev: dashboard template render "
+        "time and memory with/without the cached loader and template debug info, and the "
+        "memory DEBUG spends keeping every SQL query of a request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed0@gmail.com")
+        parser.add_argument("--template", default="main/dashboard.html")
+        parser.add_argument("--renders", type=int, default=50)
+        parser.add_argument("--queries", type=int, default=2000, help="Queries issued for the DEBUG query-log test")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **opts):
+        try:
+            user = User.objects.get(username=opts["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {opts['user']} not found; run seed_habitcanvas first.")
+
+        request = RequestFactory().get("/dashboard/")
+        request.user = user
+        tasks = list(Task.objects.filter(user=user).order_by("-id").prefetch_related("subtasks"))
+        context = {
+            "tasks": tasks,
+            "form": TaskForm(),
+            "active_count": sum(1 for t in tasks if not t.completed),
+        }
+
+        renders = {}
+        for name, engine in build_engines().items():
+            renders[name] = self.bench_render(engine, opts["template"], request, context, opts["renders"])
+            self.stderr.write(
+                f"{name:<16} p50={renders[name]['p50_ms']:.2f}ms peak={renders[name]['peak_kb']:.0f}KB"
+            )
+
+        report = {
+            "meta": {
+                "user": user.username,
+                "template": opts["template"],
+                "tasks": len(tasks),
+                "renders": opts["renders"],
+                "timestamp": timezone.now().isoformat(),
+            },
+            "template_render": renders,
+            "debug_query_log": self.bench_query_log(opts["queries"]),
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def render(self, engine, template_name, request, context):
+        return engine.get_template(template_name).render(RequestContext(request, context))
+
+    def bench_render(self, engine, template_name, request, context, renders):
+        self.render(engine, template_name, request, context)  # warm the loader cache
+
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            self.render(engine, template_name, request, context)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        self.render(engine, template_name, request, context)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def bench_query_log(self, queries):
+        """Memory retained by connection.queries, which DEBUG=True fills on every query."""
+        result = {}
+        for label, debug_cursor in (("debug_on", True), ("debug_off", False)):
+            reset_queries()
+            connection.force_debug_cursor = debug_cursor
+            tracemalloc.start()
+            try:
+                for _ in range(queries):
+                    list(Task.objects.filter(id=0))
+                retained, _ = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                connection.force_debug_cursor = False
+            result[label] = {"queries": queries, "retained_kb": round(retained / 1024, 1)}
+        reset_queries()
+        return result
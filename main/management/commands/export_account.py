@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main import transfer
+
+
+class Command(BaseCommand):
+    help = "Write a user's whole account to an NDJSON or zip file (main.transfer), e.g. to move it to another deployment."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Username to export")
+        parser.add_argument("--output", default="-", help="File to write (default: stdout)")
+        parser.add_argument("--format", choices=["ndjson", "zip"], default="ndjson")
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(username=opts["user"]).first()
+        if user is None:
+            raise CommandError(f"Unknown user: {opts['user']}")
+
+        export = transfer.export_zip if opts["format"] == "zip" else transfer.export_ndjson
+        started = time.perf_counter()
+        written = 0
+        out = sys.stdout.buffer if opts["output"] == "-" else open(opts["output"], "wb")
+        try:
+            for chunk in export(user):
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if opts["output"] != "-":
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {written / 1024:.0f} KB to {opts['output']} in {time.perf_counter() - started:.1f}s"
+            ))
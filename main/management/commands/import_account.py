@@ -0,0 +1,45 @@
+import itertools
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main import transfer
+
+
+class Command(BaseCommand):
+    help = "Load an account export (NDJSON or zip, from export_account or /account/export/) into a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Export file")
+        parser.add_argument("--user", help="Username to import into (default: the username in the export)")
+        parser.add_argument("--create", action="store_true", help="Create the user if missing (unusable password; they reset it)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        with open(opts["file"], "rb") as export, transaction.atomic():
+            records = transfer.read_export(export)
+            try:
+                header = next(records, None) or {}
+                username = opts["user"] or header.get("username")
+                if not username:
+                    raise CommandError("The export names no user; pass --user")
+
+                user = User.objects.filter(username=username).first()
+                if user is None:
+                    if not opts["create"]:
+                        raise CommandError(f"Unknown user: {username} (add --create to create it)")
+                    user = User(username=username, email=header.get("email", ""))
+                    user.set_unusable_password()
+                    user.save()
+
+                counts = transfer.import_account(user, itertools.chain([header], records), batch_size=opts["batch_size"])
+            except transfer.ImportFailed as error:
+                raise CommandError(f"Import failed, nothing was written: {error}")
+
+        summary = ", ".join(f"{rows} {section}" for section, rows in counts.items() if rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported into {user.get_username()}: {summary or 'nothing'} in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main.streaks import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute focus streaks from TimerSession history, in local days, in one pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", default=[], help="Username to rebuild (repeatable; default all users)")
+        parser.add_argument("--batch-size", type=int, default=500, help="UserStreak rows per upsert")
+
+    def handle(self, *args, **opts):
+        user_ids = None
+        if opts["user"]:
+            found = dict(User.objects.filter(username__in=opts["user"]).values_list("username", "id"))
+            missing = sorted(set(opts["user"]) - set(found))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(missing)}")
+            user_ids = list(found.values())
+
+        started = time.perf_counter()
+        rows = rebuild(user_ids, batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} streak(s) in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.repairs import REPAIRS, run
+
+
+class Command(BaseCommand):
+    help = "Run a batched, resumable data repair from main/repairs.py (--list shows them)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Repair to run")
+        parser.add_argument("--list", action="store_true", help="List the available repairs")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows scanned and updated per transaction")
+        parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start from the first row")
+        parser.add_argument("--show", type=int, default=10, help="Changed rows to print in a dry run")
+
+    def handle(self, *args, **opts):
+        if opts["list"] or not opts["name"]:
+            for name, repair in sorted(REPAIRS.items()):
+                self.stdout.write(f"{name:20} {repair.help}")
+            return
+
+        repair = REPAIRS.get(opts["name"])
+        if repair is None:
+            raise CommandError(f"Unknown repair {opts['name']!r}; see --list")
+
+        shown = 0
+
+        def on_fix(row, values):
+            nonlocal shown
+            if opts["dry_run"] and shown < opts["show"]:
+                shown += 1
+                self.stdout.write(f"  pk {row['pk']}: {values}")
+
+        def on_batch(checkpoint, rate):
+            self.stdout.write(
+                f"{repair.name}: scanned {checkpoint.scanned}, changed {checkpoint.changed}, "
+                f"at pk {checkpoint.last_pk} ({rate:,.0f} rows/s)"
+            )
+
+        checkpoint = run(
+            repair,
+            batch_size=opts["batch_size"],
+            dry_run=opts["dry_run"],
+            restart=opts["restart"],
+            on_batch=on_batch,
+            on_fix=on_fix,
+        )
+        verb = "would change" if opts["dry_run"] else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{repair.name}: {verb} {checkpoint.changed} of {checkpoint.scanned} row(s) scanned"
+        ))
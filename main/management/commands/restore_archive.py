@@ -0,0 +1,40 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import archive
+from main.stats import local_day_bounds
+
+from .archive_data import user_ids_for
+
+
+class Command(BaseCommand):
+    help = "Move archived tasks and timer sessions back into the hot tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", default=[], help="Username to restore (repeatable; default all users)")
+        parser.add_argument("--since", help="Only restore rows from this local date on (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows moved per transaction")
+        parser.add_argument("--skip-tasks", action="store_true")
+        parser.add_argument("--skip-sessions", action="store_true")
+
+    def handle(self, *args, **opts):
+        since = None
+        if opts["since"]:
+            try:
+                day = date.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be a date like 2024-01-31")
+            since = local_day_bounds(day, day)[0]
+        user_ids = user_ids_for(opts["user"])
+
+        started = time.perf_counter()
+        if not opts["skip_tasks"]:
+            tasks, subtasks = archive.restore_tasks(user_ids, since, batch_size=opts["batch_size"])
+            self.stdout.write(f"Restored {tasks} task(s) and {subtasks} subtask(s)")
+        if not opts["skip_sessions"]:
+            sessions = archive.restore_sessions(user_ids, since, batch_size=opts["batch_size"])
+            self.stdout.write(f"Restored {sessions} timer session(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Restored in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from main import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (main.jobs) with a pool of threads or processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Jobs run at once")
+        parser.add_argument(
+            "--pool", choices=["thread", "process"], default="thread",
+            help="Threads suit jobs that wait on the database or SMTP; processes suit CPU-heavy ones",
+        )
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is due")
+
+    def handle(self, *args, **opts):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} job(s) left running by a stopped worker")
+
+        concurrency = max(1, opts["concurrency"])
+        work = {"poll": opts["poll"], "burst": opts["burst"]}
+
+        if concurrency == 1:
+            stop = threading.Event()
+            self.stop_on_signals(stop)
+            ran = jobs.work(stop, **work)
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)"))
+            return
+
+        if opts["pool"] == "process":
+            # Children must not share the parent's database connections
+            connections.close_all()
+            stop = multiprocessing.Event()
+            workers = [multiprocessing.Process(target=jobs.work, args=(stop,), kwargs=work) for _ in range(concurrency)]
+        else:
+            stop = threading.Event()
+            workers = [threading.Thread(target=jobs.work, args=(stop,), kwargs=work) for _ in range(concurrency)]
+
+        self.stop_on_signals(stop)
+        self.stdout.write(f"Started {concurrency} {opts['pool']} worker(s)")
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped"))
+
+    def stop_on_signals(self, stop):
+        """Finish the jobs in progress, then exit, on Ctrl-C or SIGTERM."""
+        def handler(signum, frame):
+            self.stdout.write("Stopping after the current jobs...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, handler)
+        signal.signal(signal.SIGTERM, handler)
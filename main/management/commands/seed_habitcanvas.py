@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.seed import create_users, seed_team_calendar, seed_user
+
+
+class Command(BaseCommand):
+    help = "Generate realistic HabitCanvas accounts (tasks, subtasks, events, timer history) with bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1, help="Number of accounts to create")
+        parser.add_argument("--prefix", default="seed", help="Accounts are named <prefix><n>@gmail.com")
+        parser.add_argument("--password", default="Seed@1234")
+        parser.add_argument("--tasks", type=int, default=50, help="Tasks per user")
+        parser.add_argument("--subtasks", type=int, default=3, help="Subtasks per task")
+        parser.add_argument("--series", type=int, default=5, help="Recurring event series per user")
+        parser.add_argument("--instances", type=int, default=12, help="Occurrences per recurring series")
+        parser.add_argument("--events", type=int, default=20, help="One-off events per user")
+        parser.add_argument("--habits", type=int, default=5, help="Habits per user")
+        parser.add_argument("--years", type=float, default=1, help="Years of TimerSession and habit history")
+        parser.add_argument("--sessions-per-day", type=int, default=4)
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+        parser.add_argument(
+            "--team-events", type=int, default=0,
+            help="Events in a calendar the first account shares with all the others",
+        )
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        users = create_users(opts["users"], prefix=opts["prefix"], password=opts["password"])
+
+        for n, user in enumerate(users):
+            with transaction.atomic():
+                seed_user(
+                    user,
+                    tasks=opts["tasks"],
+                    subtasks=opts["subtasks"],
+                    series=opts["series"],
+                    instances=opts["instances"],
+                    events=opts["events"],
+                    years=opts["years"],
+                    sessions_per_day=opts["sessions_per_day"],
+                    habits=opts["habits"],
+                    seed=None if opts["seed"] is None else opts["seed"] + n,
+                )
+            self.stdout.write(f"Seeded {user.username}")
+
+        if opts["team_events"] and users:
+            calendar = seed_team_calendar(users, opts["team_events"])
+            self.stdout.write(f"Shared {calendar.name} with {len(users) - 1} other user(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} user(s) in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import mail
+
+
+class Command(BaseCommand):
+    help = "Queue reminder emails for calendar events that are coming up. Run it every minute (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--send", action="store_true", help="Also send the outbox here instead of leaving it to run_worker")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        queued = mail.queue_reminders()
+        self.stdout.write(f"Queued {queued} reminder(s)")
+        if opts["send"]:
+            sent, failed = mail.flush()
+            self.stdout.write(f"Sent {sent} email(s), {failed} failed")
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the replica file (REPLICA_DB_PATH), to try main.replicas "
+        "locally. --interval keeps copying, which behaves like a replica lagging by that many seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="Seconds between copies (default: copy once)")
+
+    def handle(self, *args, **opts):
+        replica = settings.REPLICA_DATABASE
+        if replica is None:
+            raise CommandError("No replica configured; set REPLICA_DB_PATH")
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite" or connections[replica].vendor != "sqlite":
+            raise CommandError("sync_replica copies SQLite files; a PostgreSQL replica follows its primary by itself")
+
+        while True:
+            started = time.perf_counter()
+            primary.ensure_connection()
+            target = sqlite3.connect(connections[replica].settings_dict["NAME"])
+            try:
+                # Online backup: a consistent snapshot even while the app writes
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"Copied primary to replica in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not opts["interval"]:
+                break
+            time.sleep(opts["interval"])
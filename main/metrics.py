@@ -0,0 +1,127 @@
+"""
+Prometheus metrics, served at /metrics.
+
+RequestMetricsMiddleware feeds every request into per-view counters and
+histograms (requests, latency, SQL queries, SQL time), labelled with the URL
+name from main/urls.py. Views count business events as they happen (timer
+sessions saved, calendar events created). Gauges read from the database at
+scrape time (failed logins, job queue, email outbox) come from
+DatabaseCollector.
+
+Under gunicorn each worker is a separate process. Set
+PROMETHEUS_MULTIPROC_DIR to an empty directory: every worker then writes its
+samples to memory-mapped files there, and /metrics adds them up across
+workers (gunicorn.conf.py clears it at startup and retires files of dead
+workers). Without it, /metrics reports the current process only, which is
+what runserver and the tests need. Recording a sample is a dict lookup and
+an in-memory add.
+
+prometheus_client is optional: without it the metrics do nothing and
+/metrics is a 404.
+"""
+
+import os
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # metrics are optional, like minification in main.storage
+    prometheus_client = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 30, 50, 100)
+FAILED_LOGIN_WINDOW = timedelta(minutes=15)
+
+
+class _Unavailable:
+    """Stands in for every metric when prometheus_client isn't installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+if prometheus_client is not None:
+    REQUESTS = prometheus_client.Counter(
+        "habitcanvas_requests", "HTTP requests by view, method and status", ["view", "method", "status"],
+    )
+    LATENCY = prometheus_client.Histogram(
+        "habitcanvas_request_duration_seconds", "Time to build the response, by view", ["view"],
+        buckets=LATENCY_BUCKETS,
+    )
+    QUERIES = prometheus_client.Histogram(
+        "habitcanvas_request_queries", "SQL queries per request, by view", ["view"], buckets=QUERY_BUCKETS,
+    )
+    DB_SECONDS = prometheus_client.Counter(
+        "habitcanvas_request_db_seconds", "Time spent in SQL, by view", ["view"],
+    )
+    SESSIONS_SAVED = prometheus_client.Counter(
+        "habitcanvas_timer_sessions_saved", "Timer sessions saved, by mode", ["mode"],
+    )
+    EVENTS_CREATED = prometheus_client.Counter(
+        "habitcanvas_calendar_events_created", "Calendar events created (recurring series count once)",
+    )
+else:
+    REQUESTS = LATENCY = QUERIES = DB_SECONDS = SESSIONS_SAVED = EVENTS_CREATED = _Unavailable()
+
+
+def observe_request(view, method, status, seconds, queries, db_seconds):
+    """Record one finished request; called by RequestMetricsMiddleware."""
+    view = view or "unmatched"
+    REQUESTS.labels(view, method, str(status)).inc()
+    LATENCY.labels(view).observe(seconds)
+    QUERIES.labels(view).observe(queries)
+    DB_SECONDS.labels(view).inc(db_seconds)
+
+
+class DatabaseCollector:
+    """Gauges counted in the database on each scrape, so every worker reports the same value."""
+
+    def collect(self):
+        from .models import Job, LoginAttempt, OutboundEmail
+
+        failed = LoginAttempt.objects.filter(
+            success=False, timestamp__gte=timezone.now() - FAILED_LOGIN_WINDOW,
+        ).count()
+        yield GaugeMetricFamily(
+            "habitcanvas_failed_logins_recent", "Failed logins (LoginAttempt) in the last 15 minutes", value=failed,
+        )
+
+        for name, doc, model, skip in (
+            ("habitcanvas_jobs", "Background jobs by status", Job, None),
+            ("habitcanvas_outbox_emails", "Outbox emails by status (sent ones excluded)", OutboundEmail, OutboundEmail.SENT),
+        ):
+            gauge = GaugeMetricFamily(name, doc, labels=["status"])
+            counts = dict(model.objects.values_list("status").annotate(count=Count("id")).order_by())
+            for status, _ in model.STATUS_CHOICES:
+                if status != skip:
+                    gauge.add_metric([status], counts.get(status, 0))
+            yield gauge
+
+
+def render():
+    """The scrape body in the Prometheus text format, or None without prometheus_client."""
+    if prometheus_client is None:
+        return None
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    database = CollectorRegistry()
+    database.register(DatabaseCollector())
+    return prometheus_client.generate_latest(registry) + prometheus_client.generate_latest(database)
+
+
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST if prometheus_client else "text/plain"
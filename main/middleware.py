@@ -0,0 +1,412 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics as prometheus, replicas
+
+
+logger = logging.getLogger("main.requests")
+
+# Metrics of the request currently being handled (None outside a request).
+_current_metrics = ContextVar("habitcanvas_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Per-request counters collected by RequestMetricsMiddleware."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.queries = []
+        self.keep_sql = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Used as a connection.execute_wrapper(): times every SQL statement.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.query_count += 1
+            self.query_ms += elapsed
+            if self.keep_sql:
+                self.queries.append({"sql": sql, "ms": round(elapsed, 3)})
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.query_ms:.1f};desc="{self.query_count} queries"',
+            f"tpl;dur={self.template_ms:.1f}",
+            f"total;dur={self.total_ms:.1f}",
+        ])
+
+
+def current_metrics():
+    """Return the RequestMetrics of the active request, if any."""
+    return _current_metrics.get()
+
+
+def _install_template_timer():
+    """Wrap the Django template backend so render time is charged to the request."""
+    if getattr(DjangoTemplate.render, "_habitcanvas_timed", False):
+        return
+
+    original_render = DjangoTemplate.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    timed_render._habitcanvas_timed = True
+    DjangoTemplate.render = timed_render
+
+
+def query_budget_for(url_name):
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(url_name, getattr(settings, "QUERY_BUDGET_DEFAULT", None))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records SQL query count, SQL time, template render time and total time
+    for every request, logs them as one JSON line and exposes them through
+    the Server-Timing header. Warns when a view exceeds its query budget.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        _install_template_timer()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = _current_metrics.set(metrics)
+
+        try:
+            with _wrap_all_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+
+        metrics.finish()
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = _current_metrics.set(metrics)
+
+        # The async ORM runs queries on the request's thread-sensitive worker
+        # thread, so the execute wrappers have to be installed there.
+        wrappers = await sync_to_async(_wrap_all_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+            _current_metrics.reset(token)
+
+        metrics.finish()
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match else None
+
+        if getattr(settings, "SERVER_TIMING_ENABLED", True):
+            response["Server-Timing"] = metrics.server_timing()
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": url_name,
+            "status": response.status_code,
+            "queries": metrics.query_count,
+            "db_ms": round(metrics.query_ms, 2),
+            "template_ms": round(metrics.template_ms, 2),
+            "total_ms": round(metrics.total_ms, 2),
+        }
+        logger.info(json.dumps(record), extra={"metrics": record})
+        prometheus.observe_request(
+            url_name, request.method, response.status_code,
+            metrics.total_ms / 1000, metrics.query_count, metrics.query_ms / 1000,
+        )
+
+        budget = query_budget_for(url_name)
+        if budget is not None and metrics.query_count > budget:
+            logger.warning(
+                "Query budget exceeded for %s: %d queries (budget %d)",
+                url_name or request.path, metrics.query_count, budget,
+                extra={"metrics": record},
+            )
+
+
+def _wrap_all_connections(wrapper):
+    """Install an execute_wrapper on every configured database."""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
+
+
+class StackSampler:
+    """
+    Minimal sampling profiler: a background thread snapshots one thread's
+    stack every `interval` seconds and counts identical stacks, producing
+    collapsed-stack output for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class ProfilingMiddleware:
+    """
+    Staff-only, opt-in profiling. Send `X-Profile: 1` or `?_profile=1` and
+    the view runs under cProfile plus a stack sampler; the results are
+    saved to PROFILE_DIR/<request id>/:
+
+        profile.prof      cProfile stats (snakeviz, pstats)
+        stacks.collapsed  collapsed stacks (flamegraph.pl, speedscope)
+        sql.json          every SQL statement with its duration
+        meta.json         path, view, user and timings
+
+    Requests without the flag only pay for one header/GET lookup. Only one
+    request per process is profiled at a time (cProfile allows one active
+    profiler, and Python 3.12+ raises for a second); a flagged request that
+    arrives meanwhile runs unprofiled.
+    Must come after AuthenticationMiddleware and RequestMetricsMiddleware.
+    """
+
+    _lock = threading.Lock()
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            state = self.start(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                self.stop(state)
+        finally:
+            self._lock.release()
+        return self.save(request, response, state)
+
+    async def __acall__(self, request):
+        if not self.requested(request) or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+
+        if not self._lock.acquire(blocking=False):
+            return await self.get_response(request)
+
+        # Under ASGI this profiles the event-loop thread; ORM calls run on
+        # worker threads and are covered by sql.json instead.
+        try:
+            state = self.start(request)
+            try:
+                response = await self.get_response(request)
+            finally:
+                self.stop(state)
+        finally:
+            self._lock.release()
+        return await sync_to_async(self.save)(request, response, state)
+
+    def requested(self, request):
+        return request.headers.get("X-Profile") or request.GET.get("_profile")
+
+    def start(self, request):
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.keep_sql = True
+
+        state = {
+            "id": uuid.uuid4().hex,
+            "metrics": metrics,
+            "profiler": cProfile.Profile(),
+            "sampler": StackSampler(
+                threading.get_ident(), getattr(settings, "PROFILING_SAMPLE_INTERVAL", 0.001)
+            ),
+            "started": time.perf_counter(),
+        }
+        state["sampler"].start()
+        state["profiler"].enable()
+        return state
+
+    def stop(self, state):
+        state["profiler"].disable()
+        state["sampler"].stop()
+        state["elapsed_ms"] = (time.perf_counter() - state["started"]) * 1000
+
+    def save(self, request, response, state):
+        request_id = state["id"]
+        metrics = state["metrics"]
+        sampler = state["sampler"]
+
+        out_dir = Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles")) / request_id
+        out_dir.mkdir(parents=True, exist_ok=True)
+        state["profiler"].dump_stats(out_dir / "profile.prof")
+        (out_dir / "stacks.collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+        (out_dir / "sql.json").write_text(
+            json.dumps(metrics.queries if metrics is not None else [], indent=2), encoding="utf-8"
+        )
+
+        match = getattr(request, "resolver_match", None)
+        (out_dir / "meta.json").write_text(json.dumps({
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": match.url_name if match else None,
+            "user": request.user.get_username(),
+            "status": response.status_code,
+            "elapsed_ms": round(state["elapsed_ms"], 2),
+            "queries": len(metrics.queries) if metrics is not None else None,
+            "samples": sum(sampler.counts.values()),
+        }, indent=2), encoding="utf-8")
+
+        logger.info("Saved profile %s for %s to %s", request_id, request.path, out_dir)
+        response["X-Profile-Id"] = request_id
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise with an async path. The stock middleware is sync-only, which
+    makes Django run every async view below it through a thread; here only
+    actual static file hits go through sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class PrimaryPinMiddleware:
+    """
+    After a request that can write (POST, PUT, PATCH, DELETE), pin the browser
+    to the primary database for REPLICA_STICKY_SECONDS, so the replica-read
+    views (main.replicas) show the user's own changes. Unused without a replica.
+    """
+
+    sync_capable = True
+    async_capable = True
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REPLICA_DATABASE", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.method in self.WRITE_METHODS:
+            replicas.pin(response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method in self.WRITE_METHODS:
+            replicas.pin(response)
+        return response
@@ -0,0 +1,141 @@
+"""
+Full-text index for main.search.
+
+SQLite: one FTS5 table, main_search, kept in sync by triggers. The rowid
+encodes the source row as id * 4 + kind (1 task, 2 subtask, 3 event), so
+every trigger touches the index by rowid. `owner` holds "u<user id>" and is
+indexed, letting a MATCH narrow to one user before ranking.
+
+PostgreSQL: GIN expression indexes on to_tsvector(); the expressions must stay
+identical to the ones in main/search.py or the planner won't use them.
+
+Only series roots and single events are indexed; recurring instances share
+their parent's title and would just repeat it in the results.
+"""
+
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE main_search USING fts5(
+        title, body, owner,
+        task_id UNINDEXED, event_date UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    # Tasks
+    """
+    CREATE TRIGGER main_search_task_ai AFTER INSERT ON main_task BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, task_id)
+        VALUES (NEW.id * 4 + 1, NEW.title, '', 'u' || NEW.user_id, NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_task_au AFTER UPDATE OF title ON main_task BEGIN
+        UPDATE main_search SET title = NEW.title WHERE rowid = NEW.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_task_ad AFTER DELETE ON main_task BEGIN
+        DELETE FROM main_search WHERE rowid = OLD.id * 4 + 1;
+    END
+    """,
+    # Subtasks
+    """
+    CREATE TRIGGER main_search_subtask_ai AFTER INSERT ON main_subtask BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, task_id)
+        SELECT NEW.id * 4 + 2, NEW.title, '', 'u' || user_id, NEW.task_id
+        FROM main_task WHERE id = NEW.task_id;
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_subtask_au AFTER UPDATE OF title ON main_subtask BEGIN
+        UPDATE main_search SET title = NEW.title WHERE rowid = NEW.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_subtask_ad AFTER DELETE ON main_subtask BEGIN
+        DELETE FROM main_search WHERE rowid = OLD.id * 4 + 2;
+    END
+    """,
+    # Calendar events
+    """
+    CREATE TRIGGER main_search_event_ai AFTER INSERT ON main_calendarevent
+    WHEN NEW.parent_event_id IS NULL BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, event_date)
+        VALUES (NEW.id * 4 + 3, NEW.title, NEW.description, 'u' || NEW.user_id, NEW.event_date);
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_event_au AFTER UPDATE OF title, description, event_date ON main_calendarevent
+    WHEN NEW.parent_event_id IS NULL BEGIN
+        UPDATE main_search SET title = NEW.title, body = NEW.description, event_date = NEW.event_date
+        WHERE rowid = NEW.id * 4 + 3;
+    END
+    """,
+    """
+    CREATE TRIGGER main_search_event_ad AFTER DELETE ON main_calendarevent BEGIN
+        DELETE FROM main_search WHERE rowid = OLD.id * 4 + 3;
+    END
+    """,
+    # Backfill
+    """
+    INSERT INTO main_search(rowid, title, body, owner, task_id)
+    SELECT id * 4 + 1, title, '', 'u' || user_id, id FROM main_task
+    """,
+    """
+    INSERT INTO main_search(rowid, title, body, owner, task_id)
+    SELECT s.id * 4 + 2, s.title, '', 'u' || t.user_id, s.task_id
+    FROM main_subtask s JOIN main_task t ON t.id = s.task_id
+    """,
+    """
+    INSERT INTO main_search(rowid, title, body, owner, event_date)
+    SELECT id * 4 + 3, title, description, 'u' || user_id, event_date
+    FROM main_calendarevent WHERE parent_event_id IS NULL
+    """,
+]
+
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS main_search_{table}_{op}"
+    for table in ("task", "subtask", "event")
+    for op in ("ai", "au", "ad")
+] + ["DROP TABLE IF EXISTS main_search"]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX main_task_title_fts ON main_task USING gin (to_tsvector('english', title))",
+    "CREATE INDEX main_subtask_title_fts ON main_subtask USING gin (to_tsvector('english', title))",
+    """
+    CREATE INDEX main_calendarevent_fts ON main_calendarevent
+    USING gin (to_tsvector('english', title || ' ' || description))
+    WHERE parent_event_id IS NULL
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS main_task_title_fts",
+    "DROP INDEX IF EXISTS main_subtask_title_fts",
+    "DROP INDEX IF EXISTS main_calendarevent_fts",
+]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_task_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
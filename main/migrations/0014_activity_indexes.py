@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_habit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['user', 'event_date'], name='main_calend_user_id_aadd2c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'completed_at'], name='main_task_user_id_0d5743_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timersession',
+            index=models.Index(fields=['user', 'start_time'], name='main_timers_user_id_2dfb2c_idx'),
+        ),
+    ]
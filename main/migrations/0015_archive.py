@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_activity_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('category', models.CharField(choices=[('School', 'School'), ('Personal', 'Personal'), ('Work', 'Work')], max_length=20)),
+                ('difficulty', models.CharField(choices=[('Easy', 'Easy'), ('Medium', 'Medium'), ('Hard', 'Hard')], max_length=20)),
+                ('completed', models.BooleanField(default=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('favorite', models.BooleanField(default=False)),
+                ('priority', models.IntegerField(default=0)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('add_to_calendar', models.BooleanField(default=False)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('linked_calendar_event', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='main.calendarevent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-completed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('completed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subtasks', to='main.archivedtask')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTimerSession',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('duration_minutes', models.IntegerField()),
+                ('mode', models.CharField(choices=[('focus', 'Focus'), ('short', 'Short Break'), ('long', 'Long Break')], max_length=10)),
+                ('completed', models.BooleanField(default=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_timer_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FocusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('focus_minutes', models.PositiveIntegerField(default=0)),
+                ('focus_sessions', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='focus_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'completed_at'], name='main_archiv_user_id_6b05d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtimersession',
+            index=models.Index(fields=['user', 'start_time'], name='main_archiv_user_id_b2f15d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='focusrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_focus_rollup_day'),
+        ),
+    ]
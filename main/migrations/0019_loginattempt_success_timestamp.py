@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_outboundemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['success', 'timestamp'], name='main_logina_success_8adbf9_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# SQLite adds these columns by rebuilding main_subtask, which drops the
+# main_search triggers from 0012_search_index; create them again afterwards
+# (and again after the rebuild that undoing this migration does).
+SUBTASK_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_subtask_ai AFTER INSERT ON main_subtask BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, task_id)
+        SELECT NEW.id * 4 + 2, NEW.title, '', 'u' || user_id, NEW.task_id
+        FROM main_task WHERE id = NEW.task_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_subtask_au AFTER UPDATE OF title ON main_subtask BEGIN
+        UPDATE main_search SET title = NEW.title WHERE rowid = NEW.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_subtask_ad AFTER DELETE ON main_subtask BEGIN
+        DELETE FROM main_search WHERE rowid = OLD.id * 4 + 2;
+    END
+    """,
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SUBTASK_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_loginattempt_success_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='archivedsubtask',
+            name='descendants',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedsubtask',
+            name='descendants_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedsubtask',
+            name='parent',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='main.archivedsubtask'),
+        ),
+        migrations.AddField(
+            model_name='archivedsubtask',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=220),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='descendants',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='descendants_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='children', to='main.subtask'),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=220),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['task', 'path'], name='main_subtas_task_id_6dc7b6_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+# SQLite adds the column by rebuilding main_task, which drops the main_search
+# triggers on it from 0012_search_index. The rebuild also refuses to rename the
+# new table into place while main_search_subtask_ai (which reads main_task) is
+# there, so that one is dropped first. All of them are created again afterwards,
+# and the same happens around the rebuild that undoing this migration does.
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_task_ai AFTER INSERT ON main_task BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, task_id)
+        VALUES (NEW.id * 4 + 1, NEW.title, '', 'u' || NEW.user_id, NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_task_au AFTER UPDATE OF title ON main_task BEGIN
+        UPDATE main_search SET title = NEW.title WHERE rowid = NEW.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_task_ad AFTER DELETE ON main_task BEGIN
+        DELETE FROM main_search WHERE rowid = OLD.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS main_search_subtask_ai AFTER INSERT ON main_subtask BEGIN
+        INSERT INTO main_search(rowid, title, body, owner, task_id)
+        SELECT NEW.id * 4 + 2, NEW.title, '', 'u' || user_id, NEW.task_id
+        FROM main_task WHERE id = NEW.task_id;
+    END
+    """,
+]
+
+
+def drop_dependent_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TRIGGER IF EXISTS main_search_subtask_ai")
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SEARCH_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+def newest_first(apps, schema_editor):
+    # The dashboard listed tasks newest first; start the manual order from that
+    for name in ("Task", "ArchivedTask"):
+        apps.get_model("main", name).objects.update(rank=F("id") * -1.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_nested_subtasks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_dependent_triggers, restore_search_triggers),
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['rank', '-id']},
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='rank',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'rank'], name='main_task_user_id_e53a1b_idx'),
+        ),
+        migrations.RunPython(newest_first, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_triggers, drop_dependent_triggers),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Triggers that keep main_dataversion (see main.models.DataVersion) counting
+# the writes analytics and the activity heatmap depend on. Updates only count
+# when they touch a column those read, so reordering tasks or renaming an
+# event leaves the caches alone.
+#
+# A migration that makes SQLite rebuild one of these tables (adding or
+# altering a column) drops its triggers; create them again as 0021_task_rank
+# does for the search triggers.
+TRACKED = [
+    # table, counter, columns
+    ("task", "tasks", "completed, completed_at, due_date, category, difficulty"),
+    ("archivedtask", "tasks", "completed_at, category, difficulty"),
+    ("timersession", "activity", "start_time, duration_minutes, mode, completed"),
+    ("focusrollup", "activity", "date, focus_minutes, focus_sessions"),
+    ("calendarevent", "activity", "event_date"),
+]
+
+
+def sqlite_bump(row, counter):
+    return f"""
+        INSERT INTO main_dataversion(user_id, tasks, activity)
+        VALUES ({row}.user_id, {int(counter == "tasks")}, {int(counter == "activity")})
+        ON CONFLICT(user_id) DO UPDATE SET {counter} = {counter} + 1;
+    """
+
+
+SQLITE_FORWARD = [
+    sql
+    for table, counter, columns in TRACKED
+    for sql in (
+        f"CREATE TRIGGER main_dataversion_{table}_ai AFTER INSERT ON main_{table} "
+        f"BEGIN {sqlite_bump('NEW', counter)} END",
+        f"CREATE TRIGGER main_dataversion_{table}_au AFTER UPDATE OF {columns} ON main_{table} "
+        f"BEGIN {sqlite_bump('NEW', counter)} END",
+        f"CREATE TRIGGER main_dataversion_{table}_ad AFTER DELETE ON main_{table} "
+        f"BEGIN {sqlite_bump('OLD', counter)} END",
+    )
+]
+
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS main_dataversion_{table}_{op}"
+    for table, _, _ in TRACKED
+    for op in ("ai", "au", "ad")
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION main_dataversion_bump() RETURNS trigger AS $$
+    DECLARE
+        owner bigint;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            owner := OLD.user_id;
+        ELSE
+            owner := NEW.user_id;
+        END IF;
+        IF TG_ARGV[0] = 'tasks' THEN
+            INSERT INTO main_dataversion (user_id, tasks, activity) VALUES (owner, 1, 0)
+            ON CONFLICT (user_id) DO UPDATE SET tasks = main_dataversion.tasks + 1;
+        ELSE
+            INSERT INTO main_dataversion (user_id, tasks, activity) VALUES (owner, 0, 1)
+            ON CONFLICT (user_id) DO UPDATE SET activity = main_dataversion.activity + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+] + [
+    f"""
+    CREATE TRIGGER main_dataversion_{table}
+    AFTER INSERT OR DELETE OR UPDATE OF {columns} ON main_{table}
+    FOR EACH ROW EXECUTE FUNCTION main_dataversion_bump('{counter}')
+    """
+    for table, counter, columns in TRACKED
+]
+
+POSTGRES_REVERSE = [
+    f"DROP TRIGGER IF EXISTS main_dataversion_{table} ON main_{table}"
+    for table, _, _ in TRACKED
+] + ["DROP FUNCTION IF EXISTS main_dataversion_bump()"]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('main', '0022_shared_calendars'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('user', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('tasks', models.PositiveBigIntegerField(default=0)),
+                ('activity', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
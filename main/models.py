@@ -1,6 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.core.validators import RegexValidator
+from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
+from django.utils import timezone
+
+from datetime import timedelta
+
+from . import habits
 
 # ===== TASK MODEL =====
 class Task(models.Model):
@@ -25,6 +30,7 @@ class Task(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
     completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)  # kept in sync with `completed` by save()
     favorite = models.BooleanField(default=False)
     priority = models.IntegerField(default=0)
     due_date = models.DateField(null=True, blank=True)  # Added due_date
@@ -40,29 +46,98 @@ class Task(models.Model):
         related_name='linked_task',
         help_text="Calendar event linked to this task"
     )
+    # Bumped on every write to the task or its subtasks; keys the cached card HTML
+    version = models.PositiveIntegerField(default=1)
+    # Manual (drag and drop) order, smallest first; see main.ranking
+    rank = models.FloatField(default=0.0)
 
     def __str__(self):
         return self.title
 
     class Meta:
-        ordering = ['-priority', '-favorite', '-created_at']  # default ordering
+        ordering = ['rank', '-id']  # default ordering, served by the (user, rank) index
+        indexes = [
+            models.Index(fields=['user', 'completed_at']),
+            models.Index(fields=['user', 'rank']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.completed and self.completed_at is None:
+            self.completed_at = timezone.now()
+        elif not self.completed:
+            self.completed_at = None
+
+        if self.pk is not None:
+            self.version += 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version", "completed_at"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_version(cls, task_id):
+        """Invalidate a task's cached card after a write that doesn't go through Task.save()."""
+        cls.objects.filter(pk=task_id).update(version=models.F("version") + 1)
 
     def subtask_progress(self):
         """Returns (completed_count, total_count) for subtasks"""
-        subtasks = self.subtasks.all()
-        total = subtasks.count()
-        completed = subtasks.filter(completed=True).count()
-        return completed, total
+        if "subtasks" in getattr(self, "_prefetched_objects_cache", {}):
+            # Dashboard prefetches subtasks, so count them without extra queries
+            subtasks = self.subtasks.all()
+            return sum(1 for s in subtasks if s.completed), len(subtasks)
+
+        counts = self.subtasks.aggregate(
+            total=models.Count("id"),
+            completed=models.Count("id", filter=models.Q(completed=True)),
+        )
+        return counts["completed"], counts["total"]
 
     def subtask_progress_percent(self):
         """Returns progress percentage for subtasks"""
         completed, total = self.subtask_progress()
-        if total == 0:
-            return 0
-        return int((completed / total) * 100)
+        return progress_percent(completed, total)
+
+    def subtask_progress_json(self):
+        """Progress payload shared by the subtask JSON endpoints."""
+        completed, total = self.subtask_progress()
+        return {
+            "completed": completed,
+            "total": total,
+            "percent": progress_percent(completed, total),
+        }
+
+    def subtask_tree(self):
+        """Subtasks in display order, every one right after its parent (uses the prefetch)."""
+        return sorted(self.subtasks.all(), key=lambda s: s.subtree_path)
+
+    async def asubtask_progress_json(self):
+        """Async version of subtask_progress_json() for the async endpoints."""
+        counts = await self.subtasks.aaggregate(
+            total=models.Count("id"),
+            completed=models.Count("id", filter=models.Q(completed=True)),
+        )
+        return {
+            "completed": counts["completed"],
+            "total": counts["total"],
+            "percent": progress_percent(counts["completed"], counts["total"]),
+        }
+
+
+def progress_percent(completed, total):
+    if total == 0:
+        return 0
+    return int((completed / total) * 100)
 
 
 # ===== SUBTASK MODEL =====
+# Width of one id in SubTask.path; "0000000042/" per ancestor
+PATH_ID_WIDTH = 10
+MAX_SUBTASK_DEPTH = 20
+
+
+def path_segment(subtask_id):
+    return f"{subtask_id:0{PATH_ID_WIDTH}d}/"
+
+
 class SubTask(models.Model):
     task = models.ForeignKey(
         Task,
@@ -73,11 +148,55 @@ class SubTask(models.Model):
     completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Nesting (main.subtasks): `path` holds the ancestors' ids, root first, so
+    # a subtree is a prefix match; "" for a top-level subtask
+    # DO_NOTHING keeps deletes to one statement: main.subtasks.delete() removes the
+    # whole branch, and deleting the task removes every subtask
+    parent = models.ForeignKey(
+        'self', on_delete=models.DO_NOTHING, null=True, blank=True, related_name='children',
+    )
+    path = models.CharField(max_length=(PATH_ID_WIDTH + 1) * MAX_SUBTASK_DEPTH, blank=True, default="")
+    # Rolled up from the whole subtree, kept current by main.subtasks
+    descendants = models.PositiveIntegerField(default=0)
+    descendants_completed = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.title} ({'Done' if self.completed else 'Pending'})"
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'path']),
+        ]
+
+    @property
+    def depth(self):
+        return len(self.path) // (PATH_ID_WIDTH + 1)
+
+    @property
+    def subtree_path(self):
+        """Prefix of every descendant's path."""
+        return self.path + path_segment(self.id)
+
+    def ancestor_ids(self):
+        return [int(part) for part in self.path.split("/") if part]
+
+    def branch_progress_json(self):
+        """Progress of the subtasks below this one."""
+        return {
+            "completed": self.descendants_completed,
+            "total": self.descendants,
+            "percent": progress_percent(self.descendants_completed, self.descendants),
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Task.bump_version(self.task_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Task.bump_version(self.task_id)
+        return result
 
 
 # ===== LOGIN ATTEMPT MODEL =====
@@ -105,6 +224,12 @@ class LoginAttempt(models.Model):
         status = "Success" if self.success else "Failed"
         return f"{self.email} - {status} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
 
+    class Meta:
+        indexes = [
+            # Recent failures, counted on every /metrics scrape
+            models.Index(fields=['success', 'timestamp']),
+        ]
+
 
 # ===== TIMER SESSION MODEL =====
 class TimerSession(models.Model):
@@ -124,6 +249,59 @@ class TimerSession(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.mode} ({self.duration_minutes} min)"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+        ]
+
+
+# ===== SHARED CALENDAR MODELS =====
+class Calendar(models.Model):
+    """A calendar its members share; see main.calendars."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_calendars')
+    name = models.CharField(max_length=100)
+    color = models.CharField(max_length=7, default='#1f6feb')
+    # Bumped on every write to the calendar's events; keys their cached payload
+    version = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def bump_version(cls, calendar_id):
+        """Invalidate a calendar's cached events after a write to them."""
+        if calendar_id is not None:
+            cls.objects.filter(pk=calendar_id).update(version=models.F("version") + 1)
+
+
+class CalendarMembership(models.Model):
+    VIEWER, EDITOR, OWNER = 'viewer', 'editor', 'owner'
+    ROLE_CHOICES = [
+        (VIEWER, 'Can view'),
+        (EDITOR, 'Can edit events'),
+        (OWNER, 'Owner'),
+    ]
+    # Roles that may add, edit, move and delete the calendar's events
+    EDIT_ROLES = (EDITOR, OWNER)
+
+    calendar = models.ForeignKey(Calendar, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calendar_memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=VIEWER)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.calendar.name} ({self.role})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['calendar', 'user'], name='unique_calendar_member'),
+        ]
+        indexes = [
+            # Every calendar page load lists the user's calendars
+            models.Index(fields=['user', 'calendar']),
+        ]
+
 
 # ===== CALENDAR EVENT MODEL =====
 class CalendarEvent(models.Model):
@@ -145,6 +323,10 @@ class CalendarEvent(models.Model):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calendar_events')
+    # Blank for a personal event, seen only by its user
+    calendar = models.ForeignKey(
+        Calendar, on_delete=models.CASCADE, null=True, blank=True, related_name='events',
+    )
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     event_date = models.DateField()
@@ -205,6 +387,10 @@ class CalendarEvent(models.Model):
     
     class Meta:
         ordering = ['event_date', 'start_time']
+        indexes = [
+            models.Index(fields=['user', 'event_date']),
+            models.Index(fields=['calendar', 'event_date']),
+        ]
 
 
 # ===== USER STREAK MODEL =====
@@ -219,29 +405,402 @@ class UserStreak(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.current_streak} day streak"
     
-    def update_streak(self, session_date):
-        """Update streak based on new focus session date."""
-        from datetime import timedelta
-        
-        if not self.last_focus_date:
-            # First session ever
-            self.current_streak = 1
-            self.last_focus_date = session_date
-        elif session_date == self.last_focus_date:
-            # Same day, no change
-            pass
-        elif session_date == self.last_focus_date + timedelta(days=1):
-            # Consecutive day
-            self.current_streak += 1
-            self.last_focus_date = session_date
-        elif session_date > self.last_focus_date + timedelta(days=1):
-            # Streak broken
-            self.current_streak = 1
-            self.last_focus_date = session_date
-        
-        # Update longest streak
-        if self.current_streak > self.longest_streak:
-            self.longest_streak = self.current_streak
-        
-        self.save()
+    def live_streak(self, today=None):
+        """current_streak, or 0 once a whole local day has passed without focus."""
+        today = today or timezone.localdate()
+        if self.last_focus_date and self.last_focus_date >= today - timedelta(days=1):
+            return self.current_streak
+        return 0
+
+    def advanced(self, day, focus_days):
+        """
+        (current_streak, longest_streak, last_focus_date) after a focus session on
+        local date `day`. `focus_days(first, last)` returns the set of local dates
+        with focus sessions; it's only needed for a backfilled day before
+        last_focus_date, e.g. when the timer's offline queue flushes late.
+        """
+        current, longest, last = self.current_streak, self.longest_streak, self.last_focus_date
+        one_day = timedelta(days=1)
+
+        if last is None or day > last + one_day:
+            current, last = 1, day
+        elif day == last + one_day:
+            current, last = current + 1, day
+        elif day < last:
+            # A late day can join two runs. Neither was longer than `longest`,
+            # so the run through `day` lies within `longest` days either side.
+            days = focus_days(day - timedelta(days=longest + 1), min(last, day + timedelta(days=longest + 1)))
+            first = final = day
+            while first - one_day in days:
+                first -= one_day
+            while final + one_day in days:
+                final += one_day
+            run = (final - first).days + 1
+            if final == last:
+                current = run
+            longest = max(longest, run)
+
+        return current, max(longest, current), last
+
+
+# ===== PER-USER DATA VERSIONS =====
+class DataVersion(models.Model):
+    """
+    Counters that database triggers (migration 0023) bump on every write to a
+    user's rows that analytics or the activity heatmap read: `tasks` for tasks
+    and archived tasks, `activity` for timer sessions, focus rollups and
+    events. Bulk writes count too. Caches key on these instead of aggregating
+    the tables. A user without a row has had no such write since the
+    migration, which reads as 0.
+    """
+    # No constraint: the triggers may still fire while a user's rows are being
+    # deleted, and an orphaned row is harmless
+    user = models.OneToOneField(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name='+',
+    )
+    tasks = models.PositiveBigIntegerField(default=0)
+    activity = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def of(cls, user_id):
+        """(tasks, activity) for a user, by primary key."""
+        row = cls.objects.filter(user_id=user_id).values_list("tasks", "activity").first()
+        return row or (0, 0)
+
+
+# ===== DATA REPAIR CHECKPOINT =====
+class RepairRun(models.Model):
+    """Progress of a `manage.py repair` run (main.repairs), saved with every batch so it can resume."""
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    scanned = models.BigIntegerField(default=0)
+    changed = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        state = "finished" if self.finished_at else f"at pk {self.last_pk}"
+        return f"{self.name} ({state}, {self.changed}/{self.scanned} changed)"
+
+
+# ===== BACKGROUND JOB MODEL =====
+class Job(models.Model):
+    """A call to a @job function (main.jobs), run by `manage.py run_worker`."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=200)  # dotted path of the function
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+
+
+class OutboundEmail(models.Model):
+    """A message waiting in the outbox (main.mail) or the record of one sent."""
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30)  # "password_reset", "event_reminder", ...
+    # Set for messages that must go out once only, e.g. "reminder:<event>:<date>:<time>"
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    to = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return f"{self.kind} to {self.to} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+
+
+# ===== HABIT MODEL =====
+class Habit(models.Model):
+    SCHEDULE_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekdays', 'Weekdays'),
+        ('weekly', 'N times per week'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='habits')
+    title = models.CharField(max_length=255)
+    schedule = models.CharField(max_length=10, choices=SCHEDULE_CHOICES, default='daily')
+    times_per_week = models.PositiveSmallIntegerField(
+        default=3,
+        validators=[MinValueValidator(1), MaxValueValidator(7)],
+        help_text="Target for the 'weekly' schedule"
+    )
+    start_date = models.DateField(default=timezone.localdate)
+    # Bit i set = done on start_date + i days (see main/habits.py)
+    history = models.BinaryField(default=bytes, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.get_schedule_display()})"
+
+    class Meta:
+        ordering = ['created_at']
+
+    @property
+    def bits(self):
+        return habits.to_int(self.history)
+
+    def is_done(self, day):
+        offset = habits.day_offset(self.start_date, day)
+        return offset >= 0 and bool(self.bits >> offset & 1)
+
+    def set_done(self, day, done=True):
+        """Mark a day done or not done. Days before start_date move start_date back."""
+        bits = self.bits
+        offset = habits.day_offset(self.start_date, day)
+        if offset < 0:
+            bits <<= -offset
+            self.start_date = day
+            offset = 0
+        bits = bits | (1 << offset) if done else bits & ~(1 << offset)
+        self.history = habits.to_bytes(bits)
+
+    def scheduled_mask(self, days):
+        """Bits for the scheduled days among the first `days` days."""
+        if self.schedule == 'weekdays':
+            return habits.weekly_pattern(habits.WEEKDAYS, self.start_date.weekday(), days)
+        return habits.low_mask(days)
+
+    def current_streak(self, today=None):
+        """
+        Consecutive scheduled days done (weeks meeting the target for 'weekly'),
+        ending today, or yesterday while today is still open.
+        """
+        today = today or timezone.localdate()
+        end = habits.day_offset(self.start_date, today)
+        if end < 0:
+            return 0
+        bits = self.bits
+
+        if self.schedule == 'weekly':
+            weeks = habits.week_counts(bits, self.start_date, end)
+            if weeks[-1] < self.times_per_week:
+                weeks.pop()  # the current week can still be met
+            streak = 0
+            for count in reversed(weeks):
+                if count < self.times_per_week:
+                    break
+                streak += 1
+            return streak
+
+        if not bits >> end & 1:
+            end -= 1
+        if end < 0:
+            return 0
+        # Unscheduled days don't break the run but don't count towards it either
+        scheduled = self.scheduled_mask(end + 1)
+        run = habits.run_ending_at(bits | ~scheduled, end)
+        window = habits.low_mask(run) << (end - run + 1)
+        return (bits & scheduled & window).bit_count()
+
+    def longest_streak(self, today=None):
+        today = today or timezone.localdate()
+        days = habits.day_offset(self.start_date, today) + 1
+        if days <= 0:
+            return 0
+        bits = self.bits & habits.low_mask(days)
+
+        if self.schedule == 'weekly':
+            longest = streak = 0
+            for count in habits.week_counts(bits, self.start_date, days - 1):
+                streak = streak + 1 if count >= self.times_per_week else 0
+                longest = max(longest, streak)
+            return longest
+
+        scheduled = self.scheduled_mask(days)
+        done = bits & scheduled
+        filled = (bits | ~scheduled) & habits.low_mask(days)
+        return max(
+            ((done & (habits.low_mask(length) << start)).bit_count()
+             for start, length in habits.runs(filled)),
+            default=0,
+        )
+
+    def completion_rate(self, days=30, today=None):
+        """Share of the scheduled check-ins done over the last `days` days, 0-100."""
+        today = today or timezone.localdate()
+        end = habits.day_offset(self.start_date, today)
+        if end < 0:
+            return 0
+        days = min(days, end + 1)
+        window = habits.low_mask(days) << (end - days + 1)
+
+        done = self.bits & window
+        if self.schedule == 'weekly':
+            expected = self.times_per_week * days / 7
+            return min(100, round(done.bit_count() / expected * 100))
+
+        scheduled = self.scheduled_mask(end + 1) & window
+        return progress_percent((done & scheduled).bit_count(), scheduled.bit_count())
+
+    def summary(self, today=None):
+        """JSON payload for the habit endpoints; everything comes from this one row."""
+        today = today or timezone.localdate()
+        return {
+            "id": self.id,
+            "title": self.title,
+            "schedule": self.schedule,
+            "times_per_week": self.times_per_week,
+            "done_today": self.is_done(today),
+            "current_streak": self.current_streak(today),
+            "longest_streak": self.longest_streak(today),
+            "completion_rate": self.completion_rate(30, today),
+        }
+
+    def year_heatmap(self, year):
+        """'0'/'1' per day of `year`, January 1st first."""
+        length, bits = habits.year_slice(self.bits, self.start_date, year)
+        return format(bits, f"0{length}b")[::-1]
+
+
+
+# ===== ARCHIVE MODELS =====
+# Cold copies of old rows, moved out by `manage.py archive_data` (main.archive)
+# so the hot tables stay small. Rows keep their original ids, which lets
+# `restore_archive` put them back unchanged.
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tasks")
+    title = models.CharField(max_length=255)
+    category = models.CharField(max_length=20, choices=Task.CATEGORY_CHOICES)
+    difficulty = models.CharField(max_length=20, choices=Task.DIFFICULTY_CHOICES)
+    completed = models.BooleanField(default=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    favorite = models.BooleanField(default=False)
+    priority = models.IntegerField(default=0)
+    due_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    add_to_calendar = models.BooleanField(default=False)
+    # No constraint, so deleting an event doesn't touch the archive;
+    # restore drops links to events that are gone
+    linked_calendar_event = models.ForeignKey(
+        'CalendarEvent', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+',
+    )
+    version = models.PositiveIntegerField(default=1)
+    rank = models.FloatField(default=0.0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['user', 'completed_at']),
+        ]
+
+
+class ArchivedSubTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name="subtasks")
+    title = models.CharField(max_length=255)
+    completed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    # Copied as they are; the subtree moves together with its task
+    parent = models.ForeignKey(
+        'self', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+',
+    )
+    path = models.CharField(max_length=(PATH_ID_WIDTH + 1) * MAX_SUBTASK_DEPTH, blank=True, default="")
+    descendants = models.PositiveIntegerField(default=0)
+    descendants_completed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['created_at']
+
+
+class ArchivedTimerSession(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_timer_sessions')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    duration_minutes = models.IntegerField()
+    mode = models.CharField(max_length=10, choices=TimerSession.MODE_CHOICES)
+    completed = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+        ]
+
+
+class FocusRollup(models.Model):
+    """Completed focus sessions per local day, summed over ArchivedTimerSession only."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='focus_rollups')
+    date = models.DateField()
+    focus_minutes = models.PositiveIntegerField(default=0)
+    focus_sessions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_focus_rollup_day'),
+        ]
+
+
+# ===== OFFLINE REPLAY LOG =====
+class ReplayedWrite(models.Model):
+    """
+    The result of a write replayed from the offline queue (main.offline),
+    under the key the service worker gave it. A batch is sent again when its
+    response is lost, and the repeat gets this stored result instead of
+    running the write twice.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField()
+    body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_replayed_write'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
@@ -0,0 +1,233 @@
+"""
+Offline support for the dashboard, calendar and timer pages.
+
+The service worker (templates/main/sw.js, served at /sw.js so its scope is
+the whole site) keeps:
+
+- the app shell: the three pages and their static bundles, precached on
+  install. Bundles are served from the cache; pages go to the network first
+  and fall back to the cache;
+- the JSON the pages read (DATA_URLS), in IndexedDB. A cached response is
+  returned at once and refreshed in the background; after a write it goes to
+  the network first, so the page sees the change;
+- a queue of the writes made while offline (REPLAYABLE), also in IndexedDB.
+  The page gets {"success": true, "queued": true} back and updates itself.
+
+When the connection returns, the worker sends the queue to /sync/ in batches
+of up to MAX_BATCH. replay() runs each write through its own view, in order,
+so a batch costs one round trip instead of one per write, with the same
+validation, permissions and side effects as when the write was made online.
+
+The worker sends a batch again when it doesn't get the response, so every
+write carries a key the worker made up for it. A replayed write and its
+ReplayedWrite row commit together; a repeat of the key gets the stored result
+back and runs nothing. Toggles send the state they set, not a flip, so the
+same write applied twice still lands where the user left it.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import re
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.templatetags.static import static
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+from .models import ReplayedWrite
+
+
+logger = logging.getLogger(__name__)
+
+# Writes the worker queues offline and /sync/ replays
+REPLAYABLE = frozenset({
+    "add_task", "edit_task", "delete_task", "toggle_complete", "toggle_favorite", "move_task",
+    "add_subtask", "toggle_subtask", "delete_subtask",
+    "add_event", "edit_event", "delete_event", "reschedule_event",
+    "check_habit",
+})
+
+# Reads the worker answers from IndexedDB
+DATA_URLS = ("get_events", "get_subtasks", "get_habits", "task_analytics", "get_timer_stats")
+
+SHELL_PAGES = ("dashboard", "calendar", "timer")
+SHELL_STATIC = (
+    "css/dashboard.css", "css/calendar.css",
+    "js/dashboard.js", "js/calendar.js", "js/timer.js", "js/timer-worker.js", "js/offline.js",
+    "habitcanvass.jpg",
+)
+
+# Writes per /sync/ request
+MAX_BATCH = 50
+
+# How long a replayed write's result is kept for repeats of its batch
+KEEP_RESULTS = timedelta(days=7)
+
+
+def url_pattern(name):
+    """
+    A JavaScript regex source matching the paths of a URL name in main/urls.py
+    ("tasks/<int:task_id>/move/" -> "^/tasks/\\d+/move/$").
+    """
+    from . import urls  # main.urls imports the views, which import this module
+
+    route = next(str(p.pattern) for p in urls.urlpatterns if p.name == name)
+    parts = re.split(r"(<(?:\w+:)?\w+>)", route)
+    return "^/" + "".join(
+        (r"\d+" if part.startswith("<int:") else "[^/]+") if part.startswith("<") else re.escape(part)
+        for part in parts
+    ) + "$"
+
+
+def worker_config():
+    """The settings sw.js is rendered with; the version changes whenever a bundle does."""
+    shell = [reverse(name) for name in SHELL_PAGES] + [static(path) for path in SHELL_STATIC]
+    return {
+        "version": hashlib.sha256("\n".join(shell).encode()).hexdigest()[:12],
+        "shell": shell,
+        "static_url": settings.STATIC_URL,
+        "data": [url_pattern(name) for name in DATA_URLS],
+        "writes": [url_pattern(name) for name in sorted(REPLAYABLE)],
+        "sync_url": reverse("sync_mutations"),
+        "max_batch": MAX_BATCH,
+        "clear_on": [reverse(name) for name in ("login", "logout", "register")],
+    }
+
+
+def _sub_request(request, method, url, body, content_type):
+    """A request for one queued write, made as the user who sent the batch."""
+    parts = urlsplit(url)
+    body = str(body).encode()
+    environ = {
+        key: value for key, value in request.META.items()
+        if key.startswith("HTTP_") or key in ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT")
+    }
+    environ.update({
+        "REQUEST_METHOD": method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": parts.path,
+        "QUERY_STRING": parts.query,
+        "CONTENT_TYPE": content_type or "application/octet-stream",
+        "CONTENT_LENGTH": str(len(body)),
+        "HTTP_X_REQUESTED_WITH": "XMLHttpRequest",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": request.scheme,
+    })
+    environ.pop("HTTP_CONTENT_TYPE", None)
+    environ.pop("HTTP_CONTENT_LENGTH", None)
+
+    sub = WSGIRequest(environ)
+    # Authentication and the CSRF check already ran for the batch. Async views
+    # get the same user too, instead of loading it again through auser()
+    user = request.user
+
+    async def auser():
+        return user
+
+    sub.user, sub.auser, sub.session = user, auser, request.session
+    return sub
+
+
+def _body(response):
+    if response.get("Content-Type", "").startswith("application/json"):
+        try:
+            return json.loads(response.content)
+        except ValueError:
+            pass
+    return None
+
+
+def _key(mutation):
+    return str(mutation.get("key") or "")[:64]
+
+
+def replay_batch(request, mutations):
+    """
+    Replay a /sync/ batch in order; returns one result per write. The first
+    5xx ends the batch, because later writes may depend on it: the rest come
+    back with a status of None (not attempted) and stay queued behind it.
+    """
+    user = request.user
+    ReplayedWrite.objects.filter(user=user, created_at__lt=timezone.now() - KEEP_RESULTS).delete()
+    keys = [key for key in map(_key, mutations) if key]
+    done = {
+        key: {"status": status, "body": body}
+        for key, status, body in ReplayedWrite.objects.filter(user=user, key__in=keys).values_list("key", "status", "body")
+    } if keys else {}
+
+    results, failed = [], False
+    for mutation in mutations:
+        if failed:
+            result = {"id": mutation.get("id"), "status": None, "body": None}
+        elif _key(mutation) in done:
+            # Applied by an earlier send of this batch
+            result = {"id": mutation.get("id"), **done[_key(mutation)]}
+        else:
+            result = replay(request, mutation)
+            failed = result["status"] >= 500
+        results.append(result)
+    return results
+
+
+def _stored(request, mutation_id, key):
+    done = ReplayedWrite.objects.filter(user=request.user, key=key).values_list("status", "body").first()
+    return done and {"id": mutation_id, "status": done[0], "body": done[1]}
+
+
+def replay(request, mutation):
+    """
+    Run one queued write ({"id", "key", "method", "url", "body",
+    "content_type"}) through its view. Returns {"id", "status", "body"}.
+    Anything but a REPLAYABLE write gets a 400, so it can't hold up the rest
+    of the queue. With a key, the result is stored for repeats (see
+    replay_batch()).
+    """
+    mutation_id = mutation.get("id")
+    key = _key(mutation)
+    method = str(mutation.get("method", "POST")).upper()
+    url = str(mutation.get("url", ""))
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        match = None
+    if match is None or match.url_name not in REPLAYABLE or method not in ("POST", "DELETE"):
+        error = f"{method} {url} can't be replayed"
+        return {"id": mutation_id, "status": 400, "body": {"success": False, "error": error}}
+
+    sub = _sub_request(request, method, url, mutation.get("body") or "", mutation.get("content_type"))
+    sub.resolver_match = match
+    try:
+        # The write and the record of it commit together, or neither does
+        with transaction.atomic():
+            if iscoroutinefunction(match.func):
+                response = async_to_sync(match.func)(sub, *match.args, **match.kwargs)
+            else:
+                response = match.func(sub, *match.args, **match.kwargs)
+            result = {"id": mutation_id, "status": response.status_code, "body": _body(response)}
+            if key and response.status_code < 500:
+                ReplayedWrite.objects.create(user=request.user, key=key, status=result["status"], body=result["body"])
+    except Http404:
+        return {"id": mutation_id, "status": 404, "body": None}
+    except PermissionDenied:
+        return {"id": mutation_id, "status": 403, "body": None}
+    except IntegrityError:
+        # A concurrent /sync/ with the same batch recorded this key first
+        if key and (stored := _stored(request, mutation_id, key)):
+            return stored
+        logger.exception("Replaying %s %s failed", method, url)
+        return {"id": mutation_id, "status": 500, "body": None}
+    except Exception:
+        # The worker keeps the write and retries it with the next batch
+        logger.exception("Replaying %s %s failed", method, url)
+        return {"id": mutation_id, "status": 500, "body": None}
+
+    return result
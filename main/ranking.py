@@ -0,0 +1,100 @@
+"""
+Manual task order (drag and drop on the dashboard).
+
+Task.rank is a float, and the dashboard lists a user's tasks by (rank, -id)
+off the (user, rank) index. A new task gets a rank RANK_STEP below the
+smallest one, so it shows up first. A task dropped between two others gets
+the midpoint of their ranks: one UPDATE of one row, however long the list is,
+and nothing else moves. Ranks aren't part of the cached card HTML, so the
+version stays as it is.
+
+Halving the same gap over and over runs out of float precision after about
+50 drops. Once a gap shrinks below MIN_GAP, the rebalance job respaces all
+of the user's ranks RANK_STEP apart with one bulk_update, in current order.
+By then there is still plenty of room left, so a move only rebalances inline
+when two neighbours share a rank and there is nothing between them.
+"""
+
+from django.db import transaction
+from django.db.models import Min
+
+from .jobs import enqueue, job
+from .models import Task
+
+
+RANK_STEP = 1024.0
+MIN_GAP = 1e-6
+
+
+class StaleOrder(ValueError):
+    """A neighbour named by the client is gone, or isn't one of the user's tasks."""
+
+
+def top_rank(user_id):
+    """Rank that puts a new task above all of the user's tasks (an indexed MIN)."""
+    lowest = Task.objects.filter(user_id=user_id).aggregate(lowest=Min("rank"))["lowest"]
+    return 0.0 if lowest is None else lowest - RANK_STEP
+
+
+def between(above, below):
+    """A rank after `above` and before `below`; either may be None (the ends of the list)."""
+    if above is None and below is None:
+        return 0.0
+    if above is None:
+        return below - RANK_STEP
+    if below is None:
+        return above + RANK_STEP
+    return (above + below) / 2
+
+
+def _fits(rank, above, below):
+    return (above is None or above < rank) and (below is None or rank < below)
+
+
+def move(user_id, task_id, above_id=None, below_id=None):
+    """
+    Put one of the user's tasks right after `above_id` and before `below_id`
+    (the cards now shown on either side of it). Returns the new rank.
+    """
+    neighbours = [i for i in (above_id, below_id) if i is not None]
+    with transaction.atomic():
+        ranks = dict(
+            Task.objects.select_for_update()
+            .filter(user_id=user_id, id__in=[task_id, *neighbours])
+            .values_list("id", "rank")
+        )
+        if task_id not in ranks or task_id in neighbours or any(i not in ranks for i in neighbours):
+            raise StaleOrder("The list changed; reload and try again")
+
+        above, below = ranks.get(above_id), ranks.get(below_id)
+        rank = between(above, below)
+        if not _fits(rank, above, below):
+            # Equal neighbours (or no float between them): respace first
+            rebalance(user_id)
+            ranks = dict(Task.objects.filter(id__in=neighbours).values_list("id", "rank"))
+            above, below = ranks.get(above_id), ranks.get(below_id)
+            rank = between(above, below)
+            if not _fits(rank, above, below):
+                raise StaleOrder("The list changed; reload and try again")
+
+        Task.objects.filter(id=task_id).update(rank=rank)
+
+    if above is not None and below is not None and below - above < MIN_GAP:
+        enqueue(rebalance_ranks, user_id)
+    return rank
+
+
+def rebalance(user_id, batch_size=500):
+    """Respace the user's ranks RANK_STEP apart, keeping their order; returns the number of tasks."""
+    ids = list(Task.objects.filter(user_id=user_id).order_by("rank", "-id").values_list("id", flat=True))
+    Task.objects.bulk_update(
+        [Task(id=task_id, rank=(n + 1) * RANK_STEP) for n, task_id in enumerate(ids)],
+        ["rank"], batch_size=batch_size,
+    )
+    return len(ids)
+
+
+@job
+def rebalance_ranks(user_id):
+    with transaction.atomic():
+        rebalance(user_id)
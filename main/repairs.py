@@ -0,0 +1,196 @@
+"""
+Batched data repairs, run with `manage.py repair <name>`.
+
+A repair names a model, the fields it rewrites and a fix(row) method. The
+runner walks the candidate rows in primary-key order, one page of batch_size
+rows at a time. Each page is streamed with iterator() and read to the end
+before anything is written, so no cursor is open during the UPDATE. Each
+page's fixes go out as one bulk_update in a transaction that also moves the
+RepairRun checkpoint. A run that dies part way resumes after the last
+committed page, without redoing or skipping rows. --dry-run reports what
+would change and writes nothing.
+
+Add a repair by subclassing Repair and decorating it with @register.
+"""
+
+import time
+
+from django.db import transaction
+from django.db.models import CharField, Count, Exists, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from .models import PATH_ID_WIDTH, CalendarEvent, RepairRun, SubTask, Task
+
+
+REPAIRS = {}
+
+
+def register(cls):
+    REPAIRS[cls.name] = cls()
+    return cls
+
+
+class Repair:
+    name = ""
+    help = ""
+    model = None
+    fields = ()
+
+    def queryset(self):
+        """Candidate rows. Narrow it to rows that can be broken, so the scan stays cheap."""
+        return self.model.objects.all()
+
+    def columns(self):
+        """Values read for each row; fix() gets them as a dict with "pk"."""
+        return ("pk", *self.fields)
+
+    def fix(self, row):
+        """Corrected values for every name in `fields`, or None to leave the row alone."""
+        raise NotImplementedError
+
+
+def run(repair, batch_size=1000, dry_run=False, restart=False, on_batch=None, on_fix=None):
+    """
+    Apply `repair` and return its RepairRun. A dry run starts from the saved
+    checkpoint too but never saves one. `on_batch(run, rate)` is called after
+    every page and `on_fix(row, values)` for every changed row.
+    """
+    if dry_run:
+        checkpoint = RepairRun.objects.filter(name=repair.name, finished_at__isnull=True).first()
+        checkpoint = RepairRun(name=repair.name, last_pk=checkpoint.last_pk if checkpoint and not restart else 0)
+    else:
+        checkpoint, created = RepairRun.objects.get_or_create(name=repair.name)
+        if not created and (restart or checkpoint.finished_at):
+            checkpoint = RepairRun(pk=checkpoint.pk, name=repair.name)
+            checkpoint.save()
+
+    candidates = repair.queryset().order_by("pk").values(*repair.columns())
+    started = time.perf_counter()
+
+    while True:
+        fixes, scanned = [], 0
+        for row in candidates.filter(pk__gt=checkpoint.last_pk)[:batch_size].iterator(chunk_size=batch_size):
+            scanned += 1
+            checkpoint.last_pk = row["pk"]
+            values = repair.fix(row)
+            if values is None:
+                continue
+            fixes.append(repair.model(pk=row["pk"], **values))
+            if on_fix:
+                on_fix(row, values)
+        if not scanned:
+            break
+
+        checkpoint.scanned += scanned
+        checkpoint.changed += len(fixes)
+        if not dry_run:
+            with transaction.atomic():
+                repair.model.objects.bulk_update(fixes, repair.fields, batch_size=batch_size)
+                checkpoint.save()
+        if on_batch:
+            on_batch(checkpoint, checkpoint.scanned / max(time.perf_counter() - started, 1e-6))
+
+    checkpoint.finished_at = timezone.now()
+    if not dry_run:
+        checkpoint.save(update_fields=["finished_at", "updated_at"])
+    return checkpoint
+
+
+# ---------- repairs ----------
+
+@register
+class CalendarTimes(Repair):
+    name = "calendar_times"
+    help = "Clear CalendarEvent start/end times whose stored text isn't a valid time."
+    model = CalendarEvent
+    fields = ("start_time", "end_time")
+
+    def queryset(self):
+        # The raw column text; TimeField would quietly read garbage as None
+        return CalendarEvent.objects.filter(Q(start_time__isnull=False) | Q(end_time__isnull=False)).annotate(
+            raw_start=Cast("start_time", CharField()),
+            raw_end=Cast("end_time", CharField()),
+        )
+
+    def columns(self):
+        return ("pk", "raw_start", "raw_end")
+
+    @staticmethod
+    def parse(raw):
+        """(time or None, valid)."""
+        if raw is None:
+            return None, True
+        try:
+            value = parse_time(raw)
+        except ValueError:
+            value = None
+        return value, value is not None
+
+    def fix(self, row):
+        start, start_ok = self.parse(row["raw_start"])
+        end, end_ok = self.parse(row["raw_end"])
+        if start_ok and end_ok:
+            return None
+        return {"start_time": start, "end_time": end}
+
+
+@register
+class TaskCompletedAt(Repair):
+    name = "task_completed_at"
+    help = "Make Task.completed_at agree with Task.completed (created_at stands in for an unknown time)."
+    model = Task
+    fields = ("completed_at", "version")
+
+    def queryset(self):
+        return Task.objects.filter(
+            Q(completed=True, completed_at__isnull=True) | Q(completed=False, completed_at__isnull=False)
+        )
+
+    def columns(self):
+        return ("pk", "completed", "created_at", "version")
+
+    def fix(self, row):
+        # Bumping version refreshes the cached card and task analytics
+        return {
+            "completed_at": row["created_at"] if row["completed"] else None,
+            "version": row["version"] + 1,
+        }
+
+
+@register
+class SubtaskRollups(Repair):
+    name = "subtask_rollups"
+    help = "Recount SubTask.descendants / descendants_completed from the subtasks under each one."
+    model = SubTask
+    fields = ("descendants", "descendants_completed")
+
+    def queryset(self):
+        # Only subtasks that have, or claim to have, something below them
+        below = SubTask.objects.filter(
+            task_id=OuterRef("task_id"), path__startswith=OuterRef("subtree_path"),
+        ).order_by().values("task_id")
+
+        def count(rows):
+            return Coalesce(Subquery(rows.annotate(n=Count("id")).values("n")), 0, output_field=IntegerField())
+
+        return SubTask.objects.annotate(
+            subtree_path=Concat(
+                "path", LPad(Cast("id", CharField()), PATH_ID_WIDTH, Value("0")), Value("/"),
+                output_field=CharField(),
+            ),
+        ).filter(
+            Q(descendants__gt=0) | Exists(SubTask.objects.filter(parent=OuterRef("pk")))
+        ).annotate(
+            real_descendants=count(below),
+            real_completed=count(below.filter(completed=True)),
+        )
+
+    def columns(self):
+        return ("pk", "descendants", "descendants_completed", "real_descendants", "real_completed")
+
+    def fix(self, row):
+        if (row["descendants"], row["descendants_completed"]) == (row["real_descendants"], row["real_completed"]):
+            return None
+        return {"descendants": row["real_descendants"], "descendants_completed": row["real_completed"]}
@@ -0,0 +1,99 @@
+"""
+Read replica routing.
+
+Views decorated with @replica_reads send their queries to the REPLICA_DATABASE
+alias. Everything else, including every write, goes to "default" (the
+primary). A replica lags the primary, so a few cases still read from the
+primary:
+
+- the request wrote something earlier (it must see its own write, and a
+  transaction that wrote stays on the primary);
+- the user wrote something less than REPLICA_STICKY_SECONDS ago.
+
+PrimaryPinMiddleware records that last case in a cookie on every POST, PUT,
+PATCH and DELETE, because a cache entry would be per process. With no replica
+configured the router always answers "default" and the decorator does
+nothing.
+
+Inside a decorated view, anything the router sees as a write counts, including
+get_or_create() finding an existing row, so read with get()/first() instead.
+Raw SQL has to take its connection from router.db_for_read() (as main.search
+does) to reach the replica.
+"""
+
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+PIN_COOKIE = "hc_primary_until"
+
+# Set by @replica_reads for the duration of a view. Holds a mutable dict, so a
+# write seen inside a sync_to_async thread is visible to the rest of the request.
+_reads = ContextVar("habitcanvas_replica_reads", default=None)
+
+
+def pinned(request):
+    """True while the user's recent write may not have reached the replica yet."""
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin(response):
+    """Keep this browser on the primary for REPLICA_STICKY_SECONDS."""
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(
+        PIN_COOKIE, f"{time.time() + seconds:.0f}", max_age=seconds, httponly=True, samesite="Lax",
+    )
+
+
+def replica_reads(view):
+    """Route the view's reads to the replica, unless the user is pinned to the primary."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _reads.set({"wrote": False} if not pinned(request) else None)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reads.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _reads.set({"wrote": False} if not pinned(request) else None)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry: replica reads inside @replica_reads, primary for the rest."""
+
+    def db_for_read(self, model, **hints):
+        state = _reads.get()
+        replica = settings.REPLICA_DATABASE
+        if replica is None or state is None or state["wrote"]:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both sides
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # A replica gets its schema from the primary
+        return db != settings.REPLICA_DATABASE
@@ -0,0 +1,154 @@
+"""
+Full-text search over a user's tasks, subtasks and calendar events.
+
+SQLite uses the FTS5 table from migration 0012 and PostgreSQL the tsvector GIN
+indexes from the same migration. Both rank title matches above description
+matches and treat the last word of the query (from MIN_PREFIX letters) as a
+prefix, so results update while the user is still typing. Pages are cut from
+the whole ranked match set. Any other database falls back to icontains.
+"""
+
+import re
+from datetime import date
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Task, SubTask, CalendarEvent
+
+
+KINDS = {1: "task", 2: "subtask", 3: "event"}
+MAX_PAGE_SIZE = 50
+# Every match is ranked, so a shorter last word is matched whole: a one-letter
+# prefix would make SQLite score most of a large account on every keystroke
+MIN_PREFIX = 2
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def terms(query):
+    """Words of the query, lowercased; punctuation and FTS operators are dropped."""
+    return _WORD.findall(query.lower())[:10]
+
+
+def search(user, query, page=1, page_size=20):
+    """
+    One page of hits, best first: ({"type", "id", "title", "task_id", "event_date"}, has_more).
+    """
+    words = terms(query)
+    if not words:
+        return [], False
+
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    offset = (max(page, 1) - 1) * page_size
+    backend = {"sqlite": _search_sqlite, "postgresql": _search_postgres}.get(_connection().vendor, _search_orm)
+    # One extra row tells whether there is a next page without a COUNT
+    hits = backend(user.id, words, page_size + 1, offset)
+    return hits[:page_size], len(hits) > page_size
+
+
+def suggest(user, query, limit=8):
+    """Distinct titles for type-ahead, in rank order."""
+    hits, _ = search(user, query, page_size=limit * 2)
+    titles = []
+    for hit in hits:
+        if hit["title"] not in titles:
+            titles.append(hit["title"])
+    return titles[:limit]
+
+
+def _connection():
+    """The connection ORM reads would use, so raw queries follow @replica_reads too."""
+    return connections[router.db_for_read(Task)]
+
+
+def _hit(kind, object_id, title, task_id=None, event_date=None):
+    if isinstance(event_date, str):
+        event_date = date.fromisoformat(event_date)
+    return {
+        "type": kind,
+        "id": object_id,
+        "title": title,
+        "task_id": task_id,
+        "event_date": event_date.isoformat() if event_date else None,
+    }
+
+
+def _search_sqlite(user_id, words, limit, offset):
+    phrases = [f'"{w}"' for w in words]
+    if len(words[-1]) >= MIN_PREFIX:
+        phrases[-1] += "*"
+    match = f"owner:u{user_id} AND {{title body}}: ({' '.join(phrases)})"
+
+    with _connection().cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT rowid, title, task_id, event_date
+            FROM main_search
+            WHERE main_search MATCH %s
+            ORDER BY bm25(main_search, 10.0, 1.0, 0.0), rowid DESC
+            LIMIT %s OFFSET %s
+            """,
+            [match, limit, offset],
+        )
+        rows = cursor.fetchall()
+
+    return [
+        _hit(KINDS[rowid % 4], rowid // 4, title, task_id, event_date)
+        for rowid, title, task_id, event_date in rows
+    ]
+
+
+def _search_postgres(user_id, words, limit, offset):
+    tsquery = " & ".join(words) + (":*" if len(words[-1]) >= MIN_PREFIX else "")
+
+    # The to_tsvector() expressions match the GIN indexes in migration 0012
+    with _connection().cursor() as cursor:
+        cursor.execute(
+            """
+            WITH q AS (SELECT to_tsquery('english', %(q)s) AS q)
+            SELECT kind, id, title, task_id, event_date FROM (
+                SELECT 'task' AS kind, t.id, t.title, t.id AS task_id, NULL::date AS event_date,
+                       ts_rank(to_tsvector('english', t.title), q.q) * 10 AS rank
+                FROM main_task t, q
+                WHERE t.user_id = %(user)s AND to_tsvector('english', t.title) @@ q.q
+              UNION ALL
+                SELECT 'subtask', s.id, s.title, s.task_id, NULL,
+                       ts_rank(to_tsvector('english', s.title), q.q) * 10
+                FROM main_subtask s JOIN main_task t ON t.id = s.task_id, q
+                WHERE t.user_id = %(user)s AND to_tsvector('english', s.title) @@ q.q
+              UNION ALL
+                SELECT 'event', e.id, e.title, NULL, e.event_date,
+                       ts_rank(to_tsvector('english', e.title || ' ' || e.description), q.q)
+                FROM main_calendarevent e, q
+                WHERE e.user_id = %(user)s AND e.parent_event_id IS NULL
+                  AND to_tsvector('english', e.title || ' ' || e.description) @@ q.q
+            ) hits
+            ORDER BY rank DESC, id
+            LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            {"q": tsquery, "user": user_id, "limit": limit, "offset": offset},
+        )
+        return [_hit(*row) for row in cursor.fetchall()]
+
+
+def _search_orm(user_id, words, limit, offset):
+    def matching(*fields):
+        q = Q()
+        for word in words:
+            q &= Q.create([(f"{f}__icontains", word) for f in fields], connector=Q.OR)
+        return q
+
+    hits = [
+        _hit("task", t.id, t.title, t.id)
+        for t in Task.objects.filter(matching("title"), user_id=user_id)
+    ] + [
+        _hit("subtask", s.id, s.title, s.task_id)
+        for s in SubTask.objects.filter(matching("title"), task__user_id=user_id)
+    ] + [
+        _hit("event", e.id, e.title, event_date=e.event_date)
+        for e in CalendarEvent.objects.filter(
+            matching("title", "description"), user_id=user_id, parent_event__isnull=True
+        )
+    ]
+    return hits[offset:offset + limit]
@@ -0,0 +1,232 @@
+"""
+Synthetic data generation for load testing and benchmarks.
+
+Used by `manage.py seed_habitcanvas` and by the query-count tests. Every
+table is filled with bulk_create so seeding heavy accounts stays fast.
+"""
+
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import ranking, streaks
+from .habits import to_bytes
+from .models import Task, SubTask, Calendar, CalendarEvent, CalendarMembership, TimerSession, Habit
+
+
+SEED_EMAIL_DOMAIN = "gmail.com"
+
+WORDS = [
+    "Read", "Write", "Review", "Plan", "Study", "Call", "Email", "Clean",
+    "Draft", "Fix", "Outline", "Practice", "Organize", "Prepare", "Submit",
+]
+TOPICS = [
+    "chapter 4", "lab report", "budget", "presentation", "thesis notes",
+    "groceries", "project proposal", "math exercises", "team sync", "resume",
+]
+
+
+def seed_email(prefix, index):
+    return f"{prefix}{index}@{SEED_EMAIL_DOMAIN}"
+
+
+def _title(rng):
+    return f"{rng.choice(WORDS)} {rng.choice(TOPICS)}"
+
+
+def create_users(count, prefix="seed", password="Seed@1234", start=0):
+    """Create `count` users named <prefix><n>@gmail.com, skipping existing ones."""
+    emails = [seed_email(prefix, i) for i in range(start, start + count)]
+    existing = set(User.objects.filter(username__in=emails).values_list("username", flat=True))
+    hashed = make_password(password)
+
+    User.objects.bulk_create([
+        User(username=email, email=email, password=hashed)
+        for email in emails if email not in existing
+    ])
+    return list(User.objects.filter(username__in=emails).order_by("id"))
+
+
+def seed_tasks(user, count, subtasks_per_task=0, rng=None, batch_size=1000):
+    rng = rng or random.Random(user.pk)
+    today = timezone.localdate()
+    now = timezone.now()
+    # Newest on top, spaced like tasks added one at a time
+    top = ranking.top_rank(user.pk)
+
+    def make_task(n):
+        completed = rng.random() < 0.4
+        return Task(
+            user=user,
+            title=_title(rng),
+            category=rng.choice(Task.CATEGORY_CHOICES)[0],
+            difficulty=rng.choice(Task.DIFFICULTY_CHOICES)[0],
+            completed=completed,
+            completed_at=now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)) if completed else None,
+            favorite=rng.random() < 0.1,
+            priority=rng.randint(0, 3),
+            due_date=today + timedelta(days=rng.randint(-60, 60)) if rng.random() < 0.7 else None,
+            rank=top - n * ranking.RANK_STEP,
+        )
+
+    tasks = Task.objects.bulk_create([make_task(n) for n in range(count)], batch_size=batch_size)
+
+    if subtasks_per_task:
+        SubTask.objects.bulk_create([
+            SubTask(task=task, title=f"Step {n + 1}", completed=rng.random() < 0.5)
+            for task in tasks
+            for n in range(subtasks_per_task)
+        ], batch_size=batch_size)
+
+    return tasks
+
+
+def seed_events(user, series, instances_per_series=12, single_events=0, rng=None, batch_size=1000):
+    """Create recurring event series (parent + instances) and one-off events."""
+    rng = rng or random.Random(user.pk)
+    today = timezone.localdate()
+    patterns = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+    def make_event(**kwargs):
+        category = rng.choice(CalendarEvent.CATEGORY_CHOICES)[0]
+        event = CalendarEvent(
+            user=user,
+            title=_title(rng),
+            description="Seeded event",
+            category=category,
+            start_time=time(rng.randint(7, 18), rng.choice([0, 30])),
+            end_time=None,
+            **kwargs,
+        )
+        event.color = event.get_category_color()
+        return event
+
+    parents = []
+    for _ in range(series):
+        pattern = rng.choice(list(patterns))
+        start = today - timedelta(days=rng.randint(0, 90))
+        parents.append(make_event(
+            event_date=start,
+            is_recurring=True,
+            recurrence_pattern=pattern,
+            recurrence_end_date=start + patterns[pattern] * instances_per_series,
+        ))
+    parents = CalendarEvent.objects.bulk_create(parents, batch_size=batch_size)
+
+    instances = []
+    for parent in parents:
+        step = patterns[parent.recurrence_pattern]
+        for n in range(1, instances_per_series + 1):
+            instance = make_event(event_date=parent.event_date + step * n, parent_event=parent)
+            instance.title = parent.title
+            instances.append(instance)
+    instances += [
+        make_event(event_date=today + timedelta(days=rng.randint(-180, 180)))
+        for _ in range(single_events)
+    ]
+    CalendarEvent.objects.bulk_create(instances, batch_size=batch_size)
+
+    return parents
+
+
+def seed_team_calendar(users, events, rng=None, batch_size=1000):
+    """A calendar owned by the first user and shared with the rest (every other one as an editor)."""
+    owner, members = users[0], users[1:]
+    rng = rng or random.Random(owner.pk)
+    today = timezone.localdate()
+
+    calendar = Calendar.objects.create(owner=owner, name="Team", color="#22c55e")
+    CalendarMembership.objects.bulk_create(
+        [CalendarMembership(calendar=calendar, user=owner, role=CalendarMembership.OWNER)] + [
+            CalendarMembership(
+                calendar=calendar, user=member,
+                role=CalendarMembership.EDITOR if n % 2 else CalendarMembership.VIEWER,
+            )
+            for n, member in enumerate(members)
+        ],
+        batch_size=batch_size,
+    )
+    CalendarEvent.objects.bulk_create([
+        CalendarEvent(
+            user=rng.choice(users),
+            calendar=calendar,
+            title=_title(rng),
+            description="Seeded team event",
+            category="Meeting",
+            color="#22c55e",
+            event_date=today + timedelta(days=rng.randint(-180, 180)),
+            start_time=time(rng.randint(7, 18), rng.choice([0, 30])),
+        )
+        for _ in range(events)
+    ], batch_size=batch_size)
+    return calendar
+
+
+def seed_sessions(user, years=1, sessions_per_day=4, skip_rate=0.15, rng=None, batch_size=2000):
+    """Create `years` of daily timer history and a matching UserStreak row."""
+    rng = rng or random.Random(user.pk)
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+    days = int(365 * years)
+
+    sessions = []
+    for offset in range(days, -1, -1):
+        day = today - timedelta(days=offset)
+        if rng.random() < skip_rate:
+            continue
+
+        start = timezone.make_aware(datetime.combine(day, time(8)), tz)
+        for _ in range(rng.randint(1, sessions_per_day)):
+            mode = rng.choice(["focus", "focus", "short", "long"])
+            minutes = {"focus": 25, "short": 5, "long": 15}[mode]
+            end = start + timedelta(minutes=minutes)
+            sessions.append(TimerSession(
+                user=user, start_time=start, end_time=end,
+                duration_minutes=minutes, mode=mode, completed=True,
+            ))
+            start = end + timedelta(minutes=rng.randint(0, 90))
+
+        if len(sessions) >= batch_size:
+            TimerSession.objects.bulk_create(sessions, batch_size=batch_size)
+            sessions = []
+
+    TimerSession.objects.bulk_create(sessions, batch_size=batch_size)
+
+    streaks.rebuild([user.pk])
+
+
+def seed_habits(user, count, years=1, miss_rate=0.2, rng=None):
+    """Habits on every schedule with `years` of history, built directly as bitmaps."""
+    rng = rng or random.Random(user.pk)
+    today = timezone.localdate()
+    days = int(365 * years)
+    schedules = [s for s, _ in Habit.SCHEDULE_CHOICES]
+
+    rows = []
+    for n in range(count):
+        habit = Habit(
+            user=user,
+            title=f"{rng.choice(WORDS)} daily",
+            schedule=schedules[n % len(schedules)],
+            times_per_week=rng.randint(2, 5),
+            start_date=today - timedelta(days=days),
+        )
+        bits = sum(1 << i for i in range(days + 1) if rng.random() >= miss_rate)
+        habit.history = to_bytes(bits)
+        rows.append(habit)
+    return Habit.objects.bulk_create(rows)
+
+
+def seed_user(user, tasks=50, subtasks=3, series=5, instances=12, events=20,
+              years=1, sessions_per_day=4, habits=0, seed=None):
+    """Fill one account with a realistic mix of tasks, events, habits and timer history."""
+    rng = random.Random(user.pk if seed is None else seed)
+    seed_tasks(user, tasks, subtasks, rng=rng)
+    seed_events(user, series, instances, events, rng=rng)
+    if habits:
+        seed_habits(user, habits, max(years, 1 / 12), rng=rng)
+    if years:
+        seed_sessions(user, years, sessions_per_day, rng=rng)
@@ -0,0 +1,1313 @@
+// Rendered URLs are passed in as data-* attributes on the <script> tag
+const LOGOUT_URL = document.currentScript.dataset.logoutUrl;
+const USERNAME = document.currentScript.dataset.username;
+
+    // ===== State Variables =====
+    let currentDate = new Date();
+    let currentView = 'month'; // 'month' or 'week'
+    let allEvents = [];
+    let calendars = [];          // shared calendars the user belongs to, with their role
+    let loadedRange = null;      // [start, end] of allEvents, ISO dates
+    let selectedEventId = null;
+    let selectedColor = '#1f6feb';
+    let editingEventId = null;
+
+    // ===== Initialize =====
+    document.addEventListener('DOMContentLoaded', () => {
+        loadEvents();
+        setupEventListeners();
+        renderCalendar();
+    });
+
+    // ===== Event Listeners =====
+    function setupEventListeners() {
+        // View toggle
+        document.getElementById('btnMonthView').addEventListener('click', () => switchView('month'));
+        document.getElementById('btnWeekView').addEventListener('click', () => switchView('week'));
+        document.getElementById('btnAgendaView').addEventListener('click', () => switchView('agenda'));
+
+        // Navigation
+        document.getElementById('btnPrev').addEventListener('click', navigatePrev);
+        document.getElementById('btnNext').addEventListener('click', navigateNext);
+        document.getElementById('btnToday').addEventListener('click', navigateToday);
+
+        // Add event
+        document.getElementById('btnAddEvent').addEventListener('click', openAddEventModal);
+
+        // Analytics
+        document.getElementById('btnAnalytics').addEventListener('click', openAnalyticsModal);
+
+        // Shared calendars
+        document.getElementById('btnCalendars').addEventListener('click', openCalendarsModal);
+        document.getElementById('btnCloseCalendars').addEventListener('click', closeCalendarsModal);
+        document.getElementById('newCalendarForm').addEventListener('submit', handleNewCalendar);
+        document.getElementById('btnCloseAnalytics').addEventListener('click', closeAnalyticsModal);
+        document.getElementById('analyticsDateRange').addEventListener('change', renderAnalytics);
+
+        // Modal controls
+        document.getElementById('btnCloseModal').addEventListener('click', closeModal);
+        document.getElementById('btnCancelEvent').addEventListener('click', closeModal);
+        document.getElementById('btnCloseDetails').addEventListener('click', closeDetailsModal);
+
+        // Form submission
+        document.getElementById('eventForm').addEventListener('submit', handleFormSubmit);
+
+        // Writes queued offline reached the server (offline.js): show the real events
+        window.addEventListener('habitcanvas:synced', loadEvents);
+
+        // Color picker
+        document.querySelectorAll('.color-option').forEach(option => {
+            option.addEventListener('click', function () {
+                document.querySelectorAll('.color-option').forEach(o => o.classList.remove('selected'));
+                this.classList.add('selected');
+                selectedColor = this.dataset.color;
+            });
+        });
+
+        // Event details
+        document.getElementById('btnEditEvent').addEventListener('click', handleEditClick);
+        document.getElementById('btnDeleteEvent').addEventListener('click', handleDeleteClick);
+
+        // Delete confirmation
+        document.getElementById('btnCancelDelete').addEventListener('click', closeDeleteConfirmModal);
+        document.getElementById('btnConfirmDelete').addEventListener('click', confirmDelete);
+
+        // Logout confirmation
+        document.getElementById('btnLogout').addEventListener('click', showLogoutModal);
+        document.getElementById('btnCancelLogout').addEventListener('click', closeLogoutModal);
+        document.getElementById('btnConfirmLogout').addEventListener('click', confirmLogout);
+
+        // Reminder notification toggle
+        document.getElementById('eventReminderEnabled').addEventListener('change', function () {
+            document.getElementById('reminderTimeContainer').style.display = this.checked ? 'block' : 'none';
+        });
+
+        // Recurring event toggle
+        document.getElementById('eventIsRecurring').addEventListener('change', function () {
+            document.getElementById('recurringOptionsContainer').style.display = this.checked ? 'block' : 'none';
+        });
+
+        // Request notification permission on load
+        requestNotificationPermission();
+
+        // Check for upcoming notifications every 5 minutes
+        setInterval(checkUpcomingNotifications, 5 * 60 * 1000);
+        checkUpcomingNotifications(); // Check immediately on load
+    }
+
+    // ===== Load Events from Server =====
+    function isoDate(d) {
+        return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+    }
+
+    // A year either side of today (the agenda, reminders and analytics read
+    // from it), widened to the month on screen and the days around it
+    function wantedRange() {
+        const today = new Date();
+        const from = new Date(today.getFullYear() - 1, today.getMonth(), today.getDate());
+        const to = new Date(today.getFullYear() + 1, today.getMonth(), today.getDate());
+        const viewFrom = new Date(currentDate.getFullYear(), currentDate.getMonth(), -6);
+        const viewTo = new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 7);
+
+        // The server caps a request at five years; far away, load just that month
+        if (viewTo - from > 4 * 365 * 864e5 || to - viewFrom > 4 * 365 * 864e5) {
+            return [isoDate(viewFrom), isoDate(viewTo)];
+        }
+        return [isoDate(viewFrom < from ? viewFrom : from), isoDate(viewTo > to ? viewTo : to)];
+    }
+
+    async function loadEvents() {
+        const [start, end] = wantedRange();
+        loadedRange = [start, end];
+        try {
+            const response = await fetch(`/calendar/get_events/?start=${start}&end=${end}`);
+            // Offline with nothing cached for this range
+            if (!response.ok) throw new Error(`get_events returned ${response.status}`);
+            const data = await response.json();
+            allEvents = data.events;
+            calendars = data.calendars || [];
+            fillCalendarSelect();
+            renderCalendar();
+        } catch (error) {
+            console.error('Error loading events:', error);
+        }
+    }
+
+    function calendarOf(event) {
+        return calendars.find(c => c.id === event.calendar_id);
+    }
+
+    // Personal events are the user's own; shared ones need an editor or owner role
+    function canEdit(event) {
+        if (event.type === 'task' || event.pending) return false;
+        if (!event.calendar_id) return true;
+        const calendar = calendarOf(event);
+        return !!calendar && (calendar.role === 'editor' || calendar.role === 'owner');
+    }
+
+    // ===== Render Calendar =====
+    function renderCalendar() {
+        const [start, end] = wantedRange();
+        if (loadedRange && (start < loadedRange[0] || end > loadedRange[1])) {
+            loadEvents(); // renders again once the wider range is in
+        }
+
+        updateMonthDisplay();
+        if (currentView === 'month') {
+            renderMonthView();
+        } else if (currentView === 'week') {
+            renderWeekView();
+        } else if (currentView === 'agenda') {
+            renderAgendaView();
+        }
+    }
+
+    function updateMonthDisplay() {
+        const monthNames = ['January', 'February', 'March', 'April', 'May', 'June',
+            'July', 'August', 'September', 'October', 'November', 'December'];
+
+        let displayText;
+        if (currentView === 'month') {
+            displayText = `${monthNames[currentDate.getMonth()]} ${currentDate.getFullYear()}`;
+        } else if (currentView === 'week') {
+            displayText = `Week of ${monthNames[currentDate.getMonth()]} ${currentDate.getDate()}, ${currentDate.getFullYear()}`;
+        } else if (currentView === 'agenda') {
+            displayText = 'Upcoming Events';
+        }
+
+        document.getElementById('currentMonth').textContent = displayText;
+    }
+
+    function renderMonthView() {
+        const grid = document.getElementById('calendarGrid');
+        // Keep headers
+        const headers = grid.querySelectorAll('.day-header');
+        grid.innerHTML = '';
+        headers.forEach(h => grid.appendChild(h));
+
+        const year = currentDate.getFullYear();
+        const month = currentDate.getMonth();
+        const firstDay = new Date(year, month, 1).getDay();
+        const daysInMonth = new Date(year, month + 1, 0).getDate();
+        const prevMonthDays = new Date(year, month, 0).getDate();
+
+        const today = new Date();
+        const isToday = (d, m, y) =>
+            d === today.getDate() && m === today.getMonth() && y === today.getFullYear();
+
+        // Previous month days
+        for (let i = firstDay - 1; i >= 0; i--) {
+            const day = prevMonthDays - i;
+            const dayEl = createDayElement(day, month - 1, year, true);
+            grid.appendChild(dayEl);
+        }
+
+        // Current month days
+        for (let day = 1; day <= daysInMonth; day++) {
+            const dayEl = createDayElement(day, month, year, false);
+            if (isToday(day, month, year)) {
+                dayEl.classList.add('today');
+            }
+            grid.appendChild(dayEl);
+        }
+
+        // Next month days
+        const totalCells = grid.children.length - 7; // Subtract headers
+        const remainingCells = 42 - totalCells; // 6 rows * 7 days
+        for (let day = 1; day < remainingCells; day++) {
+            const dayEl = createDayElement(day, month + 1, year, true);
+            grid.appendChild(dayEl);
+        }
+    }
+
+    function createDayElement(day, month, year, isOtherMonth) {
+        const dayEl = document.createElement('div');
+        dayEl.className = 'calendar-day';
+        if (isOtherMonth) dayEl.classList.add('other-month');
+
+        const dateStr = `${year}-${String(month + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+        dayEl.dataset.date = dateStr;  // Store date in dataset for drop handler
+
+        dayEl.innerHTML = `<div class="day-number">${day}</div>`;
+
+        // Set up as drop zone for ALL days
+        dayEl.addEventListener('dragover', handleDragOver);
+        dayEl.addEventListener('drop', handleDrop);
+        dayEl.addEventListener('dragleave', handleDragLeave);
+
+        // Add events for this day
+        const dayEvents = allEvents.filter(e => e.date === dateStr);
+        dayEvents.forEach(event => {
+            const eventDot = document.createElement('div');
+            eventDot.className = `event-dot event-type-${event.type}`;
+            if (event.type === 'task' && event.completed) {
+                eventDot.classList.add('completed');
+            }
+            eventDot.textContent = event.title;
+            eventDot.style.background = event.color;
+            eventDot.addEventListener('click', (e) => {
+                e.stopPropagation();
+                showEventDetails(event);
+            });
+
+            // Make ONLY calendar events the user may change draggable, NOT task events
+            if (canEdit(event)) {
+                eventDot.setAttribute('draggable', 'true');
+                eventDot._eventData = event;
+                eventDot.addEventListener('dragstart', handleDragStart);
+                eventDot.addEventListener('dragend', handleDragEnd);
+            }
+
+            dayEl.appendChild(eventDot);
+        });
+
+        // Click to add event - DISABLED: Modal should only open from "New Event" button
+        // dayEl.addEventListener('click', () => {
+        //     openAddEventModal(dateStr);
+        // });
+
+        return dayEl;
+    }
+
+    function renderWeekView() {
+        const grid = document.getElementById('weekGrid');
+        grid.innerHTML = '';
+
+        // Get the week start (Sunday)
+        const weekStart = new Date(currentDate);
+        weekStart.setDate(currentDate.getDate() - currentDate.getDay());
+
+        const today = new Date();
+        const dayNames = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
+
+        for (let i = 0; i < 7; i++) {
+            const day = new Date(weekStart);
+            day.setDate(weekStart.getDate() + i);
+
+            const dayEl = document.createElement('div');
+            dayEl.className = 'week-day';
+
+            const isToday = day.getDate() === today.getDate() &&
+                day.getMonth() === today.getMonth() &&
+                day.getFullYear() === today.getFullYear();
+
+            if (isToday) {
+                dayEl.classList.add('today');
+            }
+
+            const dateStr = `${day.getFullYear()}-${String(day.getMonth() + 1).padStart(2, '0')}-${String(day.getDate()).padStart(2, '0')}`;
+            dayEl.dataset.date = dateStr;
+
+            // Set up as drop zone
+            dayEl.addEventListener('dragover', handleDragOver);
+            dayEl.addEventListener('drop', handleDrop);
+            dayEl.addEventListener('dragleave', handleDragLeave);
+
+            // Create header with day name and number
+            dayEl.innerHTML = `
+                <div class="week-day-header">
+                    <div class="week-day-name">${dayNames[i]}</div>
+                    <div class="week-day-number">${day.getDate()}</div>
+                </div>
+                <div class="week-day-events" data-date="${dateStr}"></div>
+            `;
+
+            // Add events
+            const dayEvents = allEvents.filter(e => e.date === dateStr);
+            const eventsContainer = dayEl.querySelector('.week-day-events');
+
+            dayEvents.forEach(event => {
+                const eventEl = document.createElement('div');
+                eventEl.className = `event-dot event-type-${event.type}`;
+                if (event.type === 'task' && event.completed) {
+                    eventEl.classList.add('completed');
+                }
+                eventEl.textContent = event.title;
+                eventEl.style.background = event.color;
+                eventEl.addEventListener('click', () => showEventDetails(event));
+
+                // Make ONLY calendar events the user may change draggable, NOT task events
+                if (canEdit(event)) {
+                    eventEl.setAttribute('draggable', 'true');
+                    eventEl._eventData = event;
+                    eventEl.addEventListener('dragstart', handleDragStart);
+                    eventEl.addEventListener('dragend', handleDragEnd);
+                }
+
+                eventsContainer.appendChild(eventEl);
+            });
+
+            // Click to add event - DISABLED: Modal should only open from "New Event" button
+            // dayEl.addEventListener('click', (e) => {
+            //     // Don't open modal if clicking on an event
+            //     if (!e.target.classList.contains('event-dot')) {
+            //         openAddEventModal(dateStr);
+            //     }
+            // });
+
+            grid.appendChild(dayEl);
+        }
+    }
+
+    // ===== Render Agenda View =====
+    function renderAgendaView() {
+        const container = document.getElementById('agendaContainer');
+        container.innerHTML = '';
+
+        // Get all events and sort by date
+        const sortedEvents = [...allEvents].sort((a, b) => new Date(a.date) - new Date(b.date));
+
+        // Filter to show next 30 days
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+        const futureLimit = new Date(today);
+        futureLimit.setDate(futureLimit.getDate() + 30);
+
+        const upcomingEvents = sortedEvents.filter(e => {
+            const eventDate = new Date(e.date);
+            return eventDate >= today && eventDate <= futureLimit;
+        });
+
+        // Group events by date
+        const eventsByDate = {};
+        upcomingEvents.forEach(event => {
+            if (!eventsByDate[event.date]) {
+                eventsByDate[event.date] = [];
+            }
+            eventsByDate[event.date].push(event);
+        });
+
+        // Render each date group
+        Object.keys(eventsByDate).sort().forEach(dateStr => {
+            const events = eventsByDate[dateStr];
+
+            // Create date group
+            const dateGroup = document.createElement('div');
+            dateGroup.className = 'agenda-date-group';
+
+            // Format date header
+            const eventDate = new Date(dateStr);
+            const dateHeader = document.createElement('div');
+            dateHeader.className = 'agenda-date-header';
+            dateHeader.textContent = formatDateHeader(eventDate);
+            dateGroup.appendChild(dateHeader);
+
+            // Render events for this date
+            events.forEach(event => {
+                const card = document.createElement('div');
+                card.className = 'agenda-event-card';
+                card.style.borderLeftColor = event.color;
+
+                // Time column
+                const timeDiv = document.createElement('div');
+                timeDiv.className = 'agenda-event-time';
+                if (event.start_time) {
+                    const endTimeText = event.end_time ? ` - ${formatTime(event.end_time)}` : '';
+                    timeDiv.textContent = `${formatTime(event.start_time)}${endTimeText}`;
+                } else {
+                    timeDiv.textContent = 'All day';
+                }
+
+                // Details column
+                const detailsDiv = document.createElement('div');
+                detailsDiv.className = 'agenda-event-details';
+
+                const titleDiv = document.createElement('div');
+                titleDiv.className = 'agenda-event-title';
+                titleDiv.textContent = event.is_recurring ? `🔁 ${event.title}` : event.title;
+
+                const metaDiv = document.createElement('div');
+                metaDiv.className = 'agenda-event-meta';
+
+                const categoryBadge = document.createElement('span');
+                categoryBadge.className = 'agenda-category-badge';
+                categoryBadge.textContent = event.category || 'Other';
+                categoryBadge.style.background = event.color + '33'; // 20% opacity
+                categoryBadge.style.color = event.color;
+                metaDiv.appendChild(categoryBadge);
+
+                detailsDiv.appendChild(titleDiv);
+                detailsDiv.appendChild(metaDiv);
+
+                card.appendChild(timeDiv);
+                card.appendChild(detailsDiv);
+                card.addEventListener('click', () => showEventDetails(event));
+
+                dateGroup.appendChild(card);
+            });
+
+            container.appendChild(dateGroup);
+        });
+
+        // Show empty state if no upcoming events
+        if (upcomingEvents.length === 0) {
+            container.innerHTML = '<div style="text-align: center; padding: 40px; color: var(--gray-500);">No upcoming events in the next 30 days</div>';
+        }
+    }
+
+    // Helper: Format date header
+    function formatDateHeader(date) {
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+        const tomorrow = new Date(today);
+        tomorrow.setDate(tomorrow.getDate() + 1);
+
+        const eventDate = new Date(date);
+        eventDate.setHours(0, 0, 0, 0);
+
+        if (eventDate.getTime() === today.getTime()) {
+            return `Today - ${date.toLocaleDateString('en-US', { month: 'long', day: 'numeric', year: 'numeric' })}`;
+        } else if (eventDate.getTime() === tomorrow.getTime()) {
+            return `Tomorrow - ${date.toLocaleDateString('en-US', { month: 'long', day: 'numeric', year: 'numeric' })}`;
+        } else {
+            return date.toLocaleDateString('en-US', { weekday: 'long', month: 'long', day: 'numeric', year: 'numeric' });
+        }
+    }
+
+    // Helper: Format time
+    function formatTime(timeStr) {
+        if (!timeStr) return '';
+        const [hours, minutes] = timeStr.split(':');
+        const hour = parseInt(hours);
+        const ampm = hour >= 12 ? 'PM' : 'AM';
+        const hour12 = hour % 12 || 12;
+        return `${hour12}:${minutes} ${ampm}`;
+    }
+
+
+    // ===== View Switching =====
+    function switchView(view) {
+        currentView = view;
+
+        if (view === 'month') {
+            document.getElementById('btnMonthView').classList.add('active');
+            document.getElementById('btnWeekView').classList.remove('active');
+            document.getElementById('btnAgendaView').classList.remove('active');
+            document.getElementById('monthView').classList.add('active');
+            document.getElementById('weekView').classList.remove('active');
+            document.getElementById('agendaView').style.display = 'none';
+        } else if (view === 'week') {
+            document.getElementById('btnWeekView').classList.add('active');
+            document.getElementById('btnMonthView').classList.remove('active');
+            document.getElementById('btnAgendaView').classList.remove('active');
+            document.getElementById('weekView').classList.add('active');
+            document.getElementById('monthView').classList.remove('active');
+            document.getElementById('agendaView').style.display = 'none';
+        } else if (view === 'agenda') {
+            document.getElementById('btnAgendaView').classList.add('active');
+            document.getElementById('btnMonthView').classList.remove('active');
+            document.getElementById('btnWeekView').classList.remove('active');
+            document.getElementById('agendaView').style.display = 'block';
+            document.getElementById('monthView').classList.remove('active');
+            document.getElementById('weekView').classList.remove('active');
+        }
+
+        renderCalendar();
+    }
+
+    // ===== Navigation =====
+    function navigatePrev() {
+        if (currentView === 'month') {
+            currentDate.setMonth(currentDate.getMonth() - 1);
+        } else {
+            currentDate.setDate(currentDate.getDate() - 7);
+        }
+        renderCalendar();
+    }
+
+    function navigateNext() {
+        if (currentView === 'month') {
+            currentDate.setMonth(currentDate.getMonth() + 1);
+        } else {
+            currentDate.setDate(currentDate.getDate() + 7);
+        }
+        renderCalendar();
+    }
+
+    function navigateToday() {
+        currentDate = new Date();
+        renderCalendar();
+    }
+
+    // ===== Modal Functions =====
+    function openAddEventModal(dateStr = null) {
+        editingEventId = null;
+        document.getElementById('modalTitle').textContent = 'Add Event';
+        document.getElementById('eventForm').reset();
+
+        if (dateStr) {
+            document.getElementById('eventDate').value = dateStr;
+        } else {
+            document.getElementById('eventDate').value = new Date().toISOString().split('T')[0];
+        }
+
+        // Reset color selection
+        document.querySelectorAll('.color-option').forEach(o => o.classList.remove('selected'));
+        document.querySelector('.color-option[data-color="#1f6feb"]').classList.add('selected');
+        selectedColor = '#1f6feb';
+        document.getElementById('eventCalendar').disabled = false;
+
+        document.getElementById('eventModal').classList.add('active');
+    }
+
+    function closeModal() {
+        document.getElementById('eventModal').classList.remove('active');
+    }
+
+    function closeDetailsModal() {
+        document.getElementById('eventDetailsModal').classList.remove('active');
+    }
+
+    async function handleFormSubmit(e) {
+        e.preventDefault();
+
+        const startTimeValue = document.getElementById('eventStartTime').value;
+        const endTimeValue = document.getElementById('eventEndTime').value;
+
+        const eventData = {
+            title: document.getElementById('eventTitle').value,
+            description: document.getElementById('eventDescription').value,
+            event_date: document.getElementById('eventDate').value,
+            start_time: startTimeValue === '' ? null : startTimeValue,
+            end_time: endTimeValue === '' ? null : endTimeValue,
+            category: document.getElementById('eventCategory').value,
+            reminder_enabled: document.getElementById('eventReminderEnabled').checked,
+            reminder_minutes_before: parseInt(document.getElementById('eventReminderTime').value),
+            is_recurring: document.getElementById('eventIsRecurring').checked,
+            recurrence_pattern: document.getElementById('eventRecurrencePattern').value,
+            recurrence_end_date: document.getElementById('eventRecurrenceEndDate').value || null
+        };
+
+        // Only include color if editing an existing event (to preserve user's color choice)
+        // For new events, let the backend auto-assign based on category
+        if (editingEventId) {
+            eventData.color = selectedColor;
+        } else {
+            // Events stay in the calendar they were created in
+            eventData.calendar_id = document.getElementById('eventCalendar').value || null;
+        }
+
+        try {
+            let url, method;
+            if (editingEventId) {
+                url = `/calendar/edit_event/${editingEventId}/`;
+                method = 'POST';
+            } else {
+                url = '/calendar/add_event/';
+                method = 'POST';
+            }
+
+            const response = await fetch(url, {
+                method: method,
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify(eventData)
+            });
+
+            if (!response.ok) {
+                const errorData = await response.json();
+                console.error('Server error:', errorData);
+                alert('Error: ' + (errorData.error || 'Could not save event'));
+                return;
+            }
+
+            const result = await response.json();
+
+            if (result.success) {
+                closeModal();
+                if (result.queued) {
+                    showQueuedSave(editingEventId, eventData);
+                } else {
+                    loadEvents(); // Refresh events
+                }
+            } else {
+                alert('Error: ' + (result.error || 'Could not save event'));
+            }
+        } catch (error) {
+            console.error('Error saving event:', error);
+            alert('Error saving event: ' + error.message);
+        }
+    }
+
+    // A save queued offline shows up right away; the sync brings the real event
+    function showQueuedSave(eventId, data) {
+        const fields = {
+            title: data.title,
+            description: data.description,
+            date: data.event_date,
+            start_time: data.start_time,
+            end_time: data.end_time,
+            category: data.category,
+            color: data.color || selectedColor,
+        };
+        const event = eventId && allEvents.find(e => String(e.id) === String(eventId));
+        if (event) {
+            Object.assign(event, fields);
+        } else {
+            allEvents.push({
+                ...fields,
+                id: `pending-${Date.now()}`,
+                type: 'event',
+                calendar_id: data.calendar_id ? Number(data.calendar_id) : null,
+                pending: true,
+            });
+        }
+        renderCalendar();
+    }
+
+    function showEventDetails(event) {
+        if (event.type === 'task') {
+            // For tasks, redirect to dashboard
+            window.location.href = '/dashboard';
+            return;
+        }
+
+        selectedEventId = event.id;
+        document.getElementById('detailTitle').textContent = event.title;
+
+        let detailsHTML = '';
+        if (event.description) {
+            detailsHTML += `
+        <div class="detail-row">
+            <div class="detail-label">Description</div>
+            <div class="detail-value">${escapeHTML(event.description)}</div>
+        </div>
+    `;
+        }
+        detailsHTML += `
+    <div class="detail-row">
+        <div class="detail-label">Date</div>
+        <div class="detail-value">${new Date(event.date).toLocaleDateString('en-US', { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' })}</div>
+    </div>
+`;
+        if (event.start_time) {
+            detailsHTML += `
+        <div class="detail-row">
+            <div class="detail-label">Time</div>
+            <div class="detail-value">${event.start_time}${event.end_time ? ' - ' + event.end_time : ''}</div>
+        </div>
+    `;
+        }
+        detailsHTML += `
+    <div class="detail-row">
+        <div class="detail-label">Category</div>
+        <div class="detail-value">${event.category}</div>
+    </div>
+`;
+        const calendar = calendarOf(event);
+        if (calendar) {
+            detailsHTML += `
+    <div class="detail-row">
+        <div class="detail-label">Calendar</div>
+        <div class="detail-value">${escapeHTML(calendar.name)}</div>
+    </div>
+`;
+        }
+
+        const editable = canEdit(event);
+        document.getElementById('btnEditEvent').style.display = editable ? '' : 'none';
+        document.getElementById('btnDeleteEvent').style.display = editable ? '' : 'none';
+        document.getElementById('eventDetailContent').innerHTML = detailsHTML;
+        document.getElementById('eventDetailsModal').classList.add('active');
+    }
+
+    function handleEditClick() {
+        const event = allEvents.find(e => e.id === selectedEventId);
+        if (!event) return;
+
+        closeDetailsModal();
+
+        editingEventId = event.id;
+        document.getElementById('modalTitle').textContent = 'Edit Event';
+        document.getElementById('eventTitle').value = event.title;
+        document.getElementById('eventDescription').value = event.description || '';
+        document.getElementById('eventDate').value = event.date;
+        document.getElementById('eventStartTime').value = event.start_time || '';
+        document.getElementById('eventEndTime').value = event.end_time || '';
+        document.getElementById('eventCategory').value = event.category;
+        document.getElementById('eventCalendar').value = event.calendar_id || '';
+        document.getElementById('eventCalendar').disabled = true;
+
+        // Set color
+        selectedColor = event.color;
+        document.querySelectorAll('.color-option').forEach(o => o.classList.remove('selected'));
+        const colorOption = document.querySelector(`.color-option[data-color="${event.color}"]`);
+        if (colorOption) colorOption.classList.add('selected');
+
+        document.getElementById('eventModal').classList.add('active');
+    }
+
+    function handleDeleteClick() {
+        // Show custom delete confirmation modal
+        document.getElementById('deleteConfirmModal').classList.add('active');
+    }
+
+    function closeDeleteConfirmModal() {
+        document.getElementById('deleteConfirmModal').classList.remove('active');
+    }
+
+    async function confirmDelete() {
+        closeDeleteConfirmModal();
+
+        try {
+            const response = await fetch(`/calendar/delete_event/${selectedEventId}/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken')
+                }
+            });
+
+            const result = await response.json();
+
+            if (result.success) {
+                closeDetailsModal();
+                if (result.queued) {
+                    allEvents = allEvents.filter(e => String(e.id) !== String(selectedEventId));
+                    renderCalendar();
+                } else {
+                    loadEvents();
+                }
+            } else {
+                alert('Error deleting event');
+            }
+        } catch (error) {
+            console.error('Error deleting event:', error);
+            alert('Error deleting event');
+        }
+    }
+
+    // ===== Shared Calendars =====
+    function escapeHTML(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    function fillCalendarSelect() {
+        const select = document.getElementById('eventCalendar');
+        const current = select.value;
+        select.innerHTML = '<option value="">Personal</option>';
+        calendars.filter(c => c.role === 'editor' || c.role === 'owner').forEach(c => {
+            const option = document.createElement('option');
+            option.value = c.id;
+            option.textContent = c.name;
+            select.appendChild(option);
+        });
+        select.value = current;
+        if (select.value !== current) select.value = '';
+    }
+
+    function openCalendarsModal() {
+        renderCalendarList();
+        document.getElementById('calendarsModal').classList.add('active');
+    }
+
+    function closeCalendarsModal() {
+        document.getElementById('calendarsModal').classList.remove('active');
+    }
+
+    function renderCalendarList() {
+        const list = document.getElementById('calendarList');
+        list.innerHTML = '';
+
+        calendars.forEach(calendar => {
+            const row = document.createElement('div');
+            row.className = 'calendar-row';
+            row.innerHTML = `
+                <span class="legend-color" style="background: ${calendar.color}"></span>
+                <span class="calendar-row-name">${escapeHTML(calendar.name)}</span>
+                <span class="calendar-row-role">${calendar.role}</span>
+            `;
+
+            if (calendar.role === 'owner') {
+                const share = document.createElement('form');
+                share.className = 'calendar-share';
+                share.innerHTML = `
+                    <input type="text" class="form-input" placeholder="Username (email)" required>
+                    <select class="form-select">
+                        <option value="viewer">Can view</option>
+                        <option value="editor">Can edit</option>
+                        <option value="">Remove</option>
+                    </select>
+                    <button type="submit" class="btn btn-primary">Share</button>
+                    <button type="button" class="btn btn-danger">Delete</button>
+                `;
+                share.addEventListener('submit', e => {
+                    e.preventDefault();
+                    const role = share.querySelector('select').value || null;
+                    shareCalendar(calendar.id, share.querySelector('input').value.trim(), role)
+                        .then(ok => { if (ok) share.reset(); });
+                });
+                share.querySelector('.btn-danger').addEventListener('click', () => deleteCalendar(calendar));
+                row.appendChild(share);
+            } else {
+                const leave = document.createElement('button');
+                leave.className = 'btn btn-cancel';
+                leave.textContent = 'Leave';
+                leave.addEventListener('click', () => shareCalendar(calendar.id, null, null));
+                row.appendChild(leave);
+            }
+
+            list.appendChild(row);
+        });
+    }
+
+    async function postJSON(url, body) {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify(body)
+        });
+        const result = await response.json();
+        if (!result.success) alert('Error: ' + (result.error || 'Request failed'));
+        return result.success;
+    }
+
+    async function handleNewCalendar(e) {
+        e.preventDefault();
+        const input = document.getElementById('newCalendarName');
+        if (await postJSON('/calendar/calendars/add/', { name: input.value, color: selectedColor })) {
+            input.value = '';
+            await loadEvents();
+            renderCalendarList();
+        }
+    }
+
+    // username null: leave the calendar yourself
+    async function shareCalendar(calendarId, username, role) {
+        const ok = await postJSON(`/calendar/calendars/${calendarId}/share/`, {
+            username: username ?? USERNAME,
+            role: role
+        });
+        if (ok && username === null) {
+            await loadEvents();
+            renderCalendarList();
+        }
+        return ok;
+    }
+
+    async function deleteCalendar(calendar) {
+        if (!confirm(`Delete "${calendar.name}" and all of its events for everyone?`)) return;
+        if (await postJSON(`/calendar/calendars/${calendar.id}/delete/`, {})) {
+            await loadEvents();
+            renderCalendarList();
+        }
+    }
+
+    // ===== Logout Functions =====
+    function showLogoutModal(e) {
+        e.preventDefault();
+        document.getElementById('logoutModal').classList.add('active');
+    }
+
+    function closeLogoutModal() {
+        document.getElementById('logoutModal').classList.remove('active');
+    }
+
+    function confirmLogout() {
+        window.location.href = LOGOUT_URL;
+    }
+
+    // ===== Utility Functions =====
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    // ===== Notification Functions =====
+    async function requestNotificationPermission() {
+        if ('Notification' in window && Notification.permission === 'default') {
+            try {
+                await Notification.requestPermission();
+            } catch (error) {
+                console.log('Notification permission request failed:', error);
+            }
+        }
+    }
+
+    function checkUpcomingNotifications() {
+        if ('Notification' in window && Notification.permission === 'granted') {
+            const now = new Date();
+
+            allEvents.forEach(event => {
+                if (event.reminder_enabled && event.type === 'event') {
+                    const eventDateTime = new Date(event.date);
+                    if (event.start_time) {
+                        const [hours, minutes] = event.start_time.split(':');
+                        eventDateTime.setHours(parseInt(hours), parseInt(minutes));
+                    } else {
+                        eventDateTime.setHours(9, 0); // Default to 9 AM if no time
+                    }
+
+                    const reminderTime = new Date(eventDateTime.getTime() - event.reminder_minutes_before * 60000);
+
+                    // Check if reminder should fire within the next 5 minutes
+                    const fiveMinutesFromNow = new Date(now.getTime() + 5 * 60000);
+
+                    if (reminderTime > now && reminderTime <= fiveMinutesFromNow) {
+                        // Check if we haven't already shown this notification
+                        const notificationKey = `notified_${event.id}_${event.date}`;
+                        if (!localStorage.getItem(notificationKey)) {
+                            showNotification(event);
+                            localStorage.setItem(notificationKey, 'true');
+                            // Clean up old notification flags after event passes
+                            setTimeout(() => {
+                                localStorage.removeItem(notificationKey);
+                            }, 24 * 60 * 60 * 1000); // Remove after 24 hours
+                        }
+                    }
+                }
+            });
+        }
+    }
+
+    function showNotification(event) {
+        const minutesText = event.reminder_minutes_before >= 1440
+            ? '1 day'
+            : event.reminder_minutes_before >= 60
+                ? `${Math.floor(event.reminder_minutes_before / 60)} hour${Math.floor(event.reminder_minutes_before / 60) > 1 ? 's' : ''}`
+                : `${event.reminder_minutes_before} minutes`;
+
+        const notification = new Notification('🔔 Upcoming Event Reminder', {
+            body: `${event.title}\n${minutesText} from now`,
+            icon: '/static/images/logo.png',
+            requireInteraction: false,
+            tag: `event_${event.id}`
+        });
+
+        notification.onclick = function () {
+            window.focus();
+            this.close();
+        };
+    }
+
+    // ===== Analytics Functions =====
+    function openAnalyticsModal() {
+        document.getElementById('analyticsModal').classList.add('active');
+        renderAnalytics();
+    }
+
+    function closeAnalyticsModal() {
+        document.getElementById('analyticsModal').classList.remove('active');
+    }
+
+    function renderAnalytics() {
+        const days = parseInt(document.getElementById('analyticsDateRange').value);
+        const filteredEvents = filterEventsByDateRange(days);
+
+        renderOverview(filteredEvents);
+        renderBusiestDays(filteredEvents);
+        renderTimeAnalysis(filteredEvents);
+    }
+
+    function filterEventsByDateRange(days) {
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+        const startDate = new Date(today);
+        startDate.setDate(startDate.getDate() - days);
+        const endDate = new Date(today);
+        endDate.setDate(endDate.getDate() + days);
+
+        return allEvents.filter(event => {
+            const eventDate = new Date(event.date);
+            return eventDate >= startDate && eventDate <= endDate;
+        });
+    }
+
+    function renderOverview(events) {
+        const container = document.getElementById('analyticsOverview');
+
+        if (events.length === 0) {
+            container.innerHTML = '<p style="color: var(--gray-500); text-align: center;">No events in this date range</p>';
+            return;
+        }
+
+        // Calculate category stats
+        const categoryStats = {};
+        events.forEach(event => {
+            const category = event.category || 'Other';
+            if (!categoryStats[category]) {
+                categoryStats[category] = { count: 0, color: event.color };
+            }
+            categoryStats[category].count++;
+        });
+
+        // Sort by count
+        const sortedCategories = Object.entries(categoryStats).sort((a, b) => b[1].count - a[1].count);
+
+        let html = `<div style="margin-bottom: 15px; font-size: 16px; font-weight: 600;">Total Events: ${events.length}</div>`;
+        html += '<div style="display: flex; flex-direction: column; gap: 10px;">';
+
+        sortedCategories.forEach(([category, data]) => {
+            const percentage = ((data.count / events.length) * 100).toFixed(1);
+            html += `
+                <div style="display: flex; align-items: center; gap: 12px;">
+                    <div style="width: 12px; height: 12px; border-radius: 3px; background: ${data.color}; flex-shrink: 0;"></div>
+                    <div style="flex: 1;">
+                        <span style="font-weight: 600;">${category}:</span>
+                        <span style="color: var(--gray-600);"> ${data.count} events (${percentage}%)</span>
+                    </div>
+                </div>
+            `;
+        });
+
+        html += '</div>';
+        container.innerHTML = html;
+    }
+
+    function renderBusiestDays(events) {
+        const container = document.getElementById('analyticsBusiestDays');
+
+        if (events.length === 0) {
+            container.innerHTML = '<p style="color: var(--gray-500); text-align: center;">No events to analyze</p>';
+            return;
+        }
+
+        // Count events per day
+        const dayCount = {};
+        events.forEach(event => {
+            const date = event.date;
+            if (!dayCount[date]) {
+                dayCount[date] = [];
+            }
+            dayCount[date].push(event);
+        });
+
+        // Sort and get top 5
+        const sortedDays = Object.entries(dayCount)
+            .sort((a, b) => b[1].length - a[1].length)
+            .slice(0, 5);
+
+        if (sortedDays.length === 0) {
+            container.innerHTML = '<p style="color: var(--gray-500); text-align: center;">No events found</p>';
+            return;
+        }
+
+        let html = '<div style="display: flex; flex-direction: column; gap: 12px;">';
+        sortedDays.forEach(([dateStr, dayEvents], index) => {
+            const date = new Date(dateStr);
+            const formattedDate = date.toLocaleDateString('en-US', { weekday: 'long', month: 'short', day: 'numeric', year: 'numeric' });
+            html += `
+                <div style="display: flex; align-items: center; gap: 10px;">
+                    <span style="font-weight: 700; color: var(--gray-500); min-width: 20px;">${index + 1}.</span>
+                    <div style="flex: 1;">
+                        <div style="font-weight: 600;">${formattedDate}</div>
+                        <div style="color: var(--gray-600); font-size: 14px;">${dayEvents.length} event${dayEvents.length > 1 ? 's' : ''}</div>
+                    </div>
+                </div>
+            `;
+        });
+        html += '</div>';
+        container.innerHTML = html;
+    }
+
+    function renderTimeAnalysis(events) {
+        const container = document.getElementById('analyticsTimeAnalysis');
+
+        // Filter events with times
+        const timedEvents = events.filter(e => e.start_time);
+
+        if (timedEvents.length === 0) {
+            container.innerHTML = '<p style="color: var(--gray-500); text-align: center;">No timed events to analyze</p>';
+            return;
+        }
+
+        // Analyze time of day
+        const times = { morning: 0, afternoon: 0, evening: 0 };
+        timedEvents.forEach(event => {
+            const hour = parseInt(event.start_time.split(':')[0]);
+            if (hour >= 6 && hour < 12) {
+                times.morning++;
+            } else if (hour >= 12 && hour < 18) {
+                times.afternoon++;
+            } else {
+                times.evening++;
+            }
+        });
+
+        const total = timedEvents.length;
+
+        let html = `<div style="margin-bottom: 10px; color: var(--gray-600); font-size: 14px;">Based on ${total} event${total > 1 ? 's' : ''} with specific times</div>`;
+        html += '<div style="display: flex; flex-direction: column; gap: 12px;">';
+
+        const timeSlots = [
+            { label: 'Morning (6 AM - 12 PM)', count: times.morning, emoji: '🌅' },
+            { label: 'Afternoon (12 PM - 6 PM)', count: times.afternoon, emoji: '☀️' },
+            { label: 'Evening (6 PM - 6 AM)', count: times.evening, emoji: '🌙' }
+        ];
+
+        timeSlots.forEach(slot => {
+            const percentage = total > 0 ? ((slot.count / total) * 100).toFixed(1) : 0;
+            html += `
+                <div style="display: flex; align-items: center; gap: 10px;">
+                    <span style="font-size: 20px;">${slot.emoji}</span>
+                    <div style="flex: 1;">
+                        <div style="font-weight: 600;">${slot.label}</div>
+                        <div style="color: var(--gray-600); font-size: 14px;">${slot.count} events (${percentage}%)</div>
+                    </div>
+                </div>
+            `;
+        });
+
+        html += '</div>';
+        container.innerHTML = html;
+    }
+
+    // ===== Drag and Drop Functions =====
+    let draggedEvent = null;
+    let draggedEventOriginalDate = null;
+
+    function handleDragStart(e) {
+        // Store event data from the element
+        draggedEvent = this._eventData;
+        if (!draggedEvent) {
+            console.error('No event data attached to dragged element');
+            return;
+        }
+
+        draggedEventOriginalDate = draggedEvent.date;
+        console.log('Drag started:', draggedEvent.title, 'from date:', draggedEventOriginalDate);
+
+        // Set drag data
+        e.dataTransfer.effectAllowed = 'move';
+        e.dataTransfer.setData('text/plain', draggedEvent.id);
+
+        // Visual feedback
+        this.classList.add('dragging');
+    }
+
+    function handleDragEnd(e) {
+        // Reset visual state
+        this.classList.remove('dragging');
+
+        // Clear all drag-over classes
+        document.querySelectorAll('.drag-over').forEach(el => {
+            el.classList.remove('drag-over');
+        });
+    }
+
+    function handleDragOver(e) {
+        if (!draggedEvent) return;
+
+        // Prevent default to allow drop
+        e.preventDefault();
+        e.dataTransfer.dropEffect = 'move';
+
+        // Highlight drop zone
+        this.classList.add('drag-over');
+
+        return false;
+    }
+
+    function handleDragLeave(e) {
+        // Remove highlight when leaving
+        this.classList.remove('drag-over');
+    }
+
+    async function handleDrop(e) {
+        if (!draggedEvent) return;
+
+        e.stopPropagation();
+        e.preventDefault();
+
+        // Remove highlight
+        this.classList.remove('drag-over');
+
+        // Get new date
+        const newDate = this.dataset.date;
+        console.log('Drop detected - Event:', draggedEvent.title, 'New date:', newDate, 'Old date:', draggedEventOriginalDate);
+
+        // Don't do anything if same date
+        if (newDate === draggedEventOriginalDate) {
+            console.log('Dropped on same date, no action needed');
+            return false;
+        }
+
+        // Update event
+        console.log('Calling rescheduleEvent for event ID:', draggedEvent.id);
+        await rescheduleEvent(draggedEvent.id, newDate);
+
+        return false;
+    }
+
+    async function rescheduleEvent(eventId, newDate) {
+        try {
+            const response = await fetch(`/calendar/reschedule_event/${eventId}/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify({
+                    new_date: newDate
+                })
+            });
+
+            const data = await response.json();
+
+            if (response.ok && data.status === 'success') {
+                console.log('Event rescheduled successfully');
+                if (data.queued) {
+                    // Offline: move it here, the sync moves it on the server
+                    const event = allEvents.find(e => String(e.id) === String(eventId));
+                    if (event) event.date = newDate;
+                } else {
+                    // Reload events and refresh
+                    await loadEvents();
+                }
+                renderCalendar();
+            } else if (response.status === 404) {
+                console.warn('Event not found (404) - This event may have been deleted or is a stale reference');
+                // Silently reload to refresh calendar without showing error to user
+                await loadEvents();
+                renderCalendar();
+            } else {
+                console.error('Failed to reschedule event:', data.message);
+                alert('Failed to reschedule event. Please try again.');
+
+                // Reload to reset
+                await loadEvents();
+                renderCalendar();
+            }
+        } catch (error) {
+            console.error('Error rescheduling event:', error);
+            alert('An error occurred while rescheduling the event.');
+
+            // Reload to reset
+            await loadEvents();
+            renderCalendar();
+        }
+    }
+
+    // Helper to set up drag and drop on elements
+    function setupDragAndDrop(eventEl, event, dayEl) {
+        // Make event draggable
+        eventEl.setAttribute('draggable', 'true');
+        eventEl._eventData = event;  // Attach event data to element
+
+        // Event drag handlers
+        eventEl.addEventListener('dragstart', handleDragStart);
+        eventEl.addEventListener('dragend', handleDragEnd);
+
+        // Day drop zone handlers
+        if (dayEl) {
+            dayEl.addEventListener('dragover', handleDragOver);
+            dayEl.addEventListener('drop', handleDrop);
+            dayEl.addEventListener('dragleave', handleDragLeave);
+        }
+    }
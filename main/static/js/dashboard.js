@@ -0,0 +1,861 @@
+/* ----------------------
+   COOKIE HELPER
+---------------------- */
+function getCookie(name){
+    let value = null;
+    document.cookie.split(";").forEach(c=>{
+        c = c.trim();
+        if (c.startsWith(name + "="))
+            value = decodeURIComponent(c.substring(name.length + 1));
+    });
+    return value;
+}
+
+/* ----------------------
+   COUNTERS + SORT
+---------------------- */
+function refreshActiveCount(){
+    const count = document.querySelectorAll("#active-tasks .task-card").length;
+    document.getElementById("activeTaskCount").textContent = count;
+}
+
+function manualOrder(){
+    const sort = document.querySelector('#filterForm select[name="sort"]');
+    return !sort || sort.value === "default";
+}
+
+function sortTasksByPriority(){
+    const container = document.getElementById("active-tasks");
+    // The default sort is the user's own order, which only the server knows
+    if (!container || manualOrder()) return;
+
+    [...container.children]
+        .sort((a,b)=> Number(b.dataset.priority) - Number(a.dataset.priority))
+        .forEach(x => container.appendChild(x));
+}
+
+/* ----------------------
+   FLATPICKR
+---------------------- */
+let addCalendar, editCalendar;
+
+document.addEventListener("DOMContentLoaded", ()=>{
+
+    addCalendar = flatpickr("#due_date", {
+        minDate: "today",
+        dateFormat: "Y-m-d"
+    });
+
+    editCalendar = flatpickr("#edit_due_date", {
+        minDate: "today",
+        dateFormat: "Y-m-d"
+    });
+
+    attachTaskEvents();
+    initTaskDragging();
+    refreshActiveCount();
+    sortTasksByPriority();
+});
+
+/* ----------------------
+   DRAG TO REORDER
+---------------------- */
+let draggedCard = null, draggedFrom = null;
+
+function initTaskDragging(){
+    const container = document.getElementById("active-tasks");
+    if (!container || !manualOrder()) return;
+
+    container.addEventListener("dragstart", e=>{
+        const card = e.target.closest(".task-card");
+        if (!card || card.parentElement !== container) return;
+        draggedCard = card;
+        draggedFrom = card.nextElementSibling;
+        card.classList.add("dragging");
+        e.dataTransfer.effectAllowed = "move";
+    });
+
+    container.addEventListener("dragover", e=>{
+        if (!draggedCard) return;
+        e.preventDefault();
+
+        const over = e.target.closest(".task-card");
+        if (!over || over === draggedCard) return;
+        const box = over.getBoundingClientRect();
+        const after = e.clientY > box.top + box.height / 2;
+        container.insertBefore(draggedCard, after ? over.nextElementSibling : over);
+    });
+
+    container.addEventListener("drop", e=> e.preventDefault());
+
+    container.addEventListener("dragend", ()=>{
+        if (!draggedCard) return;
+        const card = draggedCard;
+        draggedCard = null;
+        card.classList.remove("dragging");
+        if (card.nextElementSibling !== draggedFrom) saveTaskPosition(card);
+    });
+}
+
+function saveTaskPosition(card){
+    const above = card.previousElementSibling;
+    const below = card.nextElementSibling;
+
+    fetch(`/tasks/${card.dataset.id}/move/`, {
+        method:"POST",
+        headers:{
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With":"XMLHttpRequest"
+        },
+        body: new URLSearchParams({
+            above: above ? above.dataset.id : "",
+            below: below ? below.dataset.id : ""
+        })
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        // Someone else changed the list: show the order as it is now
+        if (!data.success) location.reload();
+    });
+}
+
+/* ----------------------
+   EDIT MODAL
+---------------------- */
+function openEditModal(btn){
+    const id = btn.dataset.id;
+
+    document.getElementById("edit_title").value       = btn.dataset.title;
+    document.getElementById("edit_category").value    = btn.dataset.category;
+    document.getElementById("edit_difficulty").value  = btn.dataset.difficulty;
+    document.getElementById("edit_priority").value    = btn.dataset.priority;
+
+    if (editCalendar)
+        editCalendar.setDate(btn.dataset.due || "");
+
+    document.getElementById("editTaskForm").action = `/tasks/edit/${id}/`;
+    document.getElementById("editModal").style.display = "block";
+}
+
+/* ----------------------
+   SUBTASK FUNCTIONS
+---------------------- */
+function addSubtask(taskId, title, inputEl){
+    const fd = new FormData();
+    fd.append("title", title);
+    // Set by the "add a step under this one" button
+    if (inputEl.dataset.parentId) fd.append("parent", inputEl.dataset.parentId);
+
+    fetch(`/tasks/${taskId}/subtasks/add/`, {
+        method: "POST",
+        body: fd,
+        headers:{
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With": "XMLHttpRequest"
+        }
+    })
+    .then(r => r.json())
+    .then(data =>{
+        if (!data.success) return;
+
+        const list = document.querySelector(`.subtask-list[data-task-id="${taskId}"]`);
+        if (!list) return;
+
+        if (data.queued){
+            // Shown as pending until the sync gives it an id
+            const pending = document.createElement("li");
+            pending.className = "subtask-item pending";
+            pending.textContent = title;
+            list.appendChild(pending);
+            inputEl.value = "";
+            return;
+        }
+
+        const li = document.createElement("li");
+        li.className = "subtask-item";
+        li.dataset.subtaskId = data.subtask_id;
+        li.dataset.depth = data.depth;
+        li.style.setProperty("--depth", data.depth);
+
+        li.innerHTML = `
+            <label class="subtask-checkbox">
+                <input type="checkbox" data-subtask-id="${data.subtask_id}">
+                <span class="subtask-title">${data.title}</span>
+            </label>
+            <span class="subtask-branch-count" data-subtask-id="${data.subtask_id}"></span>
+            <button class="subtask-child-btn" data-subtask-id="${data.subtask_id}" title="Add a step under this one">
+                <i class="fa fa-level-down"></i>
+            </button>
+            <button class="subtask-delete-btn" data-subtask-id="${data.subtask_id}">
+                <i class="fa fa-times"></i>
+            </button>
+        `;
+
+        // A child goes after the last item of its parent's branch
+        const parent = data.parent_id && list.querySelector(`.subtask-item[data-subtask-id="${data.parent_id}"]`);
+        if (parent){
+            const branch = subtaskBranch(parent);
+            branch[branch.length - 1].after(li);
+        } else {
+            list.appendChild(li);
+        }
+
+        li.querySelector(".subtask-delete-btn").onclick = () =>
+            deleteSubtask(data.subtask_id, li.querySelector(".subtask-delete-btn"));
+
+        inputEl.value = "";
+        updateSubtaskProgress(taskId, data.progress);
+        updateBranchCounts(data.ancestors);
+
+        attachTaskEvents(); // rebind new events
+    });
+}
+
+function toggleSubtask(subtaskId, checkbox){
+    // The state to set rather than a flip, so a replayed offline write can't undo itself
+    fetch(`/subtasks/${subtaskId}/toggle/`, {
+        method: "POST",
+        headers:{
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With": "XMLHttpRequest"
+        },
+        body: new URLSearchParams({ completed: checkbox.checked })
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (!data.success) return;
+
+        const completed = data.queued ? checkbox.checked : data.completed;
+        const li = checkbox.closest(".subtask-item");
+        li.classList.toggle("completed", completed);
+        li.querySelector(".subtask-title").classList.toggle("crossed", completed);
+
+        updateSubtaskProgress(
+            checkbox.closest(".task-card").dataset.id,
+            data.progress
+        );
+        updateBranchCounts(data.ancestors);
+    });
+}
+
+function deleteSubtask(subtaskId, btn){
+    fetch(`/subtasks/${subtaskId}/delete/`, {
+        method:"POST",
+        headers:{ 
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With": "XMLHttpRequest"
+        }
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (!data.success) return;
+
+        const li = btn.closest(".subtask-item");
+        const taskId = btn.closest(".task-card").dataset.id;
+
+        // The server deleted the whole branch
+        subtaskBranch(li).forEach(item => item.remove());
+        updateSubtaskProgress(taskId, data.progress);
+        updateBranchCounts(data.ancestors);
+    });
+}
+
+/* The item followed by everything nested under it (the list is in tree order) */
+function subtaskBranch(li){
+    const depth = Number(li.dataset.depth || 0);
+    const branch = [li];
+    let next = li.nextElementSibling;
+    while (next && Number(next.dataset.depth || 0) > depth){
+        branch.push(next);
+        next = next.nextElementSibling;
+    }
+    return branch;
+}
+
+function updateBranchCounts(ancestors){
+    (ancestors || []).forEach(a => {
+        const count = document.querySelector(`.subtask-branch-count[data-subtask-id="${a.id}"]`);
+        if (count) count.textContent = a.total ? `${a.completed}/${a.total}` : "";
+    });
+}
+
+
+function updateSubtaskProgress(taskId, progress){
+    // A write queued offline (offline.js) has no counts yet; they come with the next load
+    if (!progress) return;
+
+    const bar   = document.querySelector(`.subtask-progress-fill[data-task-id="${taskId}"]`);
+    const text  = document.querySelector(`.subtask-progress-text[data-task-id="${taskId}"]`);
+    const badge = document.querySelector(`.subtask-count[data-task-id="${taskId}"]`);
+
+    if (bar) bar.style.width = `${progress.percent}%`;
+    if (text) text.textContent = `${progress.completed}/${progress.total} completed`;
+    if (badge) badge.textContent = `${progress.completed}/${progress.total}`;
+}
+
+/* ----------------------
+   MAIN EVENT BINDER
+---------------------- */
+function attachTaskEvents(){
+
+    /* DRAG HANDLES (only cards in the active list can be dropped) */
+    const draggable = manualOrder();
+    document.querySelectorAll(".task-card").forEach(card=>{
+        card.draggable = draggable;
+    });
+
+    /* EDIT */
+    document.querySelectorAll(".edit-btn").forEach(btn=>{
+        btn.onclick = e=>{
+            e.preventDefault();
+            openEditModal(btn);
+        };
+    });
+
+    /* COMPLETE + DELETE */
+document.querySelectorAll(".complete-btn, .delete-btn").forEach(btn=>{
+    btn.onclick = e=>{
+        e.preventDefault();
+
+        const id = btn.dataset.id;
+        const complete = btn.classList.contains("complete-btn");
+        const wanted = !document.querySelector(`.task-card[data-id="${id}"]`).classList.contains("completed");
+
+        fetch(complete ? `/tasks/toggle_complete/${id}/` : `/tasks/delete/${id}/`, {
+            method:"POST",
+            headers:{
+                "X-CSRFToken": getCookie("csrftoken"),
+                "X-Requested-With":"XMLHttpRequest"
+            },
+            body: complete ? new URLSearchParams({ completed: wanted }) : undefined
+        })
+        .then(r=>r.json())
+        .then(data=>{
+            if (!data.success) return;
+
+            const card = document.querySelector(`.task-card[data-id="${id}"]`);
+
+            if (complete){
+
+                /* 🔵 Get the circle + check icon */
+                const circle = card.querySelector(".circle");
+                const checkIcon = circle.querySelector("i");
+
+                // Queued offline: the server hasn't answered, so show the state asked for
+                const completed = data.queued ? wanted : data.completed;
+
+                if (completed){
+                    // Move to completed section
+                    document.getElementById("completed-tasks").appendChild(card);
+                    card.classList.add("completed");
+                    card.querySelector(".task-title").classList.add("crossed");
+
+                    // 🟢 Turn circle green with check
+                    circle.classList.add("checked");
+                    checkIcon.style.display = "block";
+
+                    btn.querySelector("i").classList.replace("fa-check", "fa-undo");
+
+                } else {
+                    // Move back to active
+                    document.getElementById("active-tasks").appendChild(card);
+                    card.classList.remove("completed");
+                    card.querySelector(".task-title").classList.remove("crossed");
+
+                    // 🔵 Reset circle back to blue, remove check
+                    circle.classList.remove("checked");
+                    checkIcon.style.display = "none";
+
+                    btn.querySelector("i").classList.replace("fa-undo", "fa-check");
+                    sortTasksByPriority();
+                }
+
+                refreshActiveCount();
+
+            } else {
+                card.remove();
+                refreshActiveCount();
+            }
+        });
+    };
+});
+
+
+    /* FAVORITE */
+    document.querySelectorAll(".favorite-btn").forEach(btn=>{
+        btn.onclick = e=>{
+            e.preventDefault();
+
+            const star = btn.querySelector("i");
+            const wanted = !star.classList.contains("starred");
+
+            fetch(`/tasks/toggle_favorite/${btn.dataset.id}/`, {
+                method:"POST",
+                headers:{
+                    "X-CSRFToken": getCookie("csrftoken"),
+                    "X-Requested-With":"XMLHttpRequest"
+                },
+                body: new URLSearchParams({ favorite: wanted })
+            })
+            .then(r=>r.json())
+            .then(data=>{
+                if (data.success){
+                    star.classList.toggle("starred", data.queued ? wanted : data.favorite);
+                }
+            });
+        };
+    });
+
+    /* SUBTASK TOGGLE */
+    document.querySelectorAll(".subtask-toggle-btn").forEach(btn=>{
+        btn.onclick = e=>{
+            e.preventDefault();
+
+            const section = btn.closest(".task-card").querySelector(".subtasks-section");
+            section.style.display = section.style.display === "none" ? "block" : "none";
+        };
+    });
+
+    /* ADD SUBTASK */
+    document.querySelectorAll(".add-subtask-btn").forEach(btn=>{
+        btn.onclick = ()=>{
+            const input = btn.parentElement.querySelector(".subtask-input");
+            const text = input.value.trim();
+            if (text) addSubtask(btn.dataset.taskId, text, input);
+        };
+    });
+
+    /* ENTER → ADD SUBTASK */
+    document.querySelectorAll(".subtask-input").forEach(input=>{
+        input.onkeypress = e=>{
+            if (e.key === "Enter"){
+                e.preventDefault();
+                const text = input.value.trim();
+                if (text) addSubtask(input.dataset.taskId, text, input);
+            }
+        };
+    });
+
+    /* CHECK SUBTASK */
+    document.querySelectorAll(".subtask-checkbox input").forEach(box=>{
+        box.onchange = ()=> toggleSubtask(box.dataset.subtaskId, box);
+    });
+
+    /* ADD A STEP UNDER A SUBTASK: the next add goes under it (click again to cancel) */
+    document.querySelectorAll(".subtask-child-btn").forEach(btn => {
+        btn.onclick = e => {
+            e.preventDefault();
+            const input = btn.closest(".subtasks-section").querySelector(".subtask-input");
+            const active = input.dataset.parentId === btn.dataset.subtaskId;
+
+            btn.closest(".subtask-list").querySelectorAll(".subtask-child-btn.active")
+                .forEach(b => b.classList.remove("active"));
+            if (active){
+                delete input.dataset.parentId;
+                input.placeholder = "Add a subtask...";
+            } else {
+                input.dataset.parentId = btn.dataset.subtaskId;
+                btn.classList.add("active");
+                const title = btn.closest(".subtask-item").querySelector(".subtask-title").textContent.trim();
+                input.placeholder = `Add a step under "${title}"...`;
+                input.focus();
+            }
+        };
+    });
+
+    /* DELETE SUBTASK */
+    document.querySelectorAll(".subtask-delete-btn").forEach(btn => {
+        btn.onclick = e => {
+            e.preventDefault();
+            deleteSubtask(btn.dataset.subtaskId, btn);
+        };
+    });
+
+        /* CLICKABLE CIRCLE TO TOGGLE COMPLETE */
+    document.querySelectorAll(".circle").forEach(circle => {
+
+        circle.onclick = e => {
+            e.preventDefault();
+
+            const id = circle.dataset.id;
+            const wanted = !document.querySelector(`.task-card[data-id="${id}"]`).classList.contains("completed");
+
+            fetch(`/tasks/toggle_complete/${id}/`, {
+                method: "POST",
+                headers: {
+                    "X-CSRFToken": getCookie("csrftoken"),
+                    "X-Requested-With": "XMLHttpRequest"
+                },
+                body: new URLSearchParams({ completed: wanted })
+            })
+            .then(r => r.json())
+            .then(data => {
+                if (!data.success) return;
+
+                const card = document.querySelector(`.task-card[data-id="${id}"]`);
+                const checkIcon = circle.querySelector("i");
+
+                // Find the COMPLETE button inside this card
+                const completeBtn = card.querySelector(".complete-btn i");
+
+                const completed = data.queued ? wanted : data.completed;
+
+                if (completed) {
+                    // Move card to completed section
+                    document.getElementById("completed-tasks").appendChild(card);
+                    card.classList.add("completed");
+                    card.querySelector(".task-title").classList.add("crossed");
+
+                    // Change circle → green + show check
+                    circle.classList.add("checked");
+                    checkIcon.style.display = "block";
+
+                    // Change complete button → undo icon
+                    completeBtn.classList.replace("fa-check", "fa-undo");
+
+                } else {
+                    // Move card back to active
+                    document.getElementById("active-tasks").appendChild(card);
+                    card.classList.remove("completed");
+                    card.querySelector(".task-title").classList.remove("crossed");
+
+                    // Reset circle → blue + hide check
+                    circle.classList.remove("checked");
+                    checkIcon.style.display = "none";
+
+                    // Change complete button → check icon
+                    completeBtn.classList.replace("fa-undo", "fa-check");
+
+                    sortTasksByPriority();
+                }
+
+                refreshActiveCount();
+            });
+        };
+    });
+
+
+
+}
+
+/* ----------------------
+   BULK ACTIONS
+---------------------- */
+function selectedTaskIds(){
+    return [...document.querySelectorAll(".task-select:checked")].map(box => box.dataset.id);
+}
+
+function refreshBulkBar(){
+    const count = selectedTaskIds().length;
+    document.getElementById("bulkCount").textContent = count;
+    document.getElementById("bulkBar").style.display = count ? "flex" : "none";
+}
+
+function runBulkAction(action, value){
+    const ids = selectedTaskIds();
+    if (!ids.length) return;
+    if (action === "delete" && !confirm(`Delete ${ids.length} task(s)?`)) return;
+
+    fetch("/tasks/bulk/", {
+        method:"POST",
+        headers:{
+            "Content-Type":"application/json",
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With":"XMLHttpRequest"
+        },
+        body: JSON.stringify({action, ids, value})
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (!data.success){
+            alert(data.error || "Bulk update failed");
+            return;
+        }
+
+        if (action === "delete"){
+            data.task_ids.forEach(id =>
+                document.querySelector(`.task-card[data-id="${id}"]`)?.remove()
+            );
+            refreshActiveCount();
+            refreshBulkBar();
+        } else {
+            // Cards are cached server-side, so a reload is cheap
+            location.reload();
+        }
+    });
+}
+
+// Delegated so cards added after page load are covered too
+document.addEventListener("change", e=>{
+    if (e.target.classList.contains("task-select")) refreshBulkBar();
+});
+
+document.querySelectorAll(".bulk-btn").forEach(btn=>{
+    btn.onclick = e=>{
+        e.preventDefault();
+        runBulkAction(btn.dataset.action);
+    };
+});
+
+document.getElementById("bulkCategory").onchange = function(){
+    if (this.value) runBulkAction("recategorize", this.value);
+};
+
+document.getElementById("bulkPriority").onchange = function(){
+    if (this.value) runBulkAction("reprioritize", this.value);
+};
+
+document.getElementById("bulkClear").onclick = e=>{
+    e.preventDefault();
+    document.querySelectorAll(".task-select:checked").forEach(box => box.checked = false);
+    refreshBulkBar();
+};
+
+/* ----------------------
+   HABITS
+---------------------- */
+function renderHabit(habit){
+    let li = document.querySelector(`.habit-item[data-id="${habit.id}"]`);
+    if (!li){
+        li = document.createElement("li");
+        li.className = "habit-item";
+        li.dataset.id = habit.id;
+        li.innerHTML = `
+            <div class="circle"><i class="fa fa-check"></i></div>
+            <span class="habit-title"></span>
+            <span class="habit-streak" title="Current / longest streak"></span>
+            <span class="habit-rate" title="Last 30 days"></span>
+            <button class="habit-delete"><i class="fa fa-times"></i></button>
+        `;
+        li.querySelector(".circle").onclick = ()=> checkHabit(habit.id);
+        li.querySelector(".habit-delete").onclick = ()=> deleteHabit(habit.id);
+        document.getElementById("habitList").appendChild(li);
+    }
+
+    const unit = habit.schedule === "weekly" ? "wk" : "d";
+    li.querySelector(".habit-title").textContent = habit.title;
+    li.querySelector(".circle").classList.toggle("checked", habit.done_today);
+    li.querySelector(".circle i").style.display = habit.done_today ? "block" : "none";
+    li.querySelector(".habit-streak").innerHTML =
+        `<i class="fa fa-fire"></i> ${habit.current_streak}${unit} / ${habit.longest_streak}${unit}`;
+    li.querySelector(".habit-rate").textContent = `${habit.completion_rate}%`;
+}
+
+function loadHabits(){
+    fetch("/habits/")
+    .then(r=>r.json())
+    .then(data=>{
+        if (data.success) data.habits.forEach(renderHabit);
+    });
+}
+
+function checkHabit(id){
+    // Say what the day should be rather than "toggle", so a write replayed later does the same
+    const circle = document.querySelector(`.habit-item[data-id="${id}"] .circle`);
+    const done = !circle.classList.contains("checked");
+
+    fetch(`/habits/${id}/check/`, {
+        method:"POST",
+        headers:{
+            "Content-Type":"application/json",
+            "X-CSRFToken": getCookie("csrftoken")
+        },
+        body: JSON.stringify({ done })
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (!data.success) return;
+        if (data.queued){
+            circle.classList.toggle("checked", done);
+            circle.querySelector("i").style.display = done ? "block" : "none";
+            return;
+        }
+        renderHabit(data.habit);
+    });
+}
+
+function deleteHabit(id){
+    if (!confirm("Delete this habit and its history?")) return;
+
+    fetch(`/habits/${id}/delete/`, {
+        method:"POST",
+        headers:{ "X-CSRFToken": getCookie("csrftoken") }
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (data.success) document.querySelector(`.habit-item[data-id="${id}"]`)?.remove();
+    });
+}
+
+document.getElementById("habitSchedule").onchange = function(){
+    document.getElementById("habitTimes").style.display = this.value === "weekly" ? "" : "none";
+};
+
+document.getElementById("addHabitForm").onsubmit = function(e){
+    e.preventDefault();
+
+    fetch(this.action, {
+        method:"POST",
+        headers:{ "X-CSRFToken": getCookie("csrftoken") },
+        body: new FormData(this)
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (!data.success) return;
+        renderHabit(data.habit);
+        this.reset();
+        document.getElementById("habitTimes").style.display = "none";
+    });
+};
+
+loadHabits();
+
+/* Writes queued offline reached the server (offline.js): show what was saved,
+   unless the user is typing */
+window.addEventListener("habitcanvas:synced", ()=>{
+    if (document.activeElement?.matches("input, textarea, select")) loadHabits();
+    else location.reload();
+});
+
+/* ----------------------
+   SEARCH
+---------------------- */
+const SEARCH_ICONS = { task: "fa-list", subtask: "fa-list-check", event: "fa-calendar" };
+let searchQuery = "";
+let searchPage = 1;
+let suggestTimer = null;
+
+function showSearchHit(hit){
+    if (hit.type === "event"){
+        window.location = "/calendar/";
+        return;
+    }
+    const card = document.querySelector(`.task-card[data-id="${hit.task_id}"]`);
+    if (!card) return;
+    if (hit.type === "subtask")
+        card.querySelector(".subtasks-section").style.display = "block";
+    card.scrollIntoView({ behavior: "smooth", block: "center" });
+    card.classList.add("search-highlight");
+    setTimeout(()=> card.classList.remove("search-highlight"), 1500);
+}
+
+function runSearch(page){
+    const params = new URLSearchParams({ q: searchQuery, page });
+
+    fetch(`/search/?${params}`)
+    .then(r=>r.json())
+    .then(data=>{
+        if (!data.success) return;
+
+        const list = document.getElementById("searchResultList");
+        if (page === 1) list.innerHTML = "";
+
+        data.results.forEach(hit=>{
+            const li = document.createElement("li");
+            const icon = document.createElement("i");
+            icon.className = `fa ${SEARCH_ICONS[hit.type]}`;
+            li.appendChild(icon);
+            li.append(` ${hit.title}`);
+            if (hit.event_date){
+                const date = document.createElement("span");
+                date.className = "search-date";
+                date.textContent = hit.event_date;
+                li.appendChild(date);
+            }
+            li.onclick = ()=> showSearchHit(hit);
+            list.appendChild(li);
+        });
+
+        if (page === 1 && !data.results.length)
+            list.innerHTML = '<li class="search-empty">No matches</li>';
+
+        searchPage = page;
+        document.getElementById("searchMore").style.display = data.has_more ? "block" : "none";
+        document.getElementById("searchResults").style.display = "block";
+    });
+}
+
+document.getElementById("searchInput").oninput = function(){
+    const q = this.value.trim();
+    clearTimeout(suggestTimer);
+    if (!q){
+        document.getElementById("searchResults").style.display = "none";
+        return;
+    }
+
+    // Wait for a pause in typing before asking for suggestions
+    suggestTimer = setTimeout(()=>{
+        fetch(`/search/suggest/?${new URLSearchParams({ q })}`)
+        .then(r=>r.json())
+        .then(data=>{
+            const datalist = document.getElementById("searchSuggestions");
+            datalist.innerHTML = "";
+            (data.suggestions || []).forEach(title=>{
+                const option = document.createElement("option");
+                option.value = title;
+                datalist.appendChild(option);
+            });
+        });
+    }, 150);
+};
+
+document.getElementById("searchForm").onsubmit = e=>{
+    e.preventDefault();
+    searchQuery = document.getElementById("searchInput").value.trim();
+    if (searchQuery) runSearch(1);
+};
+
+document.getElementById("searchMore").onclick = e=>{
+    e.preventDefault();
+    runSearch(searchPage + 1);
+};
+
+/* ----------------------
+   MODALS
+---------------------- */
+document.getElementById("openAddBtn").onclick = e=>{
+    e.preventDefault();
+    document.getElementById("addModal").style.display = "block";
+};
+
+document.querySelectorAll(".modal .close").forEach(btn=>{
+    btn.onclick = ()=> btn.closest(".modal").style.display = "none";
+});
+
+document.getElementById("openLogout").onclick = e=>{
+    e.preventDefault();
+    document.getElementById("logoutModal").style.display = "block";
+};
+
+document.getElementById("btnCancelLogout").onclick = ()=>{
+    document.getElementById("logoutModal").style.display = "none";
+};
+
+window.onclick = e=>{
+    if (e.target.classList.contains("modal"))
+        e.target.style.display = "none";
+};
+
+/* ----------------------
+   EDIT FORM (AJAX)
+---------------------- */
+document.getElementById("editTaskForm").onsubmit = function(e){
+    e.preventDefault();
+
+    fetch(this.action, {
+        method:"POST",
+        headers:{
+            "X-CSRFToken": getCookie("csrftoken"),
+            "X-Requested-With":"XMLHttpRequest"
+        },
+        body: new FormData(this)
+    })
+    .then(r=>r.json())
+    .then(data=>{
+        if (data.success){
+            location.reload();
+        } else {
+            alert("Error updating task.");
+        }
+    });
+};
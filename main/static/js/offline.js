@@ -0,0 +1,83 @@
+/* ----------------------
+   OFFLINE MODE
+   Registers the service worker (/sw.js, rendered from main/offline.py) and
+   asks it to send queued writes as soon as the connection returns. The
+   worker answers with the queue length, shown in a small badge, and says
+   when it had to give up on a write the server kept failing on.
+---------------------- */
+(function(){
+    if (!("serviceWorker" in navigator)) return;
+
+    const WORKER_URL = document.currentScript.dataset.workerUrl;
+
+    const badge = document.createElement("div");
+    badge.className = "offline-badge";
+    badge.hidden = true;
+    badge.setAttribute("role", "status");
+    document.body.appendChild(badge);
+
+    let pending = 0;
+    let lost = 0;
+
+    function showStatus(){
+        badge.classList.toggle("offline-badge-error", lost > 0);
+        if (lost){
+            badge.textContent = `${lost} change${lost === 1 ? "" : "s"} couldn't be saved and ${lost === 1 ? "was" : "were"} discarded.`;
+            const dismiss = document.createElement("a");
+            dismiss.href = "#";
+            dismiss.textContent = "Dismiss";
+            dismiss.onclick = e=>{
+                e.preventDefault();
+                lost = 0;
+                showStatus();
+            };
+            badge.appendChild(dismiss);
+            badge.hidden = false;
+        } else if (!navigator.onLine){
+            badge.textContent = pending
+                ? `Offline: ${pending} change${pending === 1 ? "" : "s"} will sync when you're back online`
+                : "Offline: showing saved data";
+            badge.hidden = false;
+        } else if (pending){
+            badge.textContent = `Syncing ${pending} change${pending === 1 ? "" : "s"}…`;
+            badge.hidden = false;
+        } else {
+            badge.hidden = true;
+        }
+    }
+
+    function tellWorker(message){
+        navigator.serviceWorker.ready.then(reg => reg.active && reg.active.postMessage(message));
+    }
+
+    navigator.serviceWorker.addEventListener("message", e=>{
+        const data = e.data || {};
+        if (data.type === "queue"){
+            pending = data.pending;
+            showStatus();
+        } else if (data.type === "dropped"){
+            console.error("Discarded offline changes the server kept failing on:", data.writes);
+            lost += data.writes.length;
+            pending = data.pending;
+            showStatus();
+        } else if (data.type === "synced"){
+            pending = data.pending;
+            showStatus();
+            // Pages re-read what the sync changed (calendar.js reloads its events)
+            if (data.applied) window.dispatchEvent(new CustomEvent("habitcanvas:synced", { detail: data }));
+        }
+    });
+
+    window.addEventListener("online", ()=>{
+        showStatus();
+        tellWorker({ type: "replay" });
+    });
+    window.addEventListener("offline", showStatus);
+
+    navigator.serviceWorker.register(WORKER_URL, { scope: "/" })
+    .then(()=>{
+        tellWorker({ type: navigator.onLine ? "replay" : "status" });
+        showStatus();
+    })
+    .catch(err => console.error("Service worker registration failed:", err));
+})();
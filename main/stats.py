@@ -0,0 +1,108 @@
+"""
+Aggregate activity statistics.
+
+Every figure comes from a GROUP BY query over an indexed (user, date) range,
+never from a query per day.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Count, DateField, F, Func, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Task, CalendarEvent, TimerSession, ArchivedTask, FocusRollup
+
+
+def local_day_bounds(first, last):
+    """Aware datetimes covering local days first..last, for indexed range filters."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(first, time.min), tz),
+        timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), tz),
+    )
+
+
+def local_date(field, first, last):
+    """
+    Local calendar date of a datetime column, for rows between first and last.
+
+    On SQLite, TruncDate runs a Python function per row, which dominates a
+    year-long GROUP BY. When the zone keeps a single UTC offset over the range
+    (Asia/Manila always does), SQLite's own date() with that offset gives the
+    same day. DST or a permanent offset change shows up as differing offsets
+    in January or July of some year, or at either end, and then TruncDate is
+    used instead.
+    """
+    if connection.vendor == "sqlite":
+        tz = timezone.get_current_timezone()
+        samples = [first, last] + [
+            date(year, month, 1) for year in range(first.year, last.year + 1) for month in (1, 7)
+        ]
+        offsets = {tz.utcoffset(datetime.combine(d, time(12))) for d in samples}
+        if len(offsets) == 1:
+            minutes = int(offsets.pop().total_seconds() // 60)
+            return Func(F(field), Value(f"{minutes:+d} minutes"), function="date", output_field=DateField())
+    return TruncDate(field)
+
+
+def activity_heatmap(user, year, today=None):
+    """
+    Per-day totals for `year` as parallel lists indexed by day of year (Jan 1 = 0):
+    focus minutes and sessions, tasks completed, and calendar events attended
+    (events on days that have already passed).
+    """
+    today = today or timezone.localdate()
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    length = (last - first).days + 1
+    start, end = local_day_bounds(first, last)
+
+    series = {name: [0] * length for name in ("focus_minutes", "focus_sessions", "tasks_completed", "events")}
+
+    focus = (
+        TimerSession.objects
+        .filter(user=user, mode="focus", completed=True, start_time__gte=start, start_time__lt=end)
+        .annotate(day=local_date("start_time", first, last))
+        .values("day")
+        .annotate(minutes=Sum("duration_minutes"), sessions=Count("id"))
+        .order_by()
+    )
+    # Archived sessions are already summed per local day in FocusRollup
+    archived = (
+        FocusRollup.objects
+        .filter(user=user, date__gte=first, date__lte=last)
+        .values_list("date", "focus_minutes", "focus_sessions")
+    )
+    for day, minutes, sessions in [*focus.values_list("day", "minutes", "sessions"), *archived]:
+        series["focus_minutes"][(day - first).days] += minutes
+        series["focus_sessions"][(day - first).days] += sessions
+
+    for model in (Task, ArchivedTask):
+        completed = (
+            model.objects
+            .filter(user=user, completed_at__gte=start, completed_at__lt=end)
+            .annotate(day=local_date("completed_at", first, last))
+            .values("day")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for day, count in completed.values_list("day", "count"):
+            series["tasks_completed"][(day - first).days] += count
+
+    events = (
+        CalendarEvent.objects
+        .filter(user=user, event_date__gte=first, event_date__lte=min(last, today))
+        .values("event_date")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for day, count in events.values_list("event_date", "count"):
+        series["events"][(day - first).days] = count
+
+    return {
+        "year": year,
+        "start": first.isoformat(),
+        "days": series,
+        "totals": {name: sum(values) for name, values in series.items()},
+    }
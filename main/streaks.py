@@ -0,0 +1,165 @@
+"""
+Focus streaks.
+
+A streak counts consecutive local days (TIME_ZONE, not UTC) with at least one
+completed focus session. UserStreak holds the run ending at last_focus_date;
+UserStreak.live_streak() decides whether that run is still alive today.
+
+record_focus_day() updates one user's row with a compare-and-swap UPDATE, so
+two sessions saved at the same moment can't overwrite each other's result.
+rebuild() recomputes rows from session history (hot sessions plus the
+FocusRollup days of archived ones) in one ordered pass and is
+the repair path for anything the incremental updates got wrong.
+"""
+
+import heapq
+import itertools
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .jobs import job
+from .models import TimerSession, UserStreak, FocusRollup
+from .stats import local_date, local_day_bounds
+
+
+def focus_sessions(user_ids=None):
+    sessions = TimerSession.objects.filter(mode="focus", completed=True)
+    if user_ids is not None:
+        sessions = sessions.filter(user_id__in=user_ids)
+    return sessions
+
+
+def focus_days(user_id, first, last):
+    """Set of local dates between first and last with a completed focus session."""
+    start, end = local_day_bounds(first, last)
+    hot = (
+        focus_sessions([user_id])
+        .filter(start_time__gte=start, start_time__lt=end)
+        .annotate(day=local_date("start_time", first, last))
+        .values_list("day", flat=True)
+        .distinct()
+    )
+    archived = FocusRollup.objects.filter(user_id=user_id, date__gte=first, date__lte=last)
+    return {*hot, *archived.values_list("date", flat=True)}
+
+
+def record_focus_day(user_id, day, attempts=5):
+    """
+    Fold a focus session on local date `day` into the user's streak and return
+    the UserStreak. A lost race re-reads the row and tries again; if every
+    attempt loses, the row is rebuilt from history instead.
+    """
+    def days_between(first, last):
+        return focus_days(user_id, first, last)
+
+    for _ in range(attempts):
+        streak, _ = UserStreak.objects.get_or_create(user_id=user_id)
+        old = (streak.current_streak, streak.longest_streak, streak.last_focus_date)
+        new = streak.advanced(day, days_between)
+        if new == old:
+            return streak
+
+        updated = UserStreak.objects.filter(
+            pk=streak.pk,
+            current_streak=old[0],
+            longest_streak=old[1],
+            last_focus_date=old[2],
+        ).update(
+            current_streak=new[0],
+            longest_streak=new[1],
+            last_focus_date=new[2],
+            updated_at=timezone.now(),
+        )
+        if updated:
+            streak.current_streak, streak.longest_streak, streak.last_focus_date = new
+            return streak
+
+    rebuild([user_id])
+    return UserStreak.objects.get(user_id=user_id)
+
+
+@job
+def record_focus_session(user_id, day):
+    """Job for save_session: record_focus_day with `day` as an ISO date."""
+    record_focus_day(user_id, date.fromisoformat(day))
+
+
+def summarize(days):
+    """(current_streak, longest_streak, last_focus_date) for ascending dates."""
+    current = longest = 0
+    last = None
+    for day in days:
+        if day == last:
+            continue
+        current = current + 1 if last is not None and day == last + timedelta(days=1) else 1
+        longest = max(longest, current)
+        last = day
+    return current, longest, last
+
+
+def rebuild(user_ids=None, batch_size=500):
+    """
+    Recompute UserStreak rows for `user_ids` (every user when None) from their
+    focus sessions, hot and archived. Distinct (user, local day) pairs are
+    streamed in order and written back in upsert batches; users without focus
+    sessions are reset to 0.
+    Returns the number of users with a streak row written.
+    """
+    sessions = focus_sessions(user_ids)
+    span = sessions.aggregate(first=Min("start_time"), last=Max("start_time"))
+    archived = FocusRollup.objects.all()
+    if user_ids is not None:
+        archived = archived.filter(user_id__in=user_ids)
+    rows = 0
+
+    with transaction.atomic():
+        reset = UserStreak.objects.all()
+        if user_ids is not None:
+            reset = reset.filter(user_id__in=user_ids)
+        reset.update(current_streak=0, longest_streak=0, last_focus_date=None, updated_at=timezone.now())
+
+        hot = []
+        if span["first"] is not None:
+            first, last = timezone.localdate(span["first"]), timezone.localdate(span["last"])
+            hot = (
+                sessions
+                .annotate(day=local_date("start_time", first, last))
+                .values_list("user_id", "day")
+                .distinct()
+                .order_by("user_id", "day")
+                .iterator(chunk_size=batch_size * 50)
+            )
+        # Days rolled up by main.archive, merged in (user, day) order
+        pairs = heapq.merge(
+            hot,
+            archived.order_by("user_id", "date").values_list("user_id", "date").iterator(chunk_size=batch_size * 50),
+        )
+
+        batch = []
+        for user_id, group in itertools.groupby(pairs, key=lambda pair: pair[0]):
+            current, longest, last_day = summarize(day for _, day in group)
+            batch.append(UserStreak(
+                user_id=user_id,
+                current_streak=current,
+                longest_streak=longest,
+                last_focus_date=last_day,
+            ))
+            if len(batch) >= batch_size:
+                rows += _upsert(batch)
+                batch = []
+        rows += _upsert(batch)
+
+    return rows
+
+
+def _upsert(streaks):
+    UserStreak.objects.bulk_create(
+        streaks,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["current_streak", "longest_streak", "last_focus_date", "updated_at"],
+    )
+    return len(streaks)
@@ -0,0 +1,147 @@
+"""
+Nested subtasks.
+
+A subtask may have a parent subtask of the same task, to any depth up to
+MAX_SUBTASK_DEPTH. SubTask.path is a materialized path: the ancestors' ids,
+root first, each zero-padded and followed by "/" (a top-level subtask has
+""). This gives three things:
+
+- a whole subtree loads with one query, task_id plus a path prefix;
+- a subtask's ancestors come straight out of its path, without a read;
+- sorting on path + own id puts every subtask right after its parent.
+
+Each subtask also stores the size of its subtree (descendants) and how much
+of it is done (descendants_completed), so a branch's progress is read off one
+row. add(), toggle() and delete() change those counters on every ancestor
+with one UPDATE ... WHERE id IN (ancestors), the same few statements at any
+depth. move() does the same for the old and new ancestors, then rewrites the
+moved paths with one UPDATE. The task's own progress still counts every
+subtask of the task, as it did before nesting.
+
+Every write is atomic and bumps the task's version, so the cached card
+(main.fragments) is rendered again.
+"""
+
+from django.db import transaction
+from django.db.models import F, Max, Q, Value
+from django.db.models.functions import Concat, Length, Substr
+
+from .models import MAX_SUBTASK_DEPTH, PATH_ID_WIDTH, SubTask, Task
+
+
+class InvalidMove(ValueError):
+    pass
+
+
+def subtree(subtask):
+    """The subtask's descendants, in one query."""
+    return SubTask.objects.filter(task_id=subtask.task_id, path__startswith=subtask.subtree_path)
+
+
+def _adjust(ids, descendants=0, completed=0):
+    """Add to the rolled-up counters of the subtasks in `ids` (one UPDATE)."""
+    if not ids or not (descendants or completed):
+        return
+    SubTask.objects.filter(id__in=ids).update(
+        descendants=F("descendants") + descendants,
+        descendants_completed=F("descendants_completed") + completed,
+    )
+
+
+def ancestors_progress(subtask):
+    """[{"id", "completed", "total", "percent"}] for every ancestor, root first."""
+    ids = subtask.ancestor_ids()
+    rows = {s.id: s for s in SubTask.objects.filter(id__in=ids).only("id", "descendants", "descendants_completed")}
+    return [{"id": i, **rows[i].branch_progress_json()} for i in ids if i in rows]
+
+
+def add(task, title, parent=None):
+    """Create a subtask of `task`, under `parent` (a subtask of the same task) if given."""
+    if parent is None:
+        return SubTask.objects.create(task=task, title=title)
+    if parent.task_id != task.id:
+        raise InvalidMove("The parent belongs to another task")
+    if parent.depth + 1 >= MAX_SUBTASK_DEPTH:
+        raise InvalidMove(f"Subtasks nest at most {MAX_SUBTASK_DEPTH} levels deep")
+
+    with transaction.atomic():
+        subtask = SubTask.objects.create(task=task, title=title, parent=parent, path=parent.subtree_path)
+        _adjust(subtask.ancestor_ids(), descendants=1)
+    return subtask
+
+
+def toggle(subtask_id, user, completed=None):
+    """
+    Set the completed flag of one of `user`'s subtasks (flip it when
+    `completed` is None) and roll it up; returns the subtask.
+    """
+    with transaction.atomic():
+        subtask = SubTask.objects.select_for_update().select_related("task").get(id=subtask_id, task__user=user)
+        completed = not subtask.completed if completed is None else completed
+        if completed != subtask.completed:
+            subtask.completed = completed
+            subtask.save(update_fields=["completed"])
+            _adjust(subtask.ancestor_ids(), completed=1 if completed else -1)
+    return subtask
+
+
+def delete(subtask_id, user):
+    """Delete one of `user`'s subtasks with its whole subtree; returns the deleted subtask."""
+    with transaction.atomic():
+        subtask = SubTask.objects.select_for_update().select_related("task").get(id=subtask_id, task__user=user)
+        removed = 1 + subtask.descendants
+        removed_completed = int(subtask.completed) + subtask.descendants_completed
+        SubTask.objects.filter(Q(id=subtask.id) | Q(task_id=subtask.task_id, path__startswith=subtask.subtree_path)).delete()
+        _adjust(subtask.ancestor_ids(), descendants=-removed, completed=-removed_completed)
+        Task.bump_version(subtask.task_id)
+    return subtask
+
+
+def move(subtask, parent):
+    """
+    Move a subtask and its subtree under `parent`, or to the top level when
+    parent is None. Changes the old and new ancestors' counters and the
+    subtree's paths: a constant number of UPDATEs touching O(depth + subtree) rows.
+    """
+    with transaction.atomic():
+        # The rows as they are now; the caller's copies may be stale
+        subtask = SubTask.objects.select_for_update().get(id=subtask.id)
+        if parent is not None:
+            parent = SubTask.objects.select_for_update().get(id=parent.id)
+            if parent.task_id != subtask.task_id:
+                raise InvalidMove("Subtasks can only move within their task")
+            if parent.id == subtask.id or parent.path.startswith(subtask.subtree_path):
+                raise InvalidMove("A subtask can't move under itself")
+        if subtask.parent_id == (parent.id if parent else None):
+            return subtask
+
+        new_path = parent.subtree_path if parent else ""
+        height = 1
+        if subtask.descendants:
+            longest = subtree(subtask).aggregate(longest=Max(Length("path")))["longest"]
+            height = (longest - len(subtask.path)) // (PATH_ID_WIDTH + 1)
+        if len(new_path) // (PATH_ID_WIDTH + 1) + height > MAX_SUBTASK_DEPTH:
+            raise InvalidMove(f"Subtasks nest at most {MAX_SUBTASK_DEPTH} levels deep")
+
+        size = 1 + subtask.descendants
+        done = int(subtask.completed) + subtask.descendants_completed
+        _adjust(subtask.ancestor_ids(), descendants=-size, completed=-done)
+        _adjust(parent.ancestor_ids() + [parent.id] if parent else [], descendants=size, completed=done)
+
+        # Swap the old ancestor prefix for the new one on the whole subtree
+        subtree(subtask).update(path=Concat(Value(new_path), Substr("path", len(subtask.path) + 1)))
+        subtask.parent = parent
+        subtask.path = new_path
+        subtask.save(update_fields=["parent", "path"])
+    return subtask
+
+
+def as_json(subtask):
+    return {
+        "id": subtask.id,
+        "title": subtask.title,
+        "completed": subtask.completed,
+        "parent_id": subtask.parent_id,
+        "depth": subtask.depth,
+        "progress": subtask.branch_progress_json(),
+    }
@@ -0,0 +1,328 @@
+/* HabitCanvas service worker. Rendered by main.views.service_worker; see
+   main/offline.py for what is cached and which writes are queued. */
+const CONFIG = {{ config|safe }};
+
+const SHELL_CACHE = `habitcanvas-shell-${CONFIG.version}`;
+const DATA = CONFIG.data.map(source => new RegExp(source));
+const WRITES = CONFIG.writes.map(source => new RegExp(source));
+const SYNC_TAG = "habitcanvas-replay";
+// A write the server keeps failing on (5xx) is dropped after this many
+// batches, and the page is told so
+const MAX_ATTEMPTS = 5;
+
+/* ----------------------
+   INDEXEDDB
+   responses: cached JSON reads, by URL
+   queue: writes made offline, in order
+---------------------- */
+let dbPromise = null;
+
+function openDB(){
+    if (!dbPromise){
+        dbPromise = new Promise((resolve, reject)=>{
+            const req = indexedDB.open("habitcanvas-offline", 1);
+            req.onupgradeneeded = ()=>{
+                req.result.createObjectStore("responses", { keyPath: "url" });
+                req.result.createObjectStore("queue", { keyPath: "id", autoIncrement: true });
+            };
+            req.onsuccess = ()=> resolve(req.result);
+            req.onerror = ()=> { dbPromise = null; reject(req.error); };
+        });
+    }
+    return dbPromise;
+}
+
+/* Run fn(store) in a transaction; resolves with the value of the request fn returns */
+function withStore(name, mode, fn){
+    return openDB().then(db => new Promise((resolve, reject)=>{
+        const tx = db.transaction(name, mode);
+        const req = fn(tx.objectStore(name));
+        tx.oncomplete = ()=> resolve(req ? req.result : undefined);
+        tx.onerror = ()=> reject(tx.error);
+    }));
+}
+
+function queueLength(){
+    return withStore("queue", "readonly", store => store.count());
+}
+
+/* Cached reads may miss a write made since: fetch them again before trusting them */
+function markStale(){
+    return withStore("responses", "readwrite", store =>{
+        store.openCursor().onsuccess = e =>{
+            const cursor = e.target.result;
+            if (!cursor) return;
+            cursor.update({ ...cursor.value, stale: true });
+            cursor.continue();
+        };
+    });
+}
+
+function clearAll(){
+    return Promise.all([
+        caches.keys().then(keys => Promise.all(
+            keys.filter(key => key.startsWith("habitcanvas-")).map(key => caches.delete(key))
+        )),
+        withStore("responses", "readwrite", store => store.clear()),
+        withStore("queue", "readwrite", store => store.clear()),
+    ]);
+}
+
+function notify(message){
+    return self.clients.matchAll({ type: "window" }).then(clients =>
+        clients.forEach(client => client.postMessage(message))
+    );
+}
+
+/* ----------------------
+   LIFECYCLE
+---------------------- */
+self.addEventListener("install", event=>{
+    // One page that fails (e.g. signed out) shouldn't keep the rest out of the cache
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+        .then(cache => Promise.all(CONFIG.shell.map(url => cache.add(url).catch(()=>{}))))
+        .then(()=> self.skipWaiting())
+    );
+});
+
+self.addEventListener("activate", event=>{
+    event.waitUntil(
+        caches.keys()
+        .then(keys => Promise.all(
+            keys.filter(key => key.startsWith("habitcanvas-shell-") && key !== SHELL_CACHE)
+                .map(key => caches.delete(key))
+        ))
+        .then(()=> self.clients.claim())
+    );
+});
+
+/* ----------------------
+   FETCH
+---------------------- */
+self.addEventListener("fetch", event=>{
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    // Another account may sign in next: send what's queued, then forget everything
+    if (request.mode === "navigate" && CONFIG.clear_on.includes(url.pathname)){
+        event.respondWith(replay().catch(()=>{}).then(clearAll).catch(()=>{}).then(()=> fetch(request)));
+        return;
+    }
+
+    if (request.method === "GET"){
+        if (url.pathname.startsWith(CONFIG.static_url)){
+            event.respondWith(cacheFirst(request));
+        } else if (request.mode === "navigate" && CONFIG.shell.includes(url.pathname)){
+            event.respondWith(networkFirst(request));
+        } else if (DATA.some(pattern => pattern.test(url.pathname))){
+            event.respondWith(cachedRead(event));
+        }
+        return;
+    }
+
+    if (WRITES.some(pattern => pattern.test(url.pathname))){
+        event.respondWith(write(event));
+    }
+});
+
+/* Static bundles have hashed names, so a cached copy is never out of date */
+function cacheFirst(request){
+    return caches.match(request).then(hit => hit || fetch(request).then(response =>{
+        if (response.ok){
+            const copy = response.clone();
+            caches.open(SHELL_CACHE).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }));
+}
+
+/* Pages: the latest from the server, or the last one seen while offline */
+function networkFirst(request){
+    return fetch(request).then(response =>{
+        if (response.ok && !response.redirected){
+            const copy = response.clone();
+            caches.open(SHELL_CACHE).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }).catch(()=> caches.match(request, { ignoreSearch: true }).then(hit =>
+        hit || new Response("You're offline and this page hasn't been saved yet.", {
+            status: 503, headers: { "Content-Type": "text/plain" },
+        })
+    ));
+}
+
+function cachedResponse(entry){
+    return new Response(entry.body, {
+        headers: { "Content-Type": entry.type, "X-HabitCanvas-Offline": "cache" },
+    });
+}
+
+/* JSON reads: stale-while-revalidate from IndexedDB, network first after a write */
+async function cachedRead(event){
+    const request = event.request;
+    const entry = await withStore("responses", "readonly", store => store.get(request.url)).catch(()=> undefined);
+
+    const network = fetch(request).then(async response =>{
+        const type = response.headers.get("Content-Type") || "";
+        if (response.ok && !response.redirected && type.startsWith("application/json")){
+            const body = await response.clone().text();
+            await withStore("responses", "readwrite", store =>
+                store.put({ url: request.url, body, type, stale: false, saved: Date.now() })
+            );
+        }
+        return response;
+    });
+
+    if (entry && !entry.stale){
+        event.waitUntil(network.catch(()=>{}));
+        return cachedResponse(entry);
+    }
+    try {
+        return await network;
+    } catch (err) {
+        if (entry) return cachedResponse(entry);
+        return Response.json({ success: false, error: "Offline" }, { status: 503 });
+    }
+}
+
+/* ----------------------
+   WRITE QUEUE
+---------------------- */
+async function serialize(request){
+    const body = await request.clone().text();
+    const type = request.headers.get("Content-Type") || "";
+    let csrf = request.headers.get("X-CSRFToken");
+    if (!csrf && type.startsWith("application/x-www-form-urlencoded")){
+        // A plain form post (adding a task) carries its token in the body
+        csrf = new URLSearchParams(body).get("csrfmiddlewaretoken");
+    }
+    const url = new URL(request.url);
+    return {
+        // /sync/ runs a key once, however often its batch is sent
+        key: self.crypto.randomUUID(),
+        method: request.method,
+        url: url.pathname + url.search,
+        body,
+        content_type: type,
+        csrf,
+        attempts: 0,
+        queued_at: Date.now(),
+    };
+}
+
+/* Online with an empty queue, a write goes straight through. Otherwise it
+   joins the queue, so writes always reach the server in the order they were made. */
+async function write(event){
+    const request = event.request;
+    const mutation = await serialize(request);
+
+    if (await queueLength() === 0){
+        try {
+            const response = await fetch(request);
+            event.waitUntil(markStale());
+            return response;
+        } catch (err) {
+            // Offline: queue it below
+        }
+    }
+
+    await withStore("queue", "readwrite", store => store.add(mutation));
+    await markStale();
+    event.waitUntil(
+        queueLength().then(pending => notify({ type: "queue", pending }))
+        .then(()=> self.registration.sync ? self.registration.sync.register(SYNC_TAG) : replay())
+        .catch(()=>{})
+    );
+
+    if (request.mode === "navigate") return Response.redirect(CONFIG.shell[0], 303);
+    return Response.json({ success: true, status: "success", queued: true }, { status: 202 });
+}
+
+let replaying = null;
+
+/* Send the queue to /sync/ in batches, oldest first; one sync at a time */
+function replay(){
+    if (!replaying){
+        replaying = sendQueue().finally(()=> { replaying = null; });
+    }
+    return replaying;
+}
+
+async function sendQueue(){
+    let applied = 0;
+    const dropped = [];
+    for (;;){
+        const batch = (await withStore("queue", "readonly", store => store.getAll())).slice(0, CONFIG.max_batch);
+        if (!batch.length) break;
+
+        const csrf = batch.map(m => m.csrf).filter(Boolean).pop() || "";
+        let data;
+        try {
+            const response = await fetch(CONFIG.sync_url, {
+                method: "POST",
+                credentials: "same-origin",
+                headers: {
+                    "Content-Type": "application/json",
+                    "X-CSRFToken": csrf,
+                    "X-Requested-With": "XMLHttpRequest",
+                },
+                body: JSON.stringify({
+                    mutations: batch.map(m => ({
+                        id: m.id, key: m.key, method: m.method, url: m.url, body: m.body, content_type: m.content_type,
+                    })),
+                }),
+            });
+            // Signed out (redirected to the login page) or a server error: try again later
+            if (!response.ok || response.redirected) break;
+            data = await response.json();
+        } catch (err) {
+            break;
+        }
+
+        /* The server stops at the first 5xx and leaves the rest (status null)
+           untried, so they stay queued behind it and keep their order */
+        const byId = new Map(batch.map(m => [m.id, m]));
+        let retry = false;
+        await withStore("queue", "readwrite", store =>{
+            for (const result of data.results){
+                const mutation = byId.get(result.id);
+                if (!mutation || result.status === null) break;
+                if (result.status < 500){
+                    store.delete(mutation.id);
+                    applied++;
+                    continue;
+                }
+                if (mutation.attempts + 1 >= MAX_ATTEMPTS){
+                    store.delete(mutation.id);
+                    dropped.push({ method: mutation.method, url: mutation.url, status: result.status });
+                } else {
+                    store.put({ ...mutation, attempts: mutation.attempts + 1 });
+                    retry = true;
+                }
+                break;
+            }
+        });
+        if (retry) break;
+    }
+
+    if (applied || dropped.length) await markStale();
+    const pending = await queueLength();
+    if (dropped.length) await notify({ type: "dropped", writes: dropped, pending });
+    await notify({ type: "synced", applied, pending });
+    return pending;
+}
+
+self.addEventListener("sync", event=>{
+    if (event.tag === SYNC_TAG) event.waitUntil(replay());
+});
+
+self.addEventListener("message", event=>{
+    const type = event.data && event.data.type;
+    if (type === "replay"){
+        event.waitUntil(replay());
+    } else if (type === "status"){
+        event.waitUntil(queueLength().then(pending => notify({ type: "queue", pending })));
+    }
+});
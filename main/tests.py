@@ -1,3 +1,1835 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import smtplib
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, archive, calendars, events, jobs, metrics, offline, ranking, streaks, subtasks, transfer
+from . import mail as outbox
+from .fragments import task_card_key
+from .models import (
+    Task, SubTask, CalendarEvent, CalendarMembership, Habit, TimerSession, UserStreak, ArchivedTask, ArchivedSubTask, FocusRollup,
+    RepairRun, Job, LoginAttempt, DataVersion, ReplayedWrite,
+    OutboundEmail,
+)
+from .middleware import ProfilingMiddleware
+from .replicas import PIN_COOKIE, replica_reads
+from .repairs import REPAIRS, run
+from .seed import create_users, seed_tasks, seed_events, seed_sessions, seed_habits
+from .streaks import record_focus_day
+
+
+XHR = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+class QueryCountTests(TestCase):
+    """
+    Every view must issue the same number of queries for a small and a large
+    account. A difference means an O(n) query pattern (N+1) slipped in.
+    """
+
+    SMALL = 10
+    LARGE = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = cls.seed_account("small", cls.SMALL)
+        cls.large = cls.seed_account("large", cls.LARGE)
+
+    @classmethod
+    def seed_account(cls, prefix, size):
+        user = create_users(1, prefix=prefix)[0]
+        seed_tasks(user, size, subtasks_per_task=3)
+        seed_events(user, series=max(1, size // 100), instances_per_series=max(1, size // 10),
+                    single_events=size)
+        seed_sessions(user, years=size / 500, sessions_per_day=3)
+        seed_habits(user, 3, years=size / 500)
+        return user
+
+    # ---------- helpers ----------
+
+    def first_task(self, user):
+        return Task.objects.filter(user=user).first()
+
+    def first_subtask(self, user):
+        return SubTask.objects.filter(task__user=user).first()
+
+    def first_series(self, user):
+        return CalendarEvent.objects.filter(user=user, is_recurring=True).first()
+
+    def count_queries(self, user, method, path, **kwargs):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(path, **kwargs)
+        self.assertLess(response.status_code, 400, f"{method.upper()} {path} returned {response.status_code}")
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, budget, method, path_for, data_for=None, **kwargs):
+        """`path_for(user)` builds the URL, `data_for(user)` the body if given; kwargs go to the test client."""
+        counts = []
+        for user in (self.small, self.large):
+            if data_for:
+                kwargs["data"] = data_for(user)
+            counts.append(self.count_queries(user, method, path_for(user), **kwargs))
+        small, large = counts
+        self.assertEqual(
+            small, large,
+            f"Query count grows with data size: {small} queries at {self.SMALL} tasks, "
+            f"{large} at {self.LARGE} tasks",
+        )
+        self.assertLessEqual(large, budget, f"{large} queries exceeds the budget of {budget}")
+
+    # ---------- pages ----------
+
+    # The test profile's DummyCache always misses, so the dashboard pays for
+    # computing task analytics (4 queries); warm, that drops to 1
+
+    def test_dashboard(self):
+        self.assertConstantQueries(8, "get", lambda u: reverse("dashboard"))
+
+    def test_dashboard_filtered(self):
+        self.assertConstantQueries(
+            8, "get", lambda u: reverse("dashboard"),
+            data={"category": "Work", "difficulty": "Easy", "sort": "priority"},
+        )
+
+    # ---------- calendar / timer JSON ----------
+
+    # Memberships, then one query for personal and shared events and one for tasks
+    def test_get_events(self):
+        today = timezone.localdate()
+        self.assertConstantQueries(
+            5, "get", lambda u: reverse("get_events"), data={"year": today.year, "month": today.month},
+        )
+
+    # Session and user, then the streak, all-time and archived totals, the last 7 days
+    # grouped by local date (one query, not one per day) and the month
+    def test_get_timer_stats(self):
+        self.assertConstantQueries(7, "get", lambda u: reverse("get_timer_stats"))
+
+    def test_save_session(self):
+        now = timezone.now()
+        body = json.dumps({
+            "startTime": (now - timedelta(minutes=25)).isoformat(),
+            "endTime": now.isoformat(),
+            "duration": 25,
+            "mode": "focus",
+        })
+        self.assertConstantQueries(
+            5, "post", lambda u: reverse("save_session"), data=body, content_type="application/json",
+        )
+
+    def test_search(self):
+        self.assertConstantQueries(3, "get", lambda u: reverse("search"), data={"q": "st"})
+
+    def test_get_habits(self):
+        self.assertConstantQueries(3, "get", lambda u: reverse("get_habits"))
+
+    def test_check_habit(self):
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("check_habit", args=[u.habits.first().id]),
+            data="{}", content_type="application/json",
+        )
+
+    def test_stats_heatmap(self):
+        # Session and user, the data version for the ETag, then the five series
+        self.assertConstantQueries(8, "get", lambda u: reverse("stats_heatmap"))
+
+    def test_task_analytics(self):
+        self.assertConstantQueries(6, "get", lambda u: reverse("task_analytics"))
+
+    # ---------- subtasks ----------
+
+    def test_get_subtasks(self):
+        self.assertConstantQueries(
+            4, "get", lambda u: reverse("get_subtasks", args=[self.first_task(u).id]), **XHR,
+        )
+
+    def test_add_subtask(self):
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("add_subtask", args=[self.first_task(u).id]),
+            data={"title": "New step"}, **XHR,
+        )
+
+    # Toggle and delete include the savepoint that makes the write and its
+    # roll-up to the ancestors (main.subtasks) atomic
+
+    def test_toggle_subtask(self):
+        self.assertConstantQueries(
+            8, "post", lambda u: reverse("toggle_subtask", args=[self.first_subtask(u).id]), **XHR,
+        )
+
+    def test_delete_subtask(self):
+        self.assertConstantQueries(
+            8, "post", lambda u: reverse("delete_subtask", args=[self.first_subtask(u).id]), **XHR,
+        )
+
+    # ---------- task CRUD + toggles ----------
+
+    # The test profile runs jobs inline (JOBS_EAGER), so these include creating
+    # the linked calendar event; queued, add_task and edit_task each write one Job row instead.
+    # add_task also reads the smallest rank (one indexed MIN) to put the task on top
+
+    def test_add_task(self):
+        self.assertConstantQueries(
+            13, "post", lambda u: reverse("add_task"),
+            data={
+                "title": "New task", "category": "Work", "difficulty": "Easy", "priority": 1,
+                "due_date": timezone.localdate().isoformat(), "add_to_calendar": "1",
+            },
+            **XHR,
+        )
+
+    def test_edit_task(self):
+        self.assertConstantQueries(
+            13, "post", lambda u: reverse("edit_task", args=[self.first_task(u).id]),
+            data={
+                "title": "Renamed", "category": "School", "difficulty": "Hard", "priority": 2,
+                "due_date": timezone.localdate().isoformat(), "add_to_calendar": "1",
+            },
+            **XHR,
+        )
+
+    def test_delete_task(self):
+        self.assertConstantQueries(
+            5, "post", lambda u: reverse("delete_task", args=[self.first_task(u).id]), **XHR,
+        )
+
+    def test_toggle_complete(self):
+        self.assertConstantQueries(
+            4, "post", lambda u: reverse("toggle_complete", args=[self.first_task(u).id]), **XHR,
+        )
+
+    def test_toggle_favorite(self):
+        self.assertConstantQueries(
+            4, "post", lambda u: reverse("toggle_favorite", args=[self.first_task(u).id]), **XHR,
+        )
+
+    # Session and user, then a savepoint, lock the three tasks, write one rank, release
+    def test_move_task(self):
+        def neighbours(user):
+            above, below = Task.objects.filter(user=user).values_list("id", flat=True)[1:3]
+            return {"above": above, "below": below}
+
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("move_task", args=[self.first_task(u).id]), neighbours, **XHR,
+        )
+
+    def bulk_body(self, user, action, **extra):
+        ids = list(Task.objects.filter(user=user).values_list("id", flat=True)[:self.SMALL])
+        return json.dumps({"action": action, "ids": ids, **extra})
+
+    def test_bulk_complete(self):
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("bulk_tasks"),
+            data_for=lambda u: self.bulk_body(u, "complete"), content_type="application/json",
+        )
+
+    def test_bulk_recategorize(self):
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("bulk_tasks"),
+            data_for=lambda u: self.bulk_body(u, "recategorize", value="Work"), content_type="application/json",
+        )
+
+    def test_bulk_delete(self):
+        self.assertConstantQueries(
+            8, "post", lambda u: reverse("bulk_tasks"),
+            data_for=lambda u: self.bulk_body(u, "delete"), content_type="application/json",
+        )
+
+    # ---------- calendar CRUD ----------
+
+    def event_body(self, **extra):
+        return json.dumps({
+            "title": "Standup", "description": "", "event_date": timezone.localdate().isoformat(),
+            "start_time": "09:00", "end_time": "09:15", "category": "Meeting", **extra,
+        })
+
+    def test_add_event(self):
+        self.assertConstantQueries(
+            4, "post", lambda u: reverse("add_event"),
+            data=self.event_body(), content_type="application/json",
+        )
+
+    def test_add_recurring_event_is_constant_in_series_length(self):
+        today = timezone.localdate()
+        counts = []
+        for weeks in (4, 52):
+            body = self.event_body(
+                is_recurring=True, recurrence_pattern="weekly",
+                recurrence_end_date=(today + timedelta(weeks=weeks)).isoformat(),
+            )
+            counts.append(self.count_queries(
+                self.large, "post", reverse("add_event"), data=body, content_type="application/json",
+            ))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_edit_event_series(self):
+        self.assertConstantQueries(
+            6, "post", lambda u: reverse("edit_event", args=[self.first_series(u).id]),
+            data=self.event_body(category="Work"), content_type="application/json",
+        )
+
+    def test_edit_event_instance(self):
+        self.assertConstantQueries(
+            8, "post",
+            lambda u: reverse("edit_event", args=[self.first_series(u).recurring_instances.first().id]),
+            data=self.event_body(), content_type="application/json",
+        )
+
+    def test_reschedule_event(self):
+        self.assertConstantQueries(
+            4, "post", lambda u: reverse("reschedule_event", args=[self.first_series(u).id]),
+            data=json.dumps({"new_date": timezone.localdate().isoformat()}), content_type="application/json",
+        )
+
+    def test_delete_event_series(self):
+        self.assertConstantQueries(
+            10, "post", lambda u: reverse("delete_event", args=[self.first_series(u).id]),
+        )
+
+    # Session and user, then each replayed write costs what it does on its own
+    # (the toggles' 2 each), without another session or user lookup
+    def test_sync_mutations(self):
+        def batch(user):
+            task = self.first_task(user)
+            return json.dumps({"mutations": [
+                {"id": 1, "key": "a", "method": "POST", "url": reverse("toggle_complete", args=[task.id])},
+                {"id": 2, "key": "b", "method": "POST", "url": reverse("toggle_favorite", args=[task.id])},
+            ]})
+
+        # Session and user, pruning old results and looking up the batch's keys,
+        # then per write: the task, its UPDATE and the stored result, between
+        # the savepoint and release of its transaction
+        self.assertConstantQueries(
+            14, "post", lambda u: reverse("sync_mutations"), batch, content_type="application/json",
+        )
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TaskCardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="cards")[0]
+        seed_tasks(cls.user, 20, subtasks_per_task=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.task = Task.objects.filter(user=self.user).first()
+
+    def test_warm_dashboard_skips_rendering(self):
+        self.client.get(reverse("dashboard"))
+        self.assertIsNotNone(cache.get(task_card_key(self.task)))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("dashboard"))
+        self.assertNotIn("main_subtask", " ".join(q["sql"] for q in ctx.captured_queries))
+        self.assertContains(response, f'data-id="{self.task.id}"')
+
+    def test_task_write_bumps_version(self):
+        self.client.get(reverse("dashboard"))
+        was_completed = self.task.completed
+        self.client.post(reverse("toggle_complete", args=[self.task.id]), **XHR)
+        self.task.refresh_from_db()
+        self.assertIsNone(cache.get(task_card_key(self.task)))
+
+        self.client.get(reverse("dashboard"))
+        card = cache.get(task_card_key(self.task))
+        self.assertEqual("task-card completed" in card, not was_completed)
+
+    def test_subtask_write_bumps_version(self):
+        self.client.get(reverse("dashboard"))
+        version = self.task.version
+        self.client.post(reverse("add_subtask", args=[self.task.id]), data={"title": "Fresh step"}, **XHR)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.version, version + 1)
+
+        response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, "Fresh step")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TaskAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="analytics")[0]
+        today = timezone.localdate()
+
+        def task(category, difficulty, completed=False, due=None):
+            return Task.objects.create(
+                user=cls.user, title=f"{category} {difficulty}", category=category,
+                difficulty=difficulty, completed=completed, due_date=due,
+            )
+
+        task("Work", "Easy", completed=True)
+        task("Work", "Easy", due=today - timedelta(days=1))
+        task("Work", "Hard", due=today)
+        task("School", "Easy", completed=True)
+        cls.task = task("School", "Medium", due=today - timedelta(days=3))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse("task_analytics"), params).json()
+
+    def test_rates_overdue_and_throughput(self):
+        data = self.get()
+        self.assertEqual(data["totals"]["total"], 5)
+        self.assertEqual(data["totals"]["overdue"], 2)
+        self.assertEqual(data["totals"]["due_today"], 1)
+        self.assertEqual(data["by_category"]["Work"]["completion_rate"], round(1 / 3, 3))
+        self.assertEqual(data["by_difficulty"]["Easy"]["completed"], 2)
+        self.assertEqual(data["by_category"]["Personal"]["total"], 0)
+        self.assertEqual(len(data["throughput"]), 12)
+        self.assertEqual(data["throughput"][-1]["completed"], 2)
+
+    def test_facets_follow_the_other_filter(self):
+        facets = self.get(difficulty="Easy")["facets"]
+        self.assertEqual(facets["category"], {"School": 1, "Personal": 0, "Work": 2})
+        self.assertEqual(facets["difficulty"], {"Easy": 3, "Medium": 1, "Hard": 1})
+        self.assertEqual(facets["active"], 1)
+
+    def test_cached_until_a_task_changes(self):
+        self.get()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("dashboard"))
+        self.assertNotIn("GROUP BY", " ".join(q["sql"] for q in ctx.captured_queries))
+
+        self.client.post(reverse("toggle_complete", args=[self.task.id]), **XHR)
+        self.assertEqual(self.get()["totals"]["overdue"], 1)
+
+        self.client.post(
+            reverse("bulk_tasks"), json.dumps({"action": "recategorize", "ids": [self.task.id], "value": "Work"}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.get()["by_category"]["Work"]["total"], 4)
+
+    def test_stamp_is_one_lookup_bumped_by_relevant_writes(self):
+        before = analytics.stamp(self.user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            analytics.stamp(self.user.pk)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("main_task", ctx.captured_queries[0]["sql"])
+
+        # Reordering doesn't change any figure, so the cache survives it
+        Task.objects.filter(pk=self.task.pk).update(rank=5.0)
+        self.assertEqual(analytics.stamp(self.user.pk), before)
+
+        Task.objects.filter(pk=self.task.pk).update(completed=True)
+        after_update = analytics.stamp(self.user.pk)
+        self.assertGreater(after_update, before)
+        Task.objects.filter(pk=self.task.pk).delete()
+        self.assertGreater(analytics.stamp(self.user.pk), after_update)
+        self.assertEqual(DataVersion.of(self.user.pk)[1], 0)
+
+
+class BulkTaskTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = create_users(2, prefix="bulk")
+        seed_tasks(cls.user, 5)
+        seed_tasks(cls.other, 5)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def bulk(self, action, ids, **extra):
+        return self.client.post(
+            reverse("bulk_tasks"), data=json.dumps({"action": action, "ids": ids, **extra}),
+            content_type="application/json",
+        )
+
+    def test_delete_removes_linked_events_and_ignores_other_users(self):
+        task = Task.objects.filter(user=self.user).first()
+        task.linked_calendar_event = CalendarEvent.objects.create(
+            user=self.user, title=task.title, event_date=timezone.localdate(),
+        )
+        task.save()
+        foreign = Task.objects.filter(user=self.other).first()
+
+        response = self.bulk("delete", [task.id, foreign.id])
+
+        self.assertEqual(response.json()["task_ids"], [task.id])
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+        self.assertFalse(CalendarEvent.objects.filter(user=self.user).exists())
+        self.assertTrue(Task.objects.filter(id=foreign.id).exists())
+
+    def test_update_actions(self):
+        ids = list(Task.objects.filter(user=self.user).values_list("id", flat=True))
+
+        self.bulk("complete", ids)
+        self.bulk("recategorize", ids, value="Work")
+        self.bulk("reprioritize", ids, value=2)
+
+        tasks = Task.objects.filter(user=self.user)
+        self.assertEqual({(t.completed, t.category, t.priority) for t in tasks}, {(True, "Work", 2)})
+
+    def test_rejects_bad_input(self):
+        task_id = Task.objects.filter(user=self.user).values_list("id", flat=True).first()
+        self.assertEqual(self.bulk("archive", [task_id]).status_code, 400)
+        self.assertEqual(self.bulk("recategorize", [task_id], value="Chores").status_code, 400)
+        self.assertEqual(self.bulk("complete", []).status_code, 400)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = create_users(2, prefix="search")
+        cls.task = Task.objects.create(user=cls.user, title="Quarterly budget review", category="Work", difficulty="Hard")
+        SubTask.objects.create(task=cls.task, title="Collect receipts")
+        CalendarEvent.objects.create(
+            user=cls.user, title="Dentist", description="Bring budget forms", event_date=timezone.localdate(),
+        )
+        Task.objects.create(user=cls.other, title="Budget for the trip", category="Personal", difficulty="Easy")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, q, **params):
+        return self.client.get(reverse("search"), {"q": q, **params}).json()
+
+    def test_ranks_titles_first_and_stays_per_user(self):
+        results = self.search("budget")["results"]
+        self.assertEqual([(r["type"], r["title"]) for r in results], [
+            ("task", "Quarterly budget review"),
+            ("event", "Dentist"),
+        ])
+
+    def test_prefix_of_last_word(self):
+        self.assertEqual([r["title"] for r in self.search("collect rec")["results"]], ["Collect receipts"])
+        # FTS syntax in the query is treated as plain words
+        self.assertEqual([r["type"] for r in self.search('"receipts*)')["results"]], ["subtask"])
+        self.assertTrue(self.search('rec" OR owner:*')["success"])
+
+    def test_index_follows_writes(self):
+        self.task.title = "Annual plan"
+        self.task.save()
+        self.assertEqual(self.search("budget")["results"][0]["type"], "event")
+        self.assertEqual(self.search("annual")["results"][0]["id"], self.task.id)
+
+        self.task.delete()
+        self.assertEqual(self.search("annual")["results"], [])
+        self.assertEqual(self.search("receipts")["results"], [])
+
+    def test_pagination_and_suggest(self):
+        SubTask.objects.bulk_create(SubTask(task=self.task, title=f"Receipt {i}") for i in range(5))
+
+        first = self.search("receipt", page_size=4)
+        second = self.search("receipt", page_size=4, page=2)
+        self.assertTrue(first["has_more"])
+        self.assertFalse(second["has_more"])
+        self.assertEqual(len(first["results"]) + len(second["results"]), 6)
+
+        suggestions = self.client.get(reverse("search_suggest"), {"q": "quar"}).json()["suggestions"]
+        self.assertEqual(suggestions, ["Quarterly budget review"])
+
+    def test_pages_reach_every_match(self):
+        # More matches than a page list can show: the oldest, best one still ranks first
+        CalendarEvent.objects.bulk_create(
+            CalendarEvent(user=self.user, title=f"Errand {i}", description="Bring the receipts",
+                          event_date=timezone.localdate())
+            for i in range(600)
+        )
+        self.assertEqual(self.search("receipts", page_size=50)["results"][0]["title"], "Collect receipts")
+        last = self.search("receipts", page_size=50, page=13)
+        self.assertEqual((len(last["results"]), last["has_more"]), (1, False))
+        self.assertTrue(self.search("receipts", page_size=50, page=12)["has_more"])
+
+
+class HabitTests(TestCase):
+    START = date(2025, 12, 25)  # a Thursday
+
+    def habit(self, schedule="daily", done=(), **fields):
+        habit = Habit(title="Stretch", schedule=schedule, start_date=self.START, **fields)
+        for day in done:
+            habit.set_done(day)
+        return habit
+
+    def days(self, first, last, skip=()):
+        return [first + timedelta(n) for n in range((last - first).days + 1) if first + timedelta(n) not in skip]
+
+    def test_daily_streaks_and_heatmap(self):
+        habit = self.habit(done=self.days(self.START, date(2026, 1, 10), skip=[date(2025, 12, 29)]))
+        today = date(2026, 1, 10)
+
+        self.assertEqual(habit.current_streak(today), 12)
+        self.assertEqual(habit.current_streak(date(2026, 1, 11)), 12)  # today still open
+        self.assertEqual(habit.current_streak(date(2026, 1, 12)), 0)
+        self.assertEqual(habit.longest_streak(today), 12)
+        self.assertEqual(habit.year_heatmap(2025)[-7:], "1111011")
+        self.assertEqual(habit.year_heatmap(2026)[:11], "11111111110")
+
+    def test_weekdays_skip_weekends(self):
+        weekdays = [d for d in self.days(self.START, date(2026, 1, 9)) if d.weekday() < 5]
+        habit = self.habit("weekdays", done=weekdays)
+
+        self.assertEqual(habit.current_streak(date(2026, 1, 11)), 12)
+        self.assertEqual(habit.completion_rate(14, date(2026, 1, 11)), 100)
+
+    def test_times_per_week(self):
+        done = [date(2025, 12, 29), date(2025, 12, 31), date(2026, 1, 5), date(2026, 1, 7), date(2026, 1, 12)]
+        habit = self.habit("weekly", done=done, times_per_week=2)
+
+        # The week of Jan 12 has one check-in so far; it doesn't break the streak yet
+        self.assertEqual(habit.current_streak(date(2026, 1, 13)), 2)
+        self.assertEqual(habit.current_streak(date(2026, 1, 20)), 0)
+
+    def test_check_in_before_start_moves_start(self):
+        habit = self.habit(done=[self.START])
+        habit.set_done(self.START - timedelta(days=3))
+
+        self.assertEqual(habit.start_date, self.START - timedelta(days=3))
+        self.assertTrue(habit.is_done(self.START))
+        self.assertFalse(habit.is_done(self.START - timedelta(days=1)))
+
+    def test_check_endpoint_toggles_one_row(self):
+        user = create_users(1, prefix="habit")[0]
+        habit = Habit.objects.create(user=user, title="Read", start_date=timezone.localdate() - timedelta(days=5))
+        self.client.force_login(user)
+        url = reverse("check_habit", args=[habit.id])
+
+        first = self.client.post(url, data="{}", content_type="application/json").json()
+        second = self.client.post(url, data="{}", content_type="application/json").json()
+
+        self.assertTrue(first["habit"]["done_today"])
+        self.assertEqual(first["habit"]["current_streak"], 1)
+        self.assertFalse(second["habit"]["done_today"])
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.post(url, data=json.dumps({"date": tomorrow}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        for body in ("[]", '"x"', "1"):
+            self.assertEqual(self.client.post(url, data=body, content_type="application/json").status_code, 400)
+
+    def test_check_rejects_non_bool_done_and_ancient_days(self):
+        user = create_users(1, prefix="habit")[0]
+        habit = Habit.objects.create(user=user, title="Read", start_date=timezone.localdate())
+        self.client.force_login(user)
+        url = reverse("check_habit", args=[habit.id])
+
+        for body in ({"done": "false"}, {"done": 0.0001}, {"done": None}, {"date": "0001-01-01"}, {"date": "1969-12-31"}):
+            with self.subTest(body):
+                response = self.client.post(url, data=json.dumps(body), content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+        habit.refresh_from_db()
+        self.assertEqual((habit.start_date, habit.history), (timezone.localdate(), b""))
+
+    def test_heatmap_rejects_years_out_of_range(self):
+        user = create_users(1, prefix="habit")[0]
+        habit = Habit.objects.create(user=user, title="Read", start_date=timezone.localdate())
+        self.client.force_login(user)
+        url = reverse("habit_heatmap", args=[habit.id])
+
+        for year in (0, 1969, timezone.localdate().year + 1, 10000):
+            with self.subTest(year):
+                self.assertEqual(self.client.get(url, {"year": year}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"year": 1970}).status_code, 200)
+
+
+class StatsHeatmapTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="stats")[0]
+        cls.year = timezone.localdate().year - 1
+        tz = timezone.get_current_timezone()
+
+        def session(local):
+            start = timezone.make_aware(local, tz)
+            TimerSession.objects.create(
+                user=cls.user, start_time=start, end_time=start + timedelta(minutes=25),
+                duration_minutes=25, mode="focus",
+            )
+
+        # 23:50 and 00:10 local fall on different local days but the same UTC day
+        session(datetime(cls.year, 3, 1, 23, 50))
+        session(datetime(cls.year, 3, 2, 0, 10))
+        session(datetime(cls.year, 3, 2, 9, 0))
+        Task.objects.create(
+            user=cls.user, title="Done", category="Work", difficulty="Easy", completed=True,
+            completed_at=timezone.make_aware(datetime(cls.year, 3, 2, 8, 0), tz),
+        )
+        CalendarEvent.objects.create(user=cls.user, title="Exam", event_date=date(cls.year, 3, 2))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, **headers):
+        return self.client.get(reverse("stats_heatmap"), {"year": self.year}, **headers)
+
+    def test_buckets_by_local_day(self):
+        data = self.get().json()
+        march_1 = (date(self.year, 3, 1) - date(self.year, 1, 1)).days
+
+        self.assertEqual(data["days"]["focus_sessions"][march_1:march_1 + 2], [1, 2])
+        self.assertEqual(data["days"]["focus_minutes"][march_1 + 1], 50)
+        self.assertEqual(data["days"]["tasks_completed"][march_1 + 1], 1)
+        self.assertEqual(data["days"]["events"][march_1 + 1], 1)
+        self.assertEqual(data["totals"]["focus_minutes"], 75)
+
+    def test_etag_revalidates_every_year(self):
+        first = self.get()
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+
+        # A 304 comes from the stamp alone, without building the heatmap
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertFalse(any("main_timersession" in q["sql"] for q in ctx.captured_queries))
+
+        # Last year's data still changes, e.g. a session saved late
+        start = timezone.make_aware(datetime(self.year, 6, 1, 9, 0))
+        TimerSession.objects.create(
+            user=self.user, start_time=start, end_time=start + timedelta(minutes=25),
+            duration_minutes=25, mode="focus",
+        )
+        third = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()["totals"]["focus_minutes"], 100)
+
+
+class StreakTests(TestCase):
+
+    def setUp(self):
+        self.user = create_users(1, prefix="streak")[0]
+        self.client.force_login(self.user)
+        self.today = timezone.localdate()
+
+    def save_session(self, start):
+        """POST a 25-minute focus session starting at aware datetime `start`."""
+        return self.client.post(reverse("save_session"), json.dumps({
+            "startTime": start.isoformat(),
+            "endTime": (start + timedelta(minutes=25)).isoformat(),
+            "duration": 25,
+            "mode": "focus",
+        }), content_type="application/json")
+
+    def at(self, day, hour=9, minute=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+    def streak(self):
+        return UserStreak.objects.get(user=self.user)
+
+    def test_counts_local_days(self):
+        # 00:30 in Manila is the previous day in UTC
+        yesterday = self.today - timedelta(days=1)
+        self.save_session(self.at(yesterday, 9))
+        self.save_session(self.at(self.today, 0, 30))
+
+        streak = self.streak()
+        self.assertEqual((streak.current_streak, streak.last_focus_date), (2, self.today))
+
+    def test_timer_stats_group_by_local_day(self):
+        yesterday = self.today - timedelta(days=1)
+        self.save_session(self.at(yesterday, 9))
+        self.save_session(self.at(self.today, 0, 30))
+        self.save_session(self.at(self.today, 15))
+
+        stats = self.client.get(reverse("get_timer_stats")).json()
+        self.assertEqual([d["date"] for d in stats["daily_stats"]][-2:], [yesterday.isoformat(), self.today.isoformat()])
+        self.assertEqual([(d["minutes"], d["sessions"]) for d in stats["daily_stats"]][-3:], [(0, 0), (25, 1), (50, 2)])
+        self.assertEqual(stats["week_total_minutes"], 75)
+
+    def test_same_day_is_a_no_op(self):
+        self.save_session(self.at(self.today, 9))
+        self.save_session(self.at(self.today, 15))
+        self.assertEqual(self.streak().current_streak, 1)
+
+    def test_backfill_joins_runs(self):
+        days = [self.today - timedelta(days=n) for n in (4, 3, 1, 0)]
+        for day in days:
+            self.save_session(self.at(day))
+        self.assertEqual((self.streak().current_streak, self.streak().longest_streak), (2, 2))
+
+        # The session from two days ago arrives late and closes the gap
+        self.save_session(self.at(self.today - timedelta(days=2)))
+        streak = self.streak()
+        self.assertEqual((streak.current_streak, streak.longest_streak, streak.last_focus_date), (5, 5, self.today))
+
+    def test_backfill_behind_a_gap_only_raises_longest(self):
+        for n in (5, 4, 2, 0):
+            self.save_session(self.at(self.today - timedelta(days=n)))
+        self.save_session(self.at(self.today - timedelta(days=3)))
+
+        streak = self.streak()
+        self.assertEqual((streak.current_streak, streak.longest_streak), (1, 4))
+
+    def test_rebuild_matches_incremental(self):
+        seed_sessions(self.user, years=0.3)
+        seeded = self.streak()
+        expected = (seeded.current_streak, seeded.longest_streak, seeded.last_focus_date)
+
+        UserStreak.objects.filter(user=self.user).update(current_streak=99, longest_streak=99)
+        call_command("rebuild_streaks", user=[self.user.username], stdout=io.StringIO())
+        streak = self.streak()
+        self.assertEqual((streak.current_streak, streak.longest_streak, streak.last_focus_date), expected)
+
+        # Replaying the same history session by session, newest first, ends in the same place
+        UserStreak.objects.filter(user=self.user).delete()
+        days = sorted(
+            {timezone.localdate(s) for s in TimerSession.objects.filter(user=self.user, mode="focus").values_list("start_time", flat=True)},
+            reverse=True,
+        )
+        for day in days:
+            record_focus_day(self.user.pk, day)
+        streak = self.streak()
+        self.assertEqual((streak.current_streak, streak.longest_streak, streak.last_focus_date), expected)
+
+    def test_live_streak_lapses(self):
+        UserStreak.objects.create(
+            user=self.user, current_streak=4, longest_streak=4, last_focus_date=self.today - timedelta(days=2),
+        )
+        self.assertEqual(self.client.get(reverse("get_timer_stats")).json()["streak"], 0)
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="archive")[0]
+        seed_tasks(cls.user, 40, subtasks_per_task=2)
+        seed_sessions(cls.user, years=1.5, sessions_per_day=3)
+        # Some tasks finished long ago, so there is something to archive
+        old = timezone.now() - timedelta(days=400)
+        cls.old_ids = list(Task.objects.filter(user=cls.user).order_by("id").values_list("id", flat=True)[:10])
+        Task.objects.filter(id__in=cls.old_ids).update(completed=True, completed_at=old)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def snapshot(self):
+        """Everything the history-wide read paths report."""
+        year = timezone.localdate().year - 1
+        timer = self.client.get(reverse("get_timer_stats")).json()
+        streaks.rebuild([self.user.pk])
+        streak = UserStreak.objects.get(user=self.user)
+        return {
+            "heatmap": self.client.get(reverse("stats_heatmap"), {"year": year}).json()["totals"],
+            "total_sessions": timer["total_sessions"],
+            "average": timer["average_session_minutes"],
+            "streak": (streak.current_streak, streak.longest_streak, streak.last_focus_date),
+            "rates": {k: v["completion_rate"] for k, v in analytics.compute(self.user.pk, timezone.localdate())["by_category"].items()},
+        }
+
+    def archive(self, days=365):
+        before = archive.cutoff(days)
+        return archive.archive_tasks(before, [self.user.pk], batch_size=4), archive.archive_sessions(before, [self.user.pk], batch_size=100)
+
+    def test_round_trip_keeps_rows_and_read_paths(self):
+        before = self.snapshot()
+        task = Task.objects.get(id=self.old_ids[0])
+        subtasks = list(task.subtasks.values_list("id", "title", "created_at"))
+
+        (tasks, subtask_count), sessions = self.archive()
+        self.assertEqual((tasks, subtask_count), (10, 20))
+        self.assertGreater(sessions, 0)
+        self.assertFalse(Task.objects.filter(id__in=self.old_ids).exists())
+        self.assertFalse(TimerSession.objects.filter(user=self.user, start_time__lt=archive.cutoff(365)).exists())
+        self.assertEqual(self.snapshot(), before)
+
+        call_command("restore_archive", user=[self.user.username], stdout=io.StringIO())
+        self.assertEqual(ArchivedTask.objects.count() + FocusRollup.objects.count(), 0)
+        restored = Task.objects.get(id=task.id)
+        self.assertEqual((restored.title, restored.created_at, restored.completed_at), (task.title, task.created_at, task.completed_at))
+        self.assertEqual(list(restored.subtasks.values_list("id", "title", "created_at")), subtasks)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_refuses_recent_cutoff(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_data", days=30, stdout=io.StringIO())
+
+    def test_archive_endpoints(self):
+        self.archive()
+        data = self.client.get(reverse("archived_tasks")).json()
+        self.assertEqual({t["id"] for t in data["tasks"]}, set(self.old_ids))
+        self.assertEqual(len(data["tasks"][0]["subtasks"]), 2)
+
+        response = self.client.post(reverse("restore_archived_task", args=[self.old_ids[0]]))
+        self.assertIn(f'data-id="{self.old_ids[0]}"', response.json()["task_html"])
+        self.assertTrue(Task.objects.filter(id=self.old_ids[0], user=self.user).exists())
+
+        other = create_users(1, prefix="intruder")[0]
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(reverse("restore_archived_task", args=[self.old_ids[1]])).status_code, 404)
+
+
+class RepairTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="repair")[0]
+        cls.events = [
+            CalendarEvent.objects.create(
+                user=cls.user, title=f"Event {n}", event_date=date(2024, 1, 1) + timedelta(days=n),
+                start_time=time(9), end_time=time(10),
+            )
+            for n in range(12)
+        ]
+        # Text a TimeField can't hold, as left behind by old form bugs
+        broken = [e.id for e in cls.events[::3]]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE main_calendarevent SET start_time = 'garbage' WHERE id IN ({', '.join(['%s'] * len(broken))})",
+                broken,
+            )
+        cls.broken = broken
+
+    def run_repair(self, *args, **opts):
+        out = io.StringIO()
+        call_command("repair", "calendar_times", *args, batch_size=5, stdout=out, **opts)
+        return out.getvalue()
+
+    def raw_start(self, event_id):
+        return CalendarEvent.objects.annotate(raw=Cast("start_time", CharField())).get(id=event_id).raw
+
+    def test_dry_run_writes_nothing(self):
+        output = self.run_repair(dry_run=True)
+        self.assertIn("would change 4 of 12", output)
+        self.assertEqual(self.raw_start(self.broken[0]), "garbage")
+        self.assertFalse(RepairRun.objects.exists())
+
+    def test_fixes_in_batches(self):
+        self.assertIn("changed 4 of 12", self.run_repair())
+        event = CalendarEvent.objects.get(id=self.broken[0])
+        self.assertEqual((event.start_time, event.end_time), (None, time(10)))
+        self.assertEqual(CalendarEvent.objects.get(id=self.events[1].id).start_time, time(9))
+        self.assertIsNotNone(RepairRun.objects.get(name="calendar_times").finished_at)
+
+    def test_resumes_after_interruption(self):
+        def crash(checkpoint, rate):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            run(REPAIRS["calendar_times"], batch_size=5, on_batch=crash)
+        checkpoint = RepairRun.objects.get(name="calendar_times")
+        self.assertEqual((checkpoint.scanned, checkpoint.finished_at), (5, None))
+
+        self.assertIn("changed 4 of 12", self.run_repair())
+        self.assertTrue(all(self.raw_start(i) is None for i in self.broken))
+
+    def test_task_completed_at(self):
+        task = Task.objects.create(user=self.user, title="Done", category="Work", difficulty="Easy", completed=True)
+        Task.objects.filter(id=task.id).update(completed_at=None)
+
+        call_command("repair", "task_completed_at", stdout=io.StringIO())
+        fixed = Task.objects.get(id=task.id)
+        self.assertEqual((fixed.completed_at, fixed.version), (task.created_at, task.version + 1))
+
+
+@jobs.job
+def failing_job(message):
+    raise RuntimeError(message)
+
+
+@override_settings(JOBS_EAGER=False)
+class JobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="jobs")[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def run_worker(self):
+        call_command("run_worker", concurrency=1, burst=True, stdout=io.StringIO())
+
+    def test_recurring_event_materialized_by_worker(self):
+        response = self.client.post(reverse("add_event"), json.dumps({
+            "title": "Standup", "event_date": "2025-01-06", "is_recurring": True,
+            "recurrence_pattern": "weekly", "recurrence_end_date": "2025-02-03",
+        }), content_type="application/json")
+        event_id = response.json()["event"]["id"]
+        self.assertEqual(Job.objects.get().name, "main.events.materialize_recurrence")
+        self.assertFalse(CalendarEvent.objects.filter(parent_event_id=event_id).exists())
+
+        self.run_worker()
+        self.assertEqual(CalendarEvent.objects.filter(parent_event_id=event_id).count(), 4)
+        self.assertFalse(Job.objects.exists())
+
+        # A retried job doesn't duplicate the instances
+        events.materialize_recurrence(event_id)
+        self.assertEqual(CalendarEvent.objects.filter(parent_event_id=event_id).count(), 4)
+
+    def test_save_session_and_password_reset_are_queued(self):
+        start = timezone.now() - timedelta(minutes=30)
+        self.client.post(reverse("save_session"), json.dumps({
+            "startTime": start.isoformat(), "endTime": (start + timedelta(minutes=25)).isoformat(),
+            "duration": 25, "mode": "focus",
+        }), content_type="application/json")
+        self.client.post(reverse("password_reset"), {"email": self.user.email})
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.run_worker()
+        self.assertEqual(UserStreak.objects.get(user=self.user).current_streak, 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+
+    def test_failures_back_off_then_fail(self):
+        queued = jobs.enqueue(failing_job, "boom", max_attempts=2)
+
+        with self.assertLogs("main.jobs", "WARNING"):
+            self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.QUEUED, 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", queued.last_error)
+
+        Job.objects.filter(id=queued.id).update(run_at=timezone.now())
+        with self.assertLogs("main.jobs", "ERROR"):
+            self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.FAILED, 2))
+
+    def test_claim_is_exclusive_and_stale_jobs_requeue(self):
+        queued = jobs.enqueue(failing_job, "never run")
+        self.assertEqual(jobs.claim("worker-a").id, queued.id)
+        self.assertIsNone(jobs.claim("worker-b"))
+
+        Job.objects.filter(id=queued.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim("worker-b").locked_by, "worker-b")
+
+
+class RecordingEmailBackend(locmem.EmailBackend):
+    """locmem backend that counts connections and refuses some recipients the way an SMTP server would."""
+    opened = 0
+
+    def open(self):
+        RecordingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith("bounce"):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b"No such user")})
+            if message.to[0].startswith("slow"):
+                raise smtplib.SMTPResponseException(421, b"Too many messages, slow down")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="main.tests.RecordingEmailBackend", EMAIL_BATCH_SIZE=2, JOBS_EAGER=False)
+class MailTests(TestCase):
+
+    def setUp(self):
+        RecordingEmailBackend.opened = 0
+
+    def queue(self, *recipients, **fields):
+        return outbox.queue(*(
+            OutboundEmail(kind="test", to=to, subject=f"Hello {to}", body="Hi", **fields) for to in recipients
+        ))
+
+    def test_batches_share_a_connection(self):
+        self.queue(*(f"user{i}@example.com" for i in range(5)))
+        self.assertEqual(Job.objects.filter(name="main.mail.flush_outbox").count(), 1)
+
+        self.assertEqual(outbox.flush(), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(RecordingEmailBackend.opened, 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+
+    def test_keyed_message_is_queued_once(self):
+        self.assertEqual(self.queue("a@example.com", key="once"), 1)
+        self.assertEqual(self.queue("a@example.com", key="once"), 0)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=2)
+    def test_failed_message_is_retried_then_given_up(self):
+        self.queue("bounce@example.com", "ok@example.com")
+        with self.assertLogs("main.mail", "WARNING"):
+            self.assertEqual(outbox.flush(), (1, 1))
+        bounced = OutboundEmail.objects.get(to="bounce@example.com")
+        self.assertEqual((bounced.status, bounced.attempts), (OutboundEmail.QUEUED, 1))
+        self.assertGreater(bounced.send_after, timezone.now())
+        self.assertIn("SMTPRecipientsRefused", bounced.last_error)
+
+        OutboundEmail.objects.filter(id=bounced.id).update(send_after=timezone.now())
+        with self.assertLogs("main.mail", "ERROR"):
+            outbox.flush()
+        self.assertEqual(OutboundEmail.objects.get(id=bounced.id).status, OutboundEmail.FAILED)
+
+    def test_throttled_flush_stops_and_requeues(self):
+        self.queue("slow@example.com", "later@example.com")
+        with self.assertLogs("main.mail", "WARNING"):
+            self.assertEqual(outbox.flush(), (0, 1))
+        later = OutboundEmail.objects.get(to="later@example.com")
+        self.assertEqual((later.status, later.attempts), (OutboundEmail.QUEUED, 0))
+        self.assertGreater(later.send_after, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_event_reminders(self):
+        user = create_users(1, prefix="remind")[0]
+        now = timezone.localtime().replace(hour=9, minute=0, second=0, microsecond=0)
+        soon = CalendarEvent.objects.create(
+            user=user, title="Dentist", event_date=now.date(), start_time=time(9, 10),
+            reminder_enabled=True, reminder_minutes_before=15,
+        )
+        CalendarEvent.objects.create(
+            user=user, title="Later", event_date=now.date(), start_time=time(10),
+            reminder_enabled=True, reminder_minutes_before=15,
+        )
+        CalendarEvent.objects.create(
+            user=user, title="Quiet", event_date=now.date(), start_time=time(9, 5), reminder_minutes_before=15,
+        )
+
+        self.assertEqual(outbox.queue_reminders(now), 1)
+        self.assertEqual(outbox.queue_reminders(now + timedelta(minutes=1)), 0)
+
+        outbox.flush()
+        self.assertEqual(mail.outbox[0].to, [user.email])
+        self.assertEqual(mail.outbox[0].subject, "Reminder: Dentist at 9:10 AM")
+        self.assertIn(soon.title, mail.outbox[0].body)
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class ReplicaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="replica")[0]
+
+    def read_alias(self, request, write=False):
+        @replica_reads
+        def view(request):
+            if write:
+                router.db_for_write(Task)
+            return router.db_for_read(Task)
+        return view(request)
+
+    def test_reads_in_decorated_views_go_to_replica(self):
+        request = RequestFactory().get("/")
+        self.assertEqual(self.read_alias(request), "replica")
+        self.assertEqual(router.db_for_read(Task), "default")
+        self.assertEqual(router.db_for_write(Task), "default")
+
+    def test_primary_after_a_write(self):
+        self.assertEqual(self.read_alias(RequestFactory().get("/"), write=True), "default")
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica_configured(self):
+        self.assertEqual(self.read_alias(RequestFactory().get("/")), "default")
+
+    def test_write_pins_browser_to_primary(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("add_habit"), {"title": "Read", "schedule": "daily", "times_per_week": 7})
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], 15)
+
+        request = RequestFactory().get("/")
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        self.assertEqual(self.read_alias(request), "default")
+
+        # Pinned, get_habits reads the primary and sees the new habit at once
+        response = self.client.get(reverse("get_habits"))
+        self.assertEqual([h["title"] for h in response.json()["habits"]], ["Read"])
+
+    def queries_by_alias(self, path, data=None):
+        """
+        GET `path` with a "replica" alias that shares the test database's
+        connection (so it sees the test's rows) but records its own queries.
+        Returns the SQL sent to each alias.
+        """
+        primary = connections["default"]
+        primary.ensure_connection()
+        replica = type(primary)(primary.settings_dict, alias="replica")
+        replica.connection = primary.connection
+        connections["replica"] = replica
+        try:
+            with override_settings(REPLICA_DATABASE="replica"), \
+                    CaptureQueriesContext(primary) as on_primary, CaptureQueriesContext(replica) as on_replica:
+                response = self.client.get(path, data)
+        finally:
+            del connections["replica"]
+        self.assertEqual(response.status_code, 200, path)
+        return [q["sql"] for q in on_primary], [q["sql"] for q in on_replica]
+
+    def test_decorated_views_query_only_the_replica(self):
+        seed_tasks(self.user, 3, subtasks_per_task=2)
+        seed_events(self.user, series=1, instances_per_series=3, single_events=2)
+        seed_sessions(self.user, years=1, sessions_per_day=1)
+        seed_habits(self.user, 1)
+        task, habit = Task.objects.filter(user=self.user).first(), Habit.objects.get(user=self.user)
+        self.client.force_login(self.user)
+
+        views = [
+            (reverse("dashboard"), None),
+            (reverse("archived_tasks"), None),
+            (reverse("get_timer_stats"), None),
+            (reverse("get_events"), {"year": timezone.localdate().year, "month": timezone.localdate().month}),
+            (reverse("get_subtasks", args=[task.id]), None),
+            (reverse("get_habits"), None),
+            (reverse("habit_heatmap", args=[habit.id]), None),
+            (reverse("stats_heatmap"), None),
+            (reverse("task_analytics"), None),
+            (reverse("search"), {"q": task.title.split()[0]}),
+            (reverse("search_suggest"), {"q": task.title[:3]}),
+        ]
+        for path, data in views:
+            with self.subTest(path):
+                on_primary, on_replica = self.queries_by_alias(path, data)
+                # Only the session and user lookups, made by middleware before the view runs
+                self.assertEqual(
+                    [sql for sql in on_primary if "django_session" not in sql and "auth_user" not in sql], [],
+                )
+                self.assertTrue(on_replica)
+
+
+class TransferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.source, cls.target = create_users(2, prefix="transfer")
+        seed_events(cls.source, series=2, instances_per_series=3, single_events=2)
+        seed_tasks(cls.source, 6, subtasks_per_task=2)
+        seed_sessions(cls.source, years=1, sessions_per_day=1)
+        seed_habits(cls.source, 2)
+        event = CalendarEvent.objects.filter(user=cls.source, parent_event__isnull=True).first()
+        Task.objects.filter(user=cls.source).update(linked_calendar_event=event)
+        old = Task.objects.filter(user=cls.source).first()
+        Task.objects.filter(id=old.id).update(completed=True, completed_at=timezone.now() - timedelta(days=400))
+        archive.archive_tasks(archive.cutoff(365), [cls.source.pk])
+
+    def export(self, kind):
+        self.client.force_login(self.source)
+        response = self.client.get(reverse("export_account"), {"format": kind})
+        self.assertTrue(response.streaming)
+        return io.BytesIO(b"".join(response.streaming_content))
+
+    def test_round_trip(self):
+        for kind in ("ndjson", "zip"):
+            with self.subTest(kind), transaction.atomic():
+                counts = transfer.import_account(self.target, transfer.read_export(self.export(kind)))
+
+                self.assertEqual(counts["task"], 6)
+                self.assertEqual(counts["subtask"], 12)
+                self.assertEqual(counts["calendar_event"], CalendarEvent.objects.filter(user=self.source).count())
+                # The archived task comes back hot, with its subtasks
+                self.assertEqual(ArchivedSubTask.objects.filter(task__user=self.source).count(), 2)
+                self.assertEqual(SubTask.objects.filter(task__user=self.target).count(), 12)
+
+                tasks = Task.objects.filter(user=self.target)
+                self.assertEqual(set(tasks.values_list("linked_calendar_event__user", flat=True)), {self.target.pk})
+                instances = CalendarEvent.objects.filter(user=self.target, parent_event__isnull=False)
+                self.assertEqual(set(instances.values_list("parent_event__user", flat=True)), {self.target.pk})
+                self.assertEqual(
+                    sorted(bytes(h) for h in Habit.objects.filter(user=self.target).values_list("history", flat=True)),
+                    sorted(bytes(h) for h in Habit.objects.filter(user=self.source).values_list("history", flat=True)),
+                )
+                self.assertEqual(
+                    UserStreak.objects.get(user=self.target).longest_streak,
+                    UserStreak.objects.get(user=self.source).longest_streak,
+                )
+                self.assertEqual(
+                    sorted(tasks.values_list("created_at", flat=True)),
+                    sorted([*Task.objects.filter(user=self.source).values_list("created_at", flat=True),
+                            *ArchivedTask.objects.filter(user=self.source).values_list("created_at", flat=True)]),
+                )
+                transaction.set_rollback(True)
+
+    def test_invalid_record_writes_nothing(self):
+        lines = self.export("ndjson").getvalue().splitlines()
+        first_task = next(i for i, line in enumerate(lines) if line.startswith(b'{"type":"task"'))
+        lines[first_task] = json.dumps({**json.loads(lines[first_task]), "category": "Chores"}).encode()
+
+        with self.assertRaisesMessage(transfer.ImportFailed, "category"):
+            transfer.import_account(self.target, transfer.read_export(io.BytesIO(b"\n".join(lines))))
+        self.assertFalse(CalendarEvent.objects.filter(user=self.target).exists())
+
+    def test_import_command_creates_user(self):
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "export.ndjson")
+            with open(path, "wb") as out:
+                out.write(self.export("ndjson").getvalue())
+            call_command("import_account", path, user="moved@example.com", create=True, stdout=output)
+        self.assertIn("6 task", output.getvalue())
+        self.assertEqual(Task.objects.filter(user__username="moved@example.com").count(), 6)
+
+
+@unittest.skipIf(metrics.prometheus_client is None, "prometheus_client is not installed")
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="metrics")[0]
+
+    def sample(self, name, **labels):
+        return metrics.prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.force_login(self.user)
+        requests = self.sample("habitcanvas_requests_total", view="get_habits", method="GET", status="200")
+        latencies = self.sample("habitcanvas_request_duration_seconds_count", view="get_habits")
+
+        self.client.get(reverse("get_habits"))
+        self.client.get(reverse("get_habits"))
+
+        self.assertEqual(self.sample("habitcanvas_requests_total", view="get_habits", method="GET", status="200"), requests + 2)
+        self.assertEqual(self.sample("habitcanvas_request_duration_seconds_count", view="get_habits"), latencies + 2)
+        self.assertIn('habitcanvas_request_queries_bucket{le="5.0",view="get_habits"}', self.scrape())
+
+    def test_business_counters(self):
+        self.client.force_login(self.user)
+        sessions = self.sample("habitcanvas_timer_sessions_saved_total", mode="short")
+        events_created = self.sample("habitcanvas_calendar_events_created_total")
+
+        self.client.post(reverse("save_session"), json.dumps({
+            "startTime": "2025-01-06T09:00:00+08:00", "endTime": "2025-01-06T09:05:00+08:00", "duration": 5, "mode": "short",
+        }), content_type="application/json")
+        self.client.post(reverse("add_event"), json.dumps({
+            "title": "Standup", "event_date": "2025-01-06",
+        }), content_type="application/json")
+
+        self.assertEqual(self.sample("habitcanvas_timer_sessions_saved_total", mode="short"), sessions + 1)
+        self.assertEqual(self.sample("habitcanvas_calendar_events_created_total"), events_created + 1)
+
+    def test_database_gauges(self):
+        LoginAttempt.objects.create(email="metrics0@gmail.com", success=False)
+        LoginAttempt.objects.create(email="metrics0@gmail.com", success=True)
+        old = LoginAttempt.objects.create(email="metrics0@gmail.com", success=False)
+        LoginAttempt.objects.filter(id=old.id).update(timestamp=timezone.now() - timedelta(hours=1))
+
+        body = self.scrape()
+        self.assertIn("habitcanvas_failed_logins_recent 1.0", body)
+        self.assertIn('habitcanvas_jobs{status="queued"} 0.0', body)
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+
+class SubtaskTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="tree")[0]
+        cls.task = Task.objects.create(user=cls.user, title="Project", category="Work", difficulty="Hard")
+
+    def setUp(self):
+        # plan
+        #   research
+        #     read
+        #     notes
+        #   draft
+        # review
+        self.plan = subtasks.add(self.task, "plan")
+        self.research = subtasks.add(self.task, "research", parent=self.plan)
+        self.read = subtasks.add(self.task, "read", parent=self.research)
+        self.notes = subtasks.add(self.task, "notes", parent=self.research)
+        self.draft = subtasks.add(self.task, "draft", parent=self.plan)
+        self.review = subtasks.add(self.task, "review")
+
+    def counters(self, subtask):
+        subtask.refresh_from_db()
+        return subtask.descendants_completed, subtask.descendants
+
+    def titles(self, rows):
+        return [s.title for s in sorted(rows, key=lambda s: s.subtree_path)]
+
+    def test_paths_and_counters(self):
+        self.assertEqual(self.read.ancestor_ids(), [self.plan.id, self.research.id])
+        self.assertEqual(self.read.depth, 2)
+        self.assertEqual(self.counters(self.plan), (0, 4))
+        self.assertEqual(self.counters(self.research), (0, 2))
+        self.assertEqual(self.titles(self.task.subtasks.all()), ["plan", "research", "read", "notes", "draft", "review"])
+
+    def test_toggle_rolls_up_to_every_ancestor(self):
+        with self.assertNumQueries(6):
+            # savepoint, lock the row, update it, bump the task, update both ancestors, release
+            subtasks.toggle(self.read.id, self.user)
+        self.assertEqual(self.counters(self.research), (1, 2))
+        self.assertEqual(self.counters(self.plan), (1, 4))
+
+        subtasks.toggle(self.read.id, self.user)
+        self.assertEqual(self.counters(self.plan), (0, 4))
+        with self.assertRaises(SubTask.DoesNotExist):
+            subtasks.toggle(self.read.id, create_users(1, prefix="stranger")[0])
+
+    def test_subtree_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles(subtasks.subtree(self.plan)), ["research", "read", "notes", "draft"])
+
+    def test_move_branch(self):
+        subtasks.toggle(self.notes.id, self.user)
+        subtasks.move(self.research, self.review)
+
+        self.assertEqual(self.counters(self.plan), (0, 1))
+        self.assertEqual(self.counters(self.review), (1, 3))
+        self.read.refresh_from_db()
+        self.assertEqual(self.read.ancestor_ids(), [self.review.id, self.research.id])
+        self.assertEqual(self.titles(subtasks.subtree(self.review)), ["research", "read", "notes"])
+
+        research = subtasks.move(self.research, None)
+        self.assertEqual(self.counters(self.review), (0, 0))
+        self.assertEqual(self.titles(subtasks.subtree(research)), ["read", "notes"])
+
+    def test_invalid_moves(self):
+        for target in (self.research, self.read):
+            with self.assertRaises(subtasks.InvalidMove):
+                subtasks.move(self.research, target)
+        other = Task.objects.create(user=self.user, title="Other", category="Work", difficulty="Easy")
+        with self.assertRaises(subtasks.InvalidMove):
+            subtasks.move(self.research, subtasks.add(other, "elsewhere"))
+
+    def test_delete_branch(self):
+        subtasks.toggle(self.notes.id, self.user)
+        subtasks.delete(self.research.id, self.user)
+        self.assertEqual(self.titles(self.task.subtasks.all()), ["plan", "draft", "review"])
+        self.assertEqual(self.counters(self.plan), (0, 1))
+
+    def test_endpoints(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("add_subtask", args=[self.task.id]), {"title": "outline", "parent": self.draft.id}, **XHR,
+        ).json()
+        self.assertEqual((response["depth"], response["parent_id"]), (2, self.draft.id))
+        self.assertEqual([a["total"] for a in response["ancestors"]], [5, 1])
+
+        response = self.client.post(reverse("toggle_subtask", args=[self.read.id]), **XHR).json()
+        self.assertEqual(response["progress"], {"completed": 1, "total": 7, "percent": 14})
+        self.assertEqual([(a["id"], a["completed"]) for a in response["ancestors"]], [(self.plan.id, 1), (self.research.id, 1)])
+
+        response = self.client.get(reverse("get_subtasks", args=[self.task.id]), {"root": self.research.id}, **XHR).json()
+        self.assertEqual([s["title"] for s in response["subtasks"]], ["read", "notes"])
+        self.assertEqual(response["progress"]["percent"], 50)
+
+        response = self.client.post(reverse("move_subtask", args=[self.research.id]), {"parent": self.read.id})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("move_subtask", args=[self.research.id]), {"parent": ""}).json()
+        self.assertEqual(response["subtask"]["depth"], 0)
+
+    def test_archive_and_transfer_keep_the_tree(self):
+        subtasks.toggle(self.read.id, self.user)
+        Task.objects.filter(id=self.task.id).update(completed=True, completed_at=timezone.now() - timedelta(days=400))
+        archive.archive_tasks(archive.cutoff(365), [self.user.pk])
+        self.assertEqual(ArchivedSubTask.objects.get(id=self.read.id).path, self.read.path)
+        archive.restore_tasks([self.user.pk])
+        self.assertEqual(self.titles(subtasks.subtree(self.plan)), ["research", "read", "notes", "draft"])
+
+        # A branch moved under a newer subtask is exported after it, so the import can link it
+        subtasks.move(self.plan, self.review)
+        target = create_users(1, prefix="treecopy")[0]
+        export = io.BytesIO(b"".join(transfer.export_ndjson(self.user)))
+        transfer.import_account(target, transfer.read_export(export))
+
+        copied = SubTask.objects.filter(task__user=target)
+        self.assertEqual(self.titles(copied), ["review", "plan", "research", "read", "notes", "draft"])
+        read = copied.get(title="read")
+        self.assertEqual([SubTask.objects.get(id=i).title for i in read.ancestor_ids()], ["review", "plan", "research"])
+        self.assertEqual(self.counters(copied.get(title="review")), (1, 5))
+
+    def test_rollup_repair(self):
+        SubTask.objects.filter(id__in=[self.plan.id, self.read.id]).update(descendants=9)
+        run(REPAIRS["subtask_rollups"])
+        self.assertEqual(self.counters(self.plan), (0, 4))
+        self.assertEqual(self.counters(self.read), (0, 0))
+
+
+class RankingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="rank")[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        for title in ("c", "b", "a"):
+            self.add(title)
+
+    def add(self, title):
+        self.client.post(
+            reverse("add_task"), {"title": title, "category": "Work", "difficulty": "Easy", "priority": 1}, **XHR,
+        )
+        return Task.objects.get(user=self.user, title=title)
+
+    def order(self):
+        return [t.title for t in Task.objects.filter(user=self.user)]
+
+    def test_new_tasks_go_on_top(self):
+        self.assertEqual(self.order(), ["a", "b", "c"])
+        self.add("d")
+        self.assertEqual(self.order(), ["d", "a", "b", "c"])
+
+    def test_move_writes_one_row(self):
+        a, b, c = Task.objects.filter(user=self.user)
+        versions = dict(Task.objects.values_list("id", "version"))
+        with CaptureQueriesContext(connection) as queries:
+            ranking.move(self.user.pk, a.id, above_id=b.id, below_id=c.id)
+        self.assertEqual(sum(q["sql"].startswith("UPDATE") for q in queries), 1)
+        self.assertEqual(self.order(), ["b", "a", "c"])
+        self.assertEqual(dict(Task.objects.values_list("id", "version")), versions)
+
+        ranking.move(self.user.pk, c.id, below_id=b.id)
+        ranking.move(self.user.pk, b.id, above_id=a.id)
+        self.assertEqual(self.order(), ["c", "a", "b"])
+
+    def test_exhausted_gap_is_rebalanced(self):
+        a, b, c = Task.objects.filter(user=self.user)
+        # Keep dropping a task into the gap just above c until the floats run out
+        for _ in range(60):
+            first, second = Task.objects.filter(user=self.user)[:2]
+            ranking.move(self.user.pk, first.id, above_id=second.id, below_id=c.id)
+        self.assertEqual(self.order()[2], "c")
+        # The job respaced everything from RANK_STEP up at least once on the way
+        ranks = list(Task.objects.filter(user=self.user).values_list("rank", flat=True))
+        self.assertEqual(ranks[2], ranking.RANK_STEP * 3)
+        self.assertTrue(ranking.RANK_STEP < ranks[0] < ranks[1] < ranks[2])
+
+        Task.objects.filter(user=self.user).update(rank=0)
+        ranking.move(self.user.pk, c.id, above_id=a.id, below_id=b.id)
+        self.assertEqual(self.order(), ["a", "c", "b"])
+
+    def test_stale_neighbours(self):
+        a, b, c = Task.objects.filter(user=self.user)
+        other = Task.objects.create(user=create_users(1, prefix="rankother")[0], title="x", category="Work", difficulty="Easy")
+        for above, below in ((other.id, None), (a.id, None), (c.id, b.id)):
+            with self.assertRaises(ranking.StaleOrder):
+                ranking.move(self.user.pk, a.id, above_id=above, below_id=below)
+
+        response = self.client.post(reverse("move_task", args=[a.id]), {"above": other.id, "below": ""}, **XHR)
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(reverse("move_task", args=[a.id]), {"above": "top"}, **XHR)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("move_task", args=[a.id]), {"above": c.id, "below": ""}, **XHR).json()
+        self.assertEqual(response["rank"], Task.objects.get(id=a.id).rank)
+        self.assertEqual(self.order(), ["b", "c", "a"])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SharedCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.editor, cls.viewer, cls.stranger = create_users(4, prefix="team")
+        cls.day = date(2025, 3, 10)
+
+    def setUp(self):
+        cache.clear()
+        self.calendar = calendars.create(self.owner, "Team", "#22c55e")
+        calendars.share(self.calendar, self.owner, self.editor.username, CalendarMembership.EDITOR)
+        calendars.share(self.calendar, self.owner, self.viewer.username, CalendarMembership.VIEWER)
+        self.standup = self.add_event(self.owner, "Standup", start_time="09:00", calendar_id=self.calendar.id)
+
+    def add_event(self, user, title, **extra):
+        self.client.force_login(user)
+        response = self.client.post(reverse("add_event"), json.dumps({
+            "title": title, "event_date": self.day.isoformat(), **extra,
+        }), content_type="application/json")
+        return response.json().get("event")
+
+    def events(self, user, **params):
+        self.client.force_login(user)
+        params = params or {"start": self.day.isoformat(), "end": self.day.isoformat()}
+        return self.client.get(reverse("get_events"), params).json()
+
+    def titles(self, user):
+        return [e["title"] for e in self.events(user)["events"]]
+
+    def test_members_see_the_merged_calendar(self):
+        self.add_event(self.viewer, "Dentist", start_time="08:00")
+        self.add_event(self.viewer, "Lunch", start_time="12:00")
+        data = self.events(self.viewer)
+        self.assertEqual([e["title"] for e in data["events"]], ["Dentist", "Standup", "Lunch"])
+        self.assertEqual(data["events"][1]["calendar_id"], self.calendar.id)
+        self.assertEqual([(c["name"], c["role"]) for c in data["calendars"]], [("Team", "viewer")])
+
+        self.assertEqual(self.titles(self.stranger), [])
+        self.assertEqual(self.titles(self.owner), ["Standup"])
+        self.assertEqual(self.events(self.viewer, year=2025, month=4)["events"], [])
+        response = self.client.get(reverse("get_events"), {"start": "2025-03-10", "end": "2025-03-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_dont_grow_with_calendars(self):
+        def count(user):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse("get_events"), {"start": self.day.isoformat(), "end": self.day.isoformat()})
+            return len(ctx.captured_queries)
+
+        one = count(self.viewer)
+        for n in range(20):
+            extra = calendars.create(self.owner, f"Project {n}")
+            calendars.share(extra, self.owner, self.viewer.username, CalendarMembership.VIEWER)
+        self.assertEqual(count(self.viewer), one)
+
+        # Warm: every member reads the calendars' payloads from the cache, without the events query
+        count(self.editor)
+        self.assertEqual(count(self.viewer), one)
+        with CaptureQueriesContext(connection) as ctx:
+            self.events(self.owner)
+        self.assertFalse(any("calendar_id\" IN" in q["sql"] for q in ctx.captured_queries))
+
+    def test_writes_refresh_the_cached_calendar(self):
+        self.assertEqual(self.titles(self.viewer), ["Standup"])
+        self.client.force_login(self.editor)
+        response = self.client.post(reverse("edit_event", args=[self.standup["id"]]), json.dumps({
+            "title": "Daily standup", "start_time": "09:00",
+        }), content_type="application/json")
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.titles(self.viewer), ["Daily standup"])
+
+        self.client.force_login(self.editor)
+        self.client.post(reverse("reschedule_event", args=[self.standup["id"]]), json.dumps({
+            "new_date": (self.day + timedelta(days=1)).isoformat(),
+        }), content_type="application/json")
+        self.assertEqual(self.titles(self.viewer), [])
+
+    def test_permissions(self):
+        event_id = self.standup["id"]
+        self.client.force_login(self.viewer)
+        body = json.dumps({"title": "Mine now"})
+        self.assertFalse(self.client.post(reverse("edit_event", args=[event_id]), body, content_type="application/json").json()["success"])
+        self.assertEqual(self.client.post(reverse("reschedule_event", args=[event_id]), json.dumps({
+            "new_date": "2025-03-11",
+        }), content_type="application/json").status_code, 403)
+        self.assertIsNone(self.add_event(self.viewer, "Sneaky", calendar_id=self.calendar.id))
+        with self.assertRaises(calendars.CalendarError):
+            calendars.share(self.calendar, self.viewer, self.stranger.username, CalendarMembership.VIEWER)
+        self.assertEqual(self.client.post(reverse("delete_calendar", args=[self.calendar.id])).status_code, 404)
+
+        # Members may leave; the editor's events stay with the calendar
+        self.add_event(self.editor, "Retro", calendar_id=self.calendar.id)
+        self.client.force_login(self.viewer)
+        response = self.client.post(reverse("share_calendar", args=[self.calendar.id]), json.dumps({
+            "username": self.viewer.username, "role": None,
+        }), content_type="application/json")
+        self.assertEqual(response.json(), {"success": True, "role": None})
+        self.assertEqual(self.titles(self.viewer), [])
+
+        self.client.force_login(self.editor)
+        self.assertEqual(self.client.post(reverse("delete_event", args=[event_id])).json(), {"success": True})
+        self.assertEqual(self.titles(self.owner), ["Retro"])
+
+        self.client.force_login(self.owner)
+        self.client.post(reverse("delete_calendar", args=[self.calendar.id]))
+        self.assertFalse(CalendarEvent.objects.filter(title="Retro").exists())
+
+    def test_recurring_series_and_export(self):
+        self.add_event(
+            self.editor, "Weekly sync", calendar_id=self.calendar.id, is_recurring=True,
+            recurrence_pattern="weekly", recurrence_end_date="2025-03-31",
+        )
+        data = self.events(self.viewer, start="2025-03-01", end="2025-03-31")
+        self.assertEqual([e["date"] for e in data["events"] if e["title"] == "Weekly sync"],
+                         ["2025-03-10", "2025-03-17", "2025-03-24", "2025-03-31"])
+
+        # Shared calendars aren't exported with an account
+        target = create_users(1, prefix="teamcopy")[0]
+        export = io.BytesIO(b"".join(transfer.export_ndjson(self.editor)))
+        transfer.import_account(target, transfer.read_export(export))
+        copied = CalendarEvent.objects.filter(user=target)
+        self.assertEqual(copied.count(), 4)
+        self.assertFalse(copied.filter(calendar__isnull=False).exists())
+
+
+class OfflineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = create_users(2, prefix="offline")
+        cls.task = Task.objects.create(user=cls.user, title="Write report", category="Work", difficulty="Easy")
+        cls.others_task = Task.objects.create(user=cls.other, title="Not yours", category="Work", difficulty="Easy")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def sync(self, *mutations):
+        return self.client.post(reverse("sync_mutations"), json.dumps({"mutations": [
+            {"id": n, "method": "POST", **m} for n, m in enumerate(mutations, 1)
+        ]}), content_type="application/json")
+
+    def test_service_worker(self):
+        response = self.client.get(reverse("service_worker"))
+        self.assertEqual(response["Content-Type"], "application/javascript")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(response["Service-Worker-Allowed"], "/")
+
+        config = offline.worker_config()
+        self.assertIn(json.dumps(config), response.content.decode())
+        self.assertIn("/dashboard/", config["shell"])
+        self.assertIn(r"^/tasks/\d+/move/$", config["writes"])
+        self.assertIn("^/calendar/get_events/$", config["data"])
+
+    def test_replays_a_batch_in_order(self):
+        edit = {
+            "title": "Final report", "category": "School", "difficulty": "Hard", "priority": 2,
+        }
+        response = self.sync(
+            # Sync views, with multipart and form bodies
+            {"url": reverse("edit_task", args=[self.task.id]), "content_type": MULTIPART_CONTENT,
+             "body": encode_multipart(BOUNDARY, edit).decode()},
+            {"url": reverse("toggle_complete", args=[self.task.id])},
+            {"url": reverse("add_task"), "content_type": "application/x-www-form-urlencoded",
+             "body": "title=Offline+task&category=Work&difficulty=Easy&priority=1"},
+            # An async view with a JSON body
+            {"url": reverse("add_event"), "content_type": "application/json",
+             "body": json.dumps({"title": "Offline event", "event_date": "2025-03-10"})},
+            {"url": reverse("toggle_favorite", args=[self.others_task.id])},
+            {"url": reverse("bulk_tasks"), "body": "{}"},
+            {"url": "/nowhere/"},
+            {"url": reverse("toggle_complete", args=[self.task.id])},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["id"] for r in results], list(range(1, 9)))
+        self.assertEqual([r["status"] for r in results], [200, 200, 200, 200, 404, 400, 400, 200])
+        self.assertEqual(results[1]["body"], {"success": True, "completed": True})
+        self.assertEqual(results[7]["body"], {"success": True, "completed": False})
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.category, self.task.completed), ("Final report", "School", False))
+        self.assertTrue(Task.objects.filter(user=self.user, title="Offline task").exists())
+        self.assertTrue(CalendarEvent.objects.filter(user=self.user, title="Offline event").exists())
+        self.assertFalse(Task.objects.get(id=self.others_task.id).favorite)
+
+    def test_a_resent_batch_runs_each_write_once(self):
+        form = "application/x-www-form-urlencoded"
+        batch = [
+            {"key": "k-add", "url": reverse("add_task"), "content_type": form,
+             "body": "title=Offline+task&category=Work&difficulty=Easy&priority=1"},
+            {"key": "k-done", "url": reverse("toggle_complete", args=[self.task.id]), "content_type": form,
+             "body": "completed=true"},
+        ]
+        first = self.sync(*batch).json()["results"]
+        # The response was lost, so the worker sends the same batch again
+        again = self.sync(*batch).json()["results"]
+
+        self.assertEqual(again, first)
+        self.assertEqual(Task.objects.filter(user=self.user, title="Offline task").count(), 1)
+        self.assertTrue(Task.objects.get(id=self.task.id).completed)
+
+        # Toggles set the state they were sent, so even an unkeyed repeat keeps it
+        subtask = SubTask.objects.create(task=self.task, title="Outline")
+        toggle = {"url": reverse("toggle_subtask", args=[subtask.id]), "content_type": form, "body": "completed=true"}
+        self.assertEqual([r["body"]["completed"] for r in self.sync(toggle, toggle).json()["results"]], [True, True])
+        favorite = {"url": reverse("toggle_favorite", args=[self.task.id]), "content_type": form, "body": "favorite=true"}
+        self.sync(favorite, favorite)
+        self.assertTrue(Task.objects.get(id=self.task.id).favorite)
+
+    def test_a_server_error_ends_the_batch(self):
+        form = "application/x-www-form-urlencoded"
+        event = CalendarEvent.objects.create(user=self.user, title="Exam", event_date=date(2025, 3, 10))
+        results = self.sync(
+            {"key": "k-1", "url": reverse("toggle_favorite", args=[self.task.id]), "content_type": form,
+             "body": "favorite=true"},
+            {"key": "k-2", "url": reverse("reschedule_event", args=[event.id]), "content_type": "application/json",
+             "body": json.dumps({"new_date": "not a date"})},
+            {"key": "k-3", "url": reverse("add_task"), "content_type": form,
+             "body": "title=After+the+error&category=Work&difficulty=Easy&priority=1"},
+        ).json()["results"]
+
+        # The write after the failed one waits for it rather than running out of order
+        self.assertEqual([r["status"] for r in results], [200, 500, None])
+        self.assertFalse(Task.objects.filter(title="After the error").exists())
+        self.assertEqual(set(ReplayedWrite.objects.filter(user=self.user).values_list("key", flat=True)), {"k-1"})
+
+    def test_rejects_bad_batches(self):
+        url = reverse("sync_mutations")
+        self.assertEqual(self.client.post(url, "nope", content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post(url, json.dumps({"mutations": [1]}), content_type="application/json").status_code, 400)
+        self.assertEqual(self.sync().status_code, 400)
+        toggles = [{"url": reverse("toggle_favorite", args=[self.task.id])}] * (offline.MAX_BATCH + 1)
+        self.assertEqual(self.sync(*toggles).status_code, 400)
+        self.assertFalse(Task.objects.get(id=self.task.id).favorite)
+
+        self.client.logout()
+        self.assertEqual(self.sync(toggles[0]).status_code, 302)
+
+
+SERVER_TIMING = re.compile(r'^db;dur=\d+\.\d;desc="(\d+) queries", tpl;dur=\d+\.\d, total;dur=\d+\.\d$')
+
+
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_users(1, prefix="metrics")[0]
+        seed_tasks(cls.user, 3)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_log_record(self):
+        # dashboard is a sync view, get_habits an async one
+        for name in ("dashboard", "get_habits"):
+            with self.subTest(name), self.assertLogs("main.requests", "INFO") as logs:
+                response = self.client.get(reverse(name))
+
+            match = SERVER_TIMING.match(response["Server-Timing"])
+            self.assertIsNotNone(match, response["Server-Timing"])
+            record = json.loads(logs.records[-1].getMessage())
+            self.assertEqual(record["view"], name)
+            self.assertEqual(record["status"], 200)
+            self.assertEqual(record["queries"], int(match.group(1)))
+            self.assertGreater(record["queries"], 0)
+            self.assertEqual(
+                set(record), {"method", "path", "view", "status", "queries", "db_ms", "template_ms", "total_ms"},
+            )
+
+    def test_warns_over_the_query_budget(self):
+        with override_settings(QUERY_BUDGETS={"get_habits": 1}), self.assertLogs("main.requests", "WARNING") as logs:
+            self.client.get(reverse("get_habits"))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("Query budget exceeded for get_habits", logs.records[0].getMessage())
+
+        # Within budget: nothing at WARNING
+        with override_settings(QUERY_BUDGETS={"get_habits": 100}), self.assertNoLogs("main.requests", "WARNING"):
+            self.client.get(reverse("get_habits"))
+
+
+class ProfilingTests(TestCase):
+
+    def test_one_profiled_request_at_a_time(self):
+        staff = create_users(1, prefix="prof")[0]
+        staff.is_staff = True
+        factory = RequestFactory()
+        responses = []
+
+        def view(request):
+            # A second flagged request while the first is being profiled
+            if request.GET.get("outer"):
+                inner = factory.get("/", {"_profile": "1"})
+                inner.user = staff
+                responses.append(middleware(inner))
+            return HttpResponse("ok")
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(PROFILING_ENABLED=True, PROFILE_DIR=tmp):
+            middleware = ProfilingMiddleware(view)
+            request = factory.get("/", {"_profile": "1", "outer": "1"})
+            request.user = staff
+            outer = middleware(request)
+            self.assertTrue(os.path.exists(os.path.join(tmp, outer["X-Profile-Id"], "profile.prof")))
+
+        self.assertNotIn("X-Profile-Id", responses[0])
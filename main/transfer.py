@@ -0,0 +1,325 @@
+"""
+Account export and import.
+
+An export holds a header record, then one record per row, grouped by
+section in SECTIONS order. The sections are calendar events, tasks, subtasks,
+timer sessions, habits and the streak. Archived tasks, subtasks and sessions
+(main.archive) are exported with the hot ones. It comes either as one NDJSON
+stream ({"type": "task", ...} per line) or as a zip with manifest.json and
+one <section>.ndjson per section. Rows are read with iterator() and written
+out in ~64 KB chunks, so the export never holds an account in memory.
+
+import_account() reads the same records back into a user, validating every
+row with clean_fields() and inserting each section in bulk_create chunks.
+Rows get new ids. Events, tasks and subtasks are the only rows anything
+points at, so only their old id -> new id maps are kept in memory. Those maps
+rewrite parent_event, linked_calendar_event, subtask.task, subtask.parent and
+the ids in subtask.path (subtasks are exported parents first). Shared
+calendars aren't part of an account, so events from them come back as
+personal events. The import runs in one transaction: a bad row anywhere
+leaves the account as it was. Archived rows come back as hot rows; the next
+archive_data run moves them again.
+"""
+
+import base64
+import io
+import itertools
+import json
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime, time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import (
+    Task, SubTask, CalendarEvent, TimerSession, Habit, UserStreak,
+    ArchivedTask, ArchivedSubTask, ArchivedTimerSession,
+    path_segment,
+)
+
+
+FORMAT = "habitcanvas-export"
+VERSION = 1
+BATCH_SIZE = 2000
+CHUNK_BYTES = 64 * 1024
+
+# Import order: a section only points at sections before it
+SECTIONS = {
+    "calendar_event": CalendarEvent,
+    "task": Task,
+    "subtask": SubTask,
+    "timer_session": TimerSession,
+    "habit": Habit,
+    "streak": UserStreak,
+}
+SOURCES = {
+    "calendar_event": lambda user: [CalendarEvent.objects.filter(user=user)],
+    "task": lambda user: [Task.objects.filter(user=user), ArchivedTask.objects.filter(user=user)],
+    "subtask": lambda user: [SubTask.objects.filter(task__user=user), ArchivedSubTask.objects.filter(task__user=user)],
+    "timer_session": lambda user: [TimerSession.objects.filter(user=user), ArchivedTimerSession.objects.filter(user=user)],
+    "habit": lambda user: [Habit.objects.filter(user=user)],
+    "streak": lambda user: [UserStreak.objects.filter(user=user)],
+}
+# Row order within a section; sorting on path puts every subtask after its parent
+ORDERING = {"subtask": ("path", "id")}
+# Foreign keys rewritten on import: column -> (section, required)
+REFERENCES = {
+    "calendar_event": {"parent_event_id": ("calendar_event", False)},
+    "task": {"linked_calendar_event_id": ("calendar_event", False)},
+    "subtask": {"task_id": ("task", True), "parent_id": ("subtask", True)},
+}
+# Foreign keys to rows outside the account, cleared on import
+DETACHED = {"calendar_event": ("calendar_id",)}
+
+
+class ImportFailed(ValueError):
+    pass
+
+
+def exported_fields(model):
+    return [f.attname for f in model._meta.concrete_fields if f.name != "user"]
+
+
+def header(user):
+    return {
+        "type": "header",
+        "format": FORMAT,
+        "version": VERSION,
+        "exported_at": timezone.now(),
+        "username": user.get_username(),
+        "email": user.email,
+    }
+
+
+def rows(user, section):
+    """Records of one section, hot rows then archived ones, each in ORDERING (default: id) order."""
+    fields = exported_fields(SECTIONS[section])
+    for queryset in SOURCES[section](user):
+        ordered = queryset.order_by(*ORDERING.get(section, ["id"])).values(*fields)
+        for row in ordered.iterator(chunk_size=BATCH_SIZE):
+            yield {"type": section, **row}
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        # BinaryField.to_python() reads base64 back
+        return base64.b64encode(bytes(value)).decode("ascii")
+    raise TypeError(f"Can't export {type(value).__name__}")
+
+
+def dumps(record):
+    return json.dumps(record, default=_encode, separators=(",", ":")).encode() + b"\n"
+
+
+def _chunks(records):
+    buffer, size = [], 0
+    for record in records:
+        line = dumps(record)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def export_ndjson(user):
+    """The account as NDJSON, in byte chunks."""
+    yield from _chunks(itertools.chain([header(user)], *(rows(user, section) for section in SECTIONS)))
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable file the zip is written into; drain() hands over what has been written so far."""
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def export_zip(user):
+    """The account as a zip of manifest.json and one NDJSON file per section, in byte chunks."""
+    sink = _Sink()
+    # An unseekable target makes zipfile write data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("manifest.json", dumps(header(user)))
+        for section in SECTIONS:
+            with archive.open(f"{section}.ndjson", "w", force_zip64=True) as entry:
+                for chunk in _chunks(rows(user, section)):
+                    entry.write(chunk)
+                    if data := sink.drain():
+                        yield data
+    yield sink.drain()
+
+
+async def aiterate(iterator, batch=8):
+    """
+    Serve a sync iterator that queries the database from ASGI without
+    buffering it: batches of chunks are pulled on the sync thread.
+    """
+    pull = sync_to_async(lambda: list(itertools.islice(iterator, batch)))
+    while chunks := await pull():
+        for chunk in chunks:
+            yield chunk
+
+
+# ---------- import ----------
+
+def read_export(fileobj):
+    """Records from an export file (zip or NDJSON, opened in binary mode), header first."""
+    def parse(lines, source):
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ImportFailed(f"{source} line {number}: not JSON ({error})") from None
+
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            names = set(archive.namelist())
+            if "manifest.json" not in names:
+                raise ImportFailed("Zip has no manifest.json")
+            yield from parse([archive.read("manifest.json")], "manifest.json")
+            for section in SECTIONS:
+                name = f"{section}.ndjson"
+                if name in names:
+                    with archive.open(name) as entry:
+                        yield from parse(entry, name)
+    else:
+        fileobj.seek(0)
+        yield from parse(fileobj, "export")
+
+
+@contextmanager
+def _keep_timestamps(*model_classes):
+    """Let bulk_create store the exported created_at/updated_at instead of now()."""
+    fields = [
+        f for model in model_classes for f in model._meta.concrete_fields
+        if isinstance(f, models.DateField) and (f.auto_now or f.auto_now_add)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def import_account(user, records, batch_size=1000):
+    """
+    Add the exported records to `user`'s account and return {section: rows}.
+    Raises ImportFailed, with nothing written, on the first invalid record.
+    Runs in the calling process only: it switches off auto_now on the
+    imported models while it runs.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if not first or first.get("type") != "header" or first.get("format") != FORMAT:
+        raise ImportFailed("Not a HabitCanvas export (missing header)")
+    if first.get("version") != VERSION:
+        raise ImportFailed(f"Unsupported export version {first.get('version')!r}")
+
+    ids = {"calendar_event": {}, "task": {}, "subtask": {}}
+    counts = dict.fromkeys(SECTIONS, 0)
+    pending = []
+    order = list(SECTIONS)
+    current = None
+
+    def flush():
+        if not pending:
+            return
+        instances = [instance for _, instance in pending]
+        if current == "streak":
+            # The account may already have a streak row; the export's replaces it
+            UserStreak.objects.bulk_create(
+                instances[-1:], update_conflicts=True, unique_fields=["user"],
+                update_fields=["current_streak", "longest_streak", "last_focus_date", "updated_at"],
+            )
+        else:
+            SECTIONS[current].objects.bulk_create(instances, batch_size=batch_size)
+            if current in ids:
+                ids[current].update((old_id, instance.pk) for old_id, instance in pending)
+        counts[current] += len(pending)
+        pending.clear()
+
+    with transaction.atomic(), _keep_timestamps(*SECTIONS.values()):
+        for number, record in enumerate(records, 2):
+            section = record.pop("type", None)
+            if section not in SECTIONS:
+                raise ImportFailed(f"Record {number}: unknown type {section!r}")
+            if section != current:
+                if current is not None and order.index(section) < order.index(current):
+                    raise ImportFailed(f"Record {number}: {section} after {current}; sections are out of order")
+                flush()
+                current = section
+
+            old_id = record.pop("id", None)
+            for column, (target, required) in REFERENCES.get(section, {}).items():
+                old_ref = record.get(column)
+                if old_ref is None:
+                    continue
+                if old_ref not in ids[target] and target == section:
+                    # Points at a row of this section still waiting in `pending`
+                    flush()
+                if old_ref not in ids[target] and required:
+                    raise ImportFailed(f"Record {number}: {section} points at {target} {old_ref}, which isn't in the export")
+                record[column] = ids[target].get(old_ref)
+            for column in DETACHED.get(section, ()):
+                record[column] = None
+            if section == "subtask" and record.get("path"):
+                record["path"] = _remap_path(record["path"], ids["subtask"], number)
+
+            instance = build(SECTIONS[section], record, user, number)
+            pending.append((old_id, instance))
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+
+    return counts
+
+
+def _remap_path(path, ids, number):
+    try:
+        return "".join(path_segment(ids[int(part)]) for part in path.split("/") if part)
+    except (KeyError, ValueError):
+        raise ImportFailed(f"Record {number}: subtask path {path!r} names a subtask that isn't before it") from None
+
+
+def build(model, record, user, number):
+    """An unsaved, validated instance of model from an export record."""
+    fields = {f.attname: f for f in model._meta.concrete_fields}
+    unknown = set(record) - set(fields)
+    if unknown:
+        raise ImportFailed(f"Record {number}: unknown field(s) {', '.join(sorted(unknown))}")
+
+    instance = model(**record)
+    if "user" in {f.name for f in model._meta.concrete_fields}:
+        instance.user = user
+    # Foreign keys were remapped above; checking them here would cost a query per row
+    relations = [f.name for f in model._meta.concrete_fields if f.is_relation or f.primary_key]
+    try:
+        instance.clean_fields(exclude=relations)
+    except ValidationError as error:
+        raise ImportFailed(f"Record {number} ({model.__name__}): {error.message_dict}") from None
+    return instance
@@ -1,12 +1,22 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
+
+from .forms import QueuedPasswordResetForm
 from .views import (
     landing_view, register_view, login_view, dashboard_view, logout_view,
-    add_task, edit_task, delete_task, toggle_complete, toggle_favorite,
+    add_task, edit_task, delete_task, move_task, toggle_complete, toggle_favorite, bulk_tasks,
+    archived_tasks, restore_archived_task,
     timer_view, save_session, get_timer_stats,
     calendar_view, get_events, add_event, edit_event, delete_event, reschedule_event,
+    add_calendar, share_calendar, delete_calendar,
     # Subtask views
-    add_subtask, toggle_subtask, delete_subtask, get_subtasks
+    add_subtask, toggle_subtask, delete_subtask, move_subtask, get_subtasks,
+    search_view, search_suggest,
+    get_habits, add_habit, check_habit, delete_habit, habit_heatmap,
+    stats_heatmap, task_analytics,
+    export_account,
+    metrics_view,
+    service_worker, sync_mutations,
 )
 
 urlpatterns = [
@@ -26,6 +36,11 @@ urlpatterns = [
     path("tasks/delete/<int:task_id>/", delete_task, name="delete_task"),
     path("tasks/toggle_complete/<int:task_id>/", toggle_complete, name="toggle_complete"),
     path("tasks/toggle_favorite/<int:task_id>/", toggle_favorite, name="toggle_favorite"),
+    path("tasks/<int:task_id>/move/", move_task, name="move_task"),
+    path("tasks/bulk/", bulk_tasks, name="bulk_tasks"),
+    path("tasks/analytics/", task_analytics, name="task_analytics"),
+    path("tasks/archive/", archived_tasks, name="archived_tasks"),
+    path("tasks/archive/<int:task_id>/restore/", restore_archived_task, name="restore_archived_task"),
 
     # Timer Page
     path("timer/", timer_view, name="timer"),
@@ -39,15 +54,47 @@ urlpatterns = [
     path("calendar/edit_event/<int:event_id>/", edit_event, name="edit_event"),
     path("calendar/delete_event/<int:event_id>/", delete_event, name="delete_event"),
     path('calendar/reschedule_event/<int:event_id>/', reschedule_event, name='reschedule_event'),
+    path("calendar/calendars/add/", add_calendar, name="add_calendar"),
+    path("calendar/calendars/<int:calendar_id>/share/", share_calendar, name="share_calendar"),
+    path("calendar/calendars/<int:calendar_id>/delete/", delete_calendar, name="delete_calendar"),
 
     # Subtasks
     path("tasks/<int:task_id>/subtasks/", get_subtasks, name="get_subtasks"),
     path("tasks/<int:task_id>/subtasks/add/", add_subtask, name="add_subtask"),
     path("subtasks/<int:subtask_id>/toggle/", toggle_subtask, name="toggle_subtask"),
     path("subtasks/<int:subtask_id>/delete/", delete_subtask, name="delete_subtask"),
+    path("subtasks/<int:subtask_id>/move/", move_subtask, name="move_subtask"),
+
+    # Habits
+    path("habits/", get_habits, name="get_habits"),
+    path("habits/add/", add_habit, name="add_habit"),
+    path("habits/<int:habit_id>/check/", check_habit, name="check_habit"),
+    path("habits/<int:habit_id>/delete/", delete_habit, name="delete_habit"),
+    path("habits/<int:habit_id>/heatmap/", habit_heatmap, name="habit_heatmap"),
+
+    # Stats
+    path("stats/heatmap/", stats_heatmap, name="stats_heatmap"),
+
+    # Search
+    path("search/", search_view, name="search"),
+    path("search/suggest/", search_suggest, name="search_suggest"),
+
+    # Account export
+    path("account/export/", export_account, name="export_account"),
+
+    # Prometheus scrape endpoint
+    path("metrics/", metrics_view, name="metrics"),
+
+    # Offline support: the service worker and the replay of its write queue
+    path("sw.js", service_worker, name="service_worker"),
+    path("sync/", sync_mutations, name="sync_mutations"),
 
     # Password reset
-    path("password_reset/", auth_views.PasswordResetView.as_view(), name="password_reset"),
+    path(
+        "password_reset/",
+        auth_views.PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
+        name="password_reset",
+    ),
     path("password_reset/done/", auth_views.PasswordResetDoneView.as_view(), name="password_reset_done"),
     path("reset/<uidb64>/<token>/", auth_views.PasswordResetConfirmView.as_view(), name="password_reset_confirm"),
     path("reset/done/", auth_views.PasswordResetCompleteView.as_view(), name="password_reset_complete"),
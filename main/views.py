@@ -1,25 +1,38 @@
 import re
 import json
+import hmac
 import logging
 from datetime import datetime, timedelta
 
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
-from django.http import JsonResponse
-from django.template.loader import render_to_string
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.utils.cache import get_conditional_response
 from django.utils.dateparse import parse_datetime
-from django.db.models import Avg
+from django.utils.http import quote_etag
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Now, TruncDate
 
 from .models import (
     LoginAttempt, Task, SubTask,
-    CalendarEvent, TimerSession, UserStreak,
+    Calendar, CalendarEvent, TimerSession, UserStreak, Habit, FocusRollup, DataVersion,
+    progress_percent,
 )
-from .forms import TaskForm
+from . import (
+    analytics, archive, calendars, events, habits, jobs, metrics, offline, ranking, search, stats, streaks, subtasks, transfer,
+)
+from .forms import TaskForm, HabitForm
+from .fragments import render_task_card, render_task_cards
+from .replicas import replica_reads
 
 
 logger = logging.getLogger(__name__)
@@ -114,6 +127,7 @@ def logout_view(request):
 # DASHBOARD
 # ============================================================
 @login_required
+@replica_reads
 def dashboard_view(request):
     tasks = Task.objects.filter(user=request.user)
 
@@ -126,15 +140,20 @@ def dashboard_view(request):
     if difficulty:
         tasks = tasks.filter(difficulty=difficulty)
 
-    tasks = tasks.order_by("-priority", "-id") if sort == "priority" else tasks.order_by("-id")
+    tasks = tasks.order_by("-priority", "-id") if sort == "priority" else tasks.order_by("rank", "-id")
 
-    active_count = tasks.filter(completed=False).count()
+    # Header counts and dropdown facets come from the cached analytics
+    summary = analytics.task_analytics(request.user.pk)
+    facets = analytics.facets(summary, category, difficulty)
+    tasks = render_task_cards(list(tasks))
     form = TaskForm()
 
     return render(request, "main/dashboard.html", {
         "tasks": tasks,
         "form": form,
-        "active_count": active_count,
+        "active_count": facets["active"],
+        "overdue_count": summary["totals"]["overdue"],
+        "facets": facets,
     })
 
 
@@ -159,23 +178,14 @@ def add_task(request):
 
             add_to_calendar = request.POST.get('add_to_calendar') == '1'
             task.add_to_calendar = add_to_calendar
+            task.rank = ranking.top_rank(request.user.pk)
             task.save()
 
             if add_to_calendar and task.due_date:
-                event = CalendarEvent.objects.create(
-                    user=request.user,
-                    title=task.title,
-                    description=f"Task: {task.title}",
-                    event_date=task.due_date,
-                    category=task.category,
-                )
-                event.color = event.get_category_color()
-                event.save()
-                task.linked_calendar_event = event
-                task.save()
+                jobs.enqueue(events.link_task_event, task.id)
 
             if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                html = render_to_string("main/partials/task_card.html", {"task": task}, request=request)
+                html = render_task_card(task)
                 return JsonResponse({"success": True, "task_html": html})
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -204,23 +214,13 @@ def edit_task(request, task_id):
                     old_event.color = old_event.get_category_color()
                     old_event.save()
                 else:
-                    event = CalendarEvent.objects.create(
-                        user=request.user,
-                        title=task.title,
-                        description=f"Task: {task.title}",
-                        event_date=task.due_date,
-                        category=task.category,
-                    )
-                    event.color = event.get_category_color()
-                    event.save()
-                    task.linked_calendar_event = event
-                    task.save()
+                    jobs.enqueue(events.link_task_event, task.id)
 
             elif old_event:
                 task.linked_calendar_event = None
                 task.save()
 
-            html = render_to_string("main/partials/task_card.html", {"task": task}, request=request)
+            html = render_task_card(task)
             return JsonResponse({"success": True, "task_html": html, "task_id": task.id})
 
         return JsonResponse({"success": False, "errors": form.errors})
@@ -243,9 +243,134 @@ def delete_task(request, task_id):
     return redirect("dashboard")
 
 
+def _task_id(value):
+    """An optional task id form field: None when blank, ValueError when malformed."""
+    return int(value) if value not in (None, "") else None
+
+
+@login_required
+@require_http_methods(["POST"])
+def move_task(request, task_id):
+    """
+    Drop a task between two others on the dashboard: "above" and "below" are
+    the ids of the cards now on either side of it (blank at the ends of the list).
+    """
+    try:
+        above_id = _task_id(request.POST.get("above"))
+        below_id = _task_id(request.POST.get("below"))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+
+    try:
+        rank = ranking.move(request.user.pk, task_id, above_id=above_id, below_id=below_id)
+    except ranking.StaleOrder as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=409)
+
+    return JsonResponse({"success": True, "task_id": task_id, "rank": rank})
+
+
+# Fields written by each bulk action; None means the value comes from the request
+BULK_TASK_ACTIONS = {
+    "complete": {"completed": True, "completed_at": Coalesce("completed_at", Now())},
+    "uncomplete": {"completed": False, "completed_at": None},
+    "favorite": {"favorite": True},
+    "unfavorite": {"favorite": False},
+    "recategorize": None,
+    "reprioritize": None,
+    "delete": None,
+}
+BULK_TASK_LIMIT = 500
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_tasks(request):
+    """
+    Apply one action to many tasks: {"action": ..., "ids": [...], "value": ...}.
+    Runs a handful of set-based statements in one transaction regardless of
+    how many tasks are selected.
+    """
+    try:
+        data = json.loads(request.body)
+        action = data["action"]
+        ids = {int(i) for i in data["ids"]}
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+
+    if action not in BULK_TASK_ACTIONS:
+        return JsonResponse({"success": False, "error": f"Unknown action: {action}"}, status=400)
+    if not ids or len(ids) > BULK_TASK_LIMIT:
+        return JsonResponse(
+            {"success": False, "error": f"Select between 1 and {BULK_TASK_LIMIT} tasks"}, status=400
+        )
+
+    fields = BULK_TASK_ACTIONS[action]
+    if action == "recategorize":
+        if data.get("value") not in dict(Task.CATEGORY_CHOICES):
+            return JsonResponse({"success": False, "error": "Invalid category"}, status=400)
+        fields = {"category": data["value"]}
+    elif action == "reprioritize":
+        try:
+            fields = {"priority": int(data.get("value"))}
+        except (ValueError, TypeError):
+            return JsonResponse({"success": False, "error": "Invalid priority"}, status=400)
+
+    with transaction.atomic():
+        rows = list(
+            Task.objects.filter(user=request.user, id__in=ids)
+            .values_list("id", "linked_calendar_event_id")
+        )
+        task_ids = [task_id for task_id, _ in rows]
+        event_ids = [event_id for _, event_id in rows if event_id]
+        tasks = Task.objects.filter(id__in=task_ids)
+
+        if action == "delete":
+            tasks.delete()
+            CalendarEvent.objects.filter(id__in=event_ids).delete()
+        else:
+            tasks.update(**fields, version=F("version") + 1)
+            if action == "recategorize" and event_ids:
+                CalendarEvent.objects.filter(id__in=event_ids).update(
+                    category=fields["category"],
+                    color=CalendarEvent(category=fields["category"]).get_category_color(),
+                    updated_at=timezone.now(),
+                )
+
+    return JsonResponse({"success": True, "action": action, "task_ids": task_ids})
+
+
+@login_required
+@replica_reads
+async def archived_tasks(request):
+    """Completed tasks moved out of the hot table by `manage.py archive_data`, newest first."""
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid page"}, status=400)
+
+    tasks, has_more = await sync_to_async(archive.archived_tasks_page)(await request.auser(), page)
+    return JsonResponse({"success": True, "page": page, "has_more": has_more, "tasks": tasks})
+
+
+@login_required
+@require_http_methods(["POST"])
+def restore_archived_task(request, task_id):
+    task = archive.restore_task(request.user, task_id)
+    if task is None:
+        return JsonResponse({"success": False, "error": "Not found"}, status=404)
+    return JsonResponse({"success": True, "task_html": render_task_card(task)})
+
+
 # ============================================================
 # SUBTASK SYSTEM
 # ============================================================
+def _parent_subtask(value, task_id):
+    """The subtask named by a "parent" form field (blank = top level), or 404."""
+    if not value:
+        return None
+    return get_object_or_404(SubTask, id=value, task_id=task_id)
+
+
 @login_required
 def add_subtask(request, task_id):
     task = get_object_or_404(Task, id=task_id, user=request.user)
@@ -255,42 +380,42 @@ def add_subtask(request, task_id):
         if not title:
             return JsonResponse({"success": False, "error": "Title required"})
 
-        subtask = SubTask.objects.create(task=task, title=title)
-        completed, total = task.subtask_progress()
+        try:
+            subtask = subtasks.add(task, title, parent=_parent_subtask(request.POST.get("parent"), task.id))
+        except subtasks.InvalidMove as e:
+            return JsonResponse({"success": False, "error": str(e)}, status=400)
 
         return JsonResponse({
             "success": True,
             "subtask_id": subtask.id,
             "title": subtask.title,
-            "progress": {
-                "completed": completed, "total": total,
-                "percent": task.subtask_progress_percent()
-            }
+            "parent_id": subtask.parent_id,
+            "depth": subtask.depth,
+            "progress": task.subtask_progress_json(),
+            "ancestors": subtasks.ancestors_progress(subtask),
         })
 
     return JsonResponse({"success": False, "error": "Invalid request"})
 
 
 @login_required
-def toggle_subtask(request, subtask_id):
-    subtask = get_object_or_404(SubTask, id=subtask_id, task__user=request.user)
+async def toggle_subtask(request, subtask_id):
+    user = await request.auser()
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        subtask.completed = not subtask.completed
-        subtask.save()
-
-        task = subtask.task
-        completed, total = task.subtask_progress()
+        try:
+            subtask = await sync_to_async(subtasks.toggle)(
+                subtask_id, user, requested_state(request, "completed"),
+            )
+        except SubTask.DoesNotExist:
+            raise Http404("No SubTask matches the given query.")
 
         return JsonResponse({
             "success": True,
             "completed": subtask.completed,
             "subtask_id": subtask.id,
-            "progress": {
-                "completed": completed,
-                "total": total,
-                "percent": task.subtask_progress_percent()
-            }
+            "progress": await subtask.task.asubtask_progress_json(),
+            "ancestors": await sync_to_async(subtasks.ancestors_progress)(subtask),
         })
 
     return JsonResponse({"success": False, "error": "Invalid request"})
@@ -298,48 +423,68 @@ def toggle_subtask(request, subtask_id):
 
 @login_required
 def delete_subtask(request, subtask_id):
-    subtask = get_object_or_404(SubTask, id=subtask_id, task__user=request.user)
-    task = subtask.task
-
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        subtask.delete()
-        completed, total = task.subtask_progress()
+        try:
+            subtask = subtasks.delete(subtask_id, request.user)
+        except SubTask.DoesNotExist:
+            raise Http404("No SubTask matches the given query.")
 
         return JsonResponse({
             "success": True,
             "subtask_id": subtask_id,
-            "progress": {
-                "completed": completed,
-                "total": total,
-                "percent": task.subtask_progress_percent()
-            }
+            "progress": subtask.task.subtask_progress_json(),
+            "ancestors": subtasks.ancestors_progress(subtask),
         })
 
     return JsonResponse({"success": False, "error": "Invalid request"})
 
 
+@login_required
+@require_http_methods(["POST"])
+def move_subtask(request, subtask_id):
+    """Move a subtask, with everything under it, below another subtask of its task ("parent" blank = top level)."""
+    subtask = get_object_or_404(
+        SubTask.objects.select_related("task"), id=subtask_id, task__user=request.user
+    )
+    try:
+        subtask = subtasks.move(subtask, _parent_subtask(request.POST.get("parent"), subtask.task_id))
+    except subtasks.InvalidMove as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    return JsonResponse({
+        "success": True,
+        "subtask": subtasks.as_json(subtask),
+        "ancestors": subtasks.ancestors_progress(subtask),
+    })
+
+
 # ============================================================
 # TIMER + STREAK SYSTEM
 # ============================================================
 @login_required
 @csrf_exempt
-def save_session(request):
+async def save_session(request):
     if request.method == "POST":
         try:
             data = json.loads(request.body)
+            user = await request.auser()
 
-            session = TimerSession.objects.create(
-                user=request.user,
+            session = await TimerSession.objects.acreate(
+                user=user,
                 start_time=parse_datetime(data["startTime"]),
                 end_time=parse_datetime(data["endTime"]),
                 duration_minutes=data["duration"],
                 mode=data["mode"],
                 completed=True,
             )
+            metrics.SESSIONS_SAVED.labels(session.mode if session.mode in dict(TimerSession.MODE_CHOICES) else "other").inc()
 
             if data["mode"] == "focus":
-                streak, _ = UserStreak.objects.get_or_create(user=request.user)
-                streak.update_streak(session.start_time.date())
+                # Streaks count local days; an offset-less timestamp is already local
+                start = session.start_time
+                if timezone.is_naive(start):
+                    start = timezone.make_aware(start)
+                await jobs.aenqueue(streaks.record_focus_session, user.pk, timezone.localdate(start).isoformat())
 
             return JsonResponse({"success": True})
 
@@ -350,41 +495,58 @@ def save_session(request):
 
 
 @login_required
-def get_timer_stats(request):
-    today = timezone.now().date()
+@replica_reads
+async def get_timer_stats(request):
+    today = timezone.localdate()
+    user = await request.auser()
 
-    streak_data, _ = UserStreak.objects.get_or_create(user=request.user)
+    # Not aget_or_create(): it routes as a write and would send the whole view to the primary
+    streak_data = await UserStreak.objects.filter(user=user).afirst() or UserStreak(user=user)
 
     sessions = TimerSession.objects.filter(
-        user=request.user, mode="focus", completed=True
+        user=user, mode="focus", completed=True
     )
 
-    avg_length = sessions.aggregate(avg=Avg("duration_minutes"))["avg"] or 0
-    total_sessions = sessions.count()
-
-    # Last 7 days
+    # All-time totals include sessions moved to the archive (main.archive)
+    totals = await sessions.aaggregate(minutes=Sum("duration_minutes"), count=Count("id"))
+    archived = await FocusRollup.objects.filter(user=user).aaggregate(
+        minutes=Sum("focus_minutes"), count=Sum("focus_sessions")
+    )
+    total_sessions = totals["count"] + (archived["count"] or 0)
+    total_minutes = (totals["minutes"] or 0) + (archived["minutes"] or 0)
+    avg_length = total_minutes / total_sessions if total_sessions else 0
+
+    # Last 7 days, grouped by local date in one query
+    week_start = today - timedelta(days=6)
+    days = {
+        row["day"]: row
+        async for row in sessions.filter(start_time__date__gte=week_start)
+        .annotate(day=TruncDate("start_time"))
+        .values("day")
+        .annotate(minutes=Sum("duration_minutes"), sessions=Count("id"))
+    }
     daily_stats = []
-    for i in range(6, -1, -1):
-        d = today - timedelta(days=i)
-        day_sessions = sessions.filter(start_time__date=d)
+    for i in range(7):
+        d = week_start + timedelta(days=i)
+        day = days.get(d, {})
         daily_stats.append({
             "date": d.strftime("%Y-%m-%d"),
-            "minutes": sum(s.duration_minutes for s in day_sessions),
-            "sessions": day_sessions.count(),
+            "minutes": day.get("minutes") or 0,
+            "sessions": day.get("sessions", 0),
         })
 
     # Weekly / Monthly
-    week_total = sum(s.duration_minutes for s in sessions.filter(start_time__date__gte=today - timedelta(days=6)))
-    month_total = sum(s.duration_minutes for s in sessions.filter(start_time__date__gte=today.replace(day=1)))
+    week_total = sum(day["minutes"] for day in daily_stats)
+    month = await sessions.filter(start_time__date__gte=today.replace(day=1)).aaggregate(total=Sum("duration_minutes"))
 
     return JsonResponse({
-        "streak": streak_data.current_streak,
+        "streak": streak_data.live_streak(today),
         "longest_streak": streak_data.longest_streak,
         "daily_stats": daily_stats,
         "total_sessions": total_sessions,
         "average_session_minutes": round(avg_length, 1),
         "week_total_minutes": week_total,
-        "month_total_minutes": month_total,
+        "month_total_minutes": month["total"] or 0,
     })
 
 
@@ -397,39 +559,23 @@ def calendar_view(request):
 
 
 @login_required
-def get_events(request):
-    year = int(request.GET.get("year", timezone.now().year))
-    month = int(request.GET.get("month", timezone.now().month))
-
-    def fmt(t):
-        if t is None:
-            return None
-        return t.strftime("%H:%M")
-
-    events = CalendarEvent.objects.filter(user=request.user)
-    tasks = Task.objects.filter(user=request.user, due_date__isnull=False)
+@replica_reads
+async def get_events(request):
+    """
+    What the calendar shows from `start` to `end` (ISO dates), or for one
+    `year`/`month`: the user's personal events merged with those of every
+    calendar they belong to (main.calendars), plus their tasks due in the range.
+    """
+    try:
+        start, end = calendars.parse_range(request.GET, timezone.localdate())
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+    user = await request.auser()
 
-    result = []
-
-    # Calendar events
-    for e in events:
-        result.append({
-            "id": e.id,
-            "title": e.title,
-            "description": e.description,
-            "date": e.event_date.strftime("%Y-%m-%d"),
-            "start_time": fmt(e.start_time),
-            "end_time": fmt(e.end_time),
-            "category": e.category,
-            "color": e.color,
-            "type": "event",
-            "reminder_enabled": e.reminder_enabled,
-            "reminder_minutes_before": e.reminder_minutes_before,
-            "is_recurring": e.is_recurring or (e.parent_event is not None),
-        })
+    result, shared = await sync_to_async(calendars.events_between)(user, start, end)
 
     # Tasks as calendar items
-    for t in tasks:
+    async for t in Task.objects.filter(user=user, due_date__range=(start, end)):
         result.append({
             "id": t.id,
             "title": t.title,
@@ -440,7 +586,7 @@ def get_events(request):
             "completed": t.completed,
         })
 
-    return JsonResponse({"events": result})
+    return JsonResponse({"events": result, "calendars": shared})
 
 
 # Helper for time parsing
@@ -458,13 +604,15 @@ def parse_time_field(value):
 
 @login_required
 @require_http_methods(["POST"])
-def add_event(request):
+async def add_event(request):
     try:
         data = json.loads(request.body)
+        user = await request.auser()
 
         start_time = parse_time_field(data.get("start_time"))
         end_time = parse_time_field(data.get("end_time"))
         category = data.get("category", "Other")
+        calendar_id = await sync_to_async(calendars.editable_calendar)(user, data.get("calendar_id"))
 
         # Determine color
         if data.get("color"):
@@ -473,8 +621,9 @@ def add_event(request):
             tmp = CalendarEvent(category=category)
             color = tmp.get_category_color()
 
-        event = CalendarEvent.objects.create(
-            user=request.user,
+        event = await CalendarEvent.objects.acreate(
+            user=user,
+            calendar_id=calendar_id,
             title=data["title"],
             description=data.get("description", ""),
             event_date=data["event_date"],
@@ -489,61 +638,17 @@ def add_event(request):
             recurrence_end_date=data.get("recurrence_end_date"),
         )
 
-        # Create recurring instances
+        # Instances are created by the job worker; the calendar shows them on its next load
         if event.is_recurring and event.recurrence_end_date:
-            curr = datetime.strptime(data["event_date"], "%Y-%m-%d").date()
-            end = datetime.strptime(data["recurrence_end_date"], "%Y-%m-%d").date()
-            pattern = data.get("recurrence_pattern", "weekly")
-
-            while curr < end:
-                if pattern == "daily":
-                    curr += timedelta(days=1)
-                elif pattern == "weekly":
-                    curr += timedelta(weeks=1)
-                elif pattern == "monthly":
-                    month = curr.month + 1 if curr.month < 12 else 1
-                    year = curr.year + (1 if curr.month == 12 else 0)
-                    try:
-                        curr = curr.replace(year=year, month=month)
-                    except ValueError:
-                        import calendar
-                        curr = curr.replace(year=year, month=month, day=calendar.monthrange(year, month)[1])
-
-                if curr <= end:
-                    CalendarEvent.objects.create(
-                        user=request.user,
-                        title=event.title,
-                        description=event.description,
-                        event_date=curr,
-                        start_time=start_time,
-                        end_time=end_time,
-                        category=event.category,
-                        color=event.color,
-                        reminder_enabled=event.reminder_enabled,
-                        reminder_minutes_before=event.reminder_minutes_before,
-                        parent_event=event,
-                    )
-
-        event.refresh_from_db()
-
-        def fmt(t):
-            return None if t is None else t.strftime("%H:%M")
+            await jobs.aenqueue(events.materialize_recurrence, event.id)
+        await sync_to_async(Calendar.bump_version)(calendar_id)
+        metrics.EVENTS_CREATED.inc()
 
-        return JsonResponse({
-            "success": True,
-            "event": {
-                "id": event.id,
-                "title": event.title,
-                "description": event.description,
-                "date": event.event_date.strftime("%Y-%m-%d"),
-                "start_time": fmt(event.start_time),
-                "end_time": fmt(event.end_time),
-                "category": event.category,
-                "color": event.color,
-                "type": "event",
-            }
-        })
+        await event.arefresh_from_db()
+        return JsonResponse({"success": True, "event": calendars.event_json(event)})
 
+    except calendars.CalendarError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=403)
     except Exception as e:
         logger.error(f"Error adding event: {e}", exc_info=True)
         return JsonResponse({"success": False, "error": str(e)}, status=400)
@@ -551,9 +656,10 @@ def add_event(request):
 
 @login_required
 @require_http_methods(["POST"])
-def edit_event(request, event_id):
+async def edit_event(request, event_id):
     try:
-        event = get_object_or_404(CalendarEvent, id=event_id, user=request.user)
+        user = await request.auser()
+        event = await aget_object_or_404(calendars.editable_events(user), id=event_id)
         data = json.loads(request.body)
 
         event.title = data.get("title", event.title)
@@ -576,23 +682,26 @@ def edit_event(request, event_id):
         event.reminder_enabled = data.get("reminder_enabled", event.reminder_enabled)
         event.reminder_minutes_before = data.get("reminder_minutes_before", event.reminder_minutes_before)
 
-        event.save()
+        await event.asave()
+
+        # Update recurring instances (one UPDATE for the whole series)
+        series_fields = {
+            "title": event.title,
+            "description": event.description,
+            "start_time": event.start_time,
+            "end_time": event.end_time,
+            "category": event.category,
+            "color": event.get_category_color(),
+            "reminder_enabled": event.reminder_enabled,
+            "reminder_minutes_before": event.reminder_minutes_before,
+            "updated_at": timezone.now(),
+        }
 
-        # Update recurring instances
         if event.is_recurring:
-            for inst in event.recurring_instances.all():
-                inst.title = event.title
-                inst.description = event.description
-                inst.start_time = event.start_time
-                inst.end_time = event.end_time
-                inst.category = event.category
-                inst.color = inst.get_category_color()
-                inst.reminder_enabled = event.reminder_enabled
-                inst.reminder_minutes_before = event.reminder_minutes_before
-                inst.save()
-
-        elif event.parent_event:
-            parent = event.parent_event
+            await event.recurring_instances.aupdate(**series_fields)
+
+        elif event.parent_event_id:
+            parent = await CalendarEvent.objects.aget(id=event.parent_event_id)
             parent.title = event.title
             parent.description = event.description
             parent.start_time = event.start_time
@@ -601,38 +710,13 @@ def edit_event(request, event_id):
             parent.color = parent.get_category_color()
             parent.reminder_enabled = event.reminder_enabled
             parent.reminder_minutes_before = event.reminder_minutes_before
-            parent.save()
-
-            for inst in parent.recurring_instances.all():
-                inst.title = event.title
-                inst.description = event.description
-                inst.start_time = event.start_time
-                inst.end_time = event.end_time
-                inst.category = event.category
-                inst.color = inst.get_category_color()
-                inst.reminder_enabled = event.reminder_enabled
-                inst.reminder_minutes_before = event.reminder_minutes_before
-                inst.save()
+            await parent.asave()
 
-        event.refresh_from_db()
+            await parent.recurring_instances.aupdate(**series_fields)
 
-        def fmt(t):
-            return None if t is None else t.strftime("%H:%M")
-
-        return JsonResponse({
-            "success": True,
-            "event": {
-                "id": event.id,
-                "title": event.title,
-                "description": event.description,
-                "date": event.event_date.strftime("%Y-%m-%d"),
-                "start_time": fmt(event.start_time),
-                "end_time": fmt(event.end_time),
-                "category": event.category,
-                "color": event.color,
-                "type": "event",
-            }
-        })
+        await sync_to_async(Calendar.bump_version)(event.calendar_id)
+        await event.arefresh_from_db()
+        return JsonResponse({"success": True, "event": calendars.event_json(event)})
 
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=400)
@@ -640,19 +724,21 @@ def edit_event(request, event_id):
 
 @login_required
 @require_http_methods(["POST", "DELETE"])
-def delete_event(request, event_id):
+async def delete_event(request, event_id):
     try:
-        event = get_object_or_404(CalendarEvent, id=event_id, user=request.user)
+        user = await request.auser()
+        event = await aget_object_or_404(calendars.editable_events(user), id=event_id)
 
         if event.is_recurring:
-            event.recurring_instances.all().delete()
-            event.delete()
-        elif event.parent_event:
-            parent = event.parent_event
-            parent.recurring_instances.all().delete()
-            parent.delete()
+            await event.recurring_instances.all().adelete()
+            await event.adelete()
+        elif event.parent_event_id:
+            parent = await CalendarEvent.objects.aget(id=event.parent_event_id)
+            await parent.recurring_instances.all().adelete()
+            await parent.adelete()
         else:
-            event.delete()
+            await event.adelete()
+        await sync_to_async(Calendar.bump_version)(event.calendar_id)
 
         return JsonResponse({"success": True})
 
@@ -660,19 +746,60 @@ def delete_event(request, event_id):
         return JsonResponse({"success": False, "error": str(e)}, status=400)
 
 
+# ============================================================
+# SHARED CALENDARS
+# ============================================================
+@login_required
+@require_http_methods(["POST"])
+def add_calendar(request):
+    """Create a calendar owned by the user: {"name", "color"}."""
+    try:
+        data = json.loads(request.body)
+        calendar = calendars.create(request.user, data.get("name"), data.get("color"))
+    except (ValueError, TypeError) as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+    return JsonResponse({"success": True, "calendar": {"id": calendar.id, "name": calendar.name, "color": calendar.color}})
+
+
+@login_required
+@require_http_methods(["POST"])
+def share_calendar(request, calendar_id):
+    """
+    Set a member's role: {"username", "role": "viewer" | "editor" | null}.
+    null takes them off the calendar; members may take themselves off.
+    """
+    calendar = get_object_or_404(Calendar, id=calendar_id, memberships__user=request.user)
+    try:
+        data = json.loads(request.body)
+        membership = calendars.share(calendar, request.user, data.get("username"), data.get("role"))
+    except (ValueError, TypeError) as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+    return JsonResponse({"success": True, "role": membership.role if membership else None})
+
+
+@login_required
+@require_http_methods(["POST"])
+def delete_calendar(request, calendar_id):
+    """Delete one of the user's own calendars, with its events."""
+    calendar = get_object_or_404(Calendar, id=calendar_id, owner=request.user)
+    calendar.delete()
+    return JsonResponse({"success": True})
+
+
 # ============================================================
 # DRAG-DROP MOVE EVENT
 # ============================================================
 @login_required
-def reschedule_event(request, event_id):
+async def reschedule_event(request, event_id):
     if request.method != "POST":
         return JsonResponse({"status": "error", "message": "Invalid method"}, status=400)
 
+    user = await request.auser()
     try:
-        event = CalendarEvent.objects.get(id=event_id, user=request.user)
+        event = await calendars.editable_events(user).aget(id=event_id)
     except CalendarEvent.DoesNotExist:
-        if CalendarEvent.objects.filter(id=event_id).exists():
-            return JsonResponse({"status": "error", "message": "Event belongs to another user"}, status=403)
+        if await CalendarEvent.objects.filter(id=event_id).aexists():
+            return JsonResponse({"status": "error", "message": "You can't change this event"}, status=403)
         return JsonResponse({"status": "error", "message": "Not found"}, status=404)
 
     try:
@@ -683,7 +810,8 @@ def reschedule_event(request, event_id):
             return JsonResponse({"status": "error", "message": "Missing date"}, status=400)
 
         event.event_date = new_date
-        event.save()
+        await event.asave()
+        await sync_to_async(Calendar.bump_version)(event.calendar_id)
 
         return JsonResponse({"status": "success"})
 
@@ -694,11 +822,21 @@ def reschedule_event(request, event_id):
 # ============================================================
 # TASK TOGGLE (COMPLETE / FAVORITE)
 # ============================================================
+def requested_state(request, field):
+    """
+    The value a toggle asks for ("true"/"false" in the POST body), or None to
+    flip it. The pages always send it, so a write replayed twice from the
+    offline queue (main.offline) sets the same value instead of flipping back.
+    """
+    return {"true": True, "false": False}.get(request.POST.get(field))
+
+
 @login_required
-def toggle_complete(request, task_id):
-    task = get_object_or_404(Task, id=task_id, user=request.user)
-    task.completed = not task.completed
-    task.save()
+async def toggle_complete(request, task_id):
+    task = await aget_object_or_404(Task, id=task_id, user=await request.auser())
+    completed = requested_state(request, "completed")
+    task.completed = not task.completed if completed is None else completed
+    await task.asave()
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True, "completed": task.completed})
@@ -707,10 +845,11 @@ def toggle_complete(request, task_id):
 
 
 @login_required
-def toggle_favorite(request, task_id):
-    task = get_object_or_404(Task, id=task_id, user=request.user)
-    task.favorite = not task.favorite
-    task.save()
+async def toggle_favorite(request, task_id):
+    task = await aget_object_or_404(Task, id=task_id, user=await request.auser())
+    favorite = requested_state(request, "favorite")
+    task.favorite = not task.favorite if favorite is None else favorite
+    await task.asave()
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True, "favorite": task.favorite})
@@ -718,23 +857,278 @@ def toggle_favorite(request, task_id):
     return redirect("dashboard")
 
 @login_required
-def get_subtasks(request, task_id):
-    task = get_object_or_404(Task, id=task_id, user=request.user)
+@replica_reads
+async def get_subtasks(request, task_id):
+    """The task's subtasks, each right after its parent; ?root=<id> limits it to that subtask's branch."""
+    task = await aget_object_or_404(Task, id=task_id, user=await request.auser())
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        subtasks = task.subtasks.all()
-        completed, total = task.subtask_progress()
+        rows = task.subtasks.all()
+        if root_id := request.GET.get("root"):
+            root = await aget_object_or_404(SubTask, id=root_id, task=task)
+            rows = subtasks.subtree(root)
+        rows = sorted([s async for s in rows], key=lambda s: s.subtree_path)
+
+        if root_id:
+            completed, total = root.descendants_completed, root.descendants
+        else:
+            completed, total = sum(1 for s in rows if s.completed), len(rows)
         return JsonResponse({
             "success": True,
-            "subtasks": [
-                {"id": s.id, "title": s.title, "completed": s.completed}
-                for s in subtasks
-            ],
+            "subtasks": [subtasks.as_json(s) for s in rows],
             "progress": {
                 "completed": completed,
                 "total": total,
-                "percent": task.subtask_progress_percent()
+                "percent": progress_percent(completed, total),
             }
         })
 
     return JsonResponse({"success": False, "error": "Invalid request"})
+
+
+# ============================================================
+# HABITS
+# ============================================================
+@login_required
+@replica_reads
+async def get_habits(request):
+    today = timezone.localdate()
+    habits = Habit.objects.filter(user=await request.auser())
+    return JsonResponse({
+        "success": True,
+        "today": today.isoformat(),
+        "habits": [habit.summary(today) async for habit in habits],
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def add_habit(request):
+    form = HabitForm(request.POST)
+    if form.is_valid():
+        habit = form.save(commit=False)
+        habit.user = request.user
+        habit.save()
+        return JsonResponse({"success": True, "habit": habit.summary()})
+
+    return JsonResponse({"success": False, "errors": form.errors})
+
+
+@login_required
+@require_http_methods(["POST"])
+def check_habit(request, habit_id):
+    """Set or toggle one day: {"date": "YYYY-MM-DD" (default today), "done": true/false (default toggle)}."""
+    try:
+        data = json.loads(request.body or "{}")
+        if not isinstance(data, dict):
+            return JsonResponse({"success": False, "error": "Expected a JSON object"}, status=400)
+        day = datetime.strptime(data["date"], "%Y-%m-%d").date() if data.get("date") else timezone.localdate()
+    except (ValueError, TypeError):
+        return JsonResponse({"success": False, "error": "Invalid date"}, status=400)
+
+    if day > timezone.localdate():
+        return JsonResponse({"success": False, "error": "Can't check in a future day"}, status=400)
+    if day.year < habits.FIRST_YEAR:
+        return JsonResponse({"success": False, "error": f"Can't check in before {habits.FIRST_YEAR}"}, status=400)
+    if not isinstance(data.get("done", False), bool):
+        return JsonResponse({"success": False, "error": '"done" must be true or false'}, status=400)
+
+    # The whole history is one value, so lock the row to keep concurrent check-ins
+    with transaction.atomic():
+        habit = get_object_or_404(Habit.objects.select_for_update(), id=habit_id, user=request.user)
+        habit.set_done(day, data.get("done", not habit.is_done(day)))
+        habit.save(update_fields=["history", "start_date"])
+
+    return JsonResponse({"success": True, "habit": habit.summary()})
+
+
+@login_required
+@require_http_methods(["POST"])
+def delete_habit(request, habit_id):
+    deleted, _ = Habit.objects.filter(id=habit_id, user=request.user).delete()
+    return JsonResponse({"success": bool(deleted), "habit_id": habit_id})
+
+
+@login_required
+@replica_reads
+async def habit_heatmap(request, habit_id):
+    habit = await aget_object_or_404(Habit, id=habit_id, user=await request.auser())
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get("year", today.year))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid year"}, status=400)
+    if not habits.FIRST_YEAR <= year <= today.year:
+        return JsonResponse({"success": False, "error": "Invalid year"}, status=400)
+
+    days = habit.year_heatmap(year)
+    return JsonResponse({
+        "success": True,
+        "year": year,
+        "days": days,
+        "total": days.count("1"),
+    })
+
+
+# ============================================================
+# STATS
+# ============================================================
+@login_required
+@replica_reads
+async def stats_heatmap(request):
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get("year", today.year))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid year"}, status=400)
+    if not 1970 <= year <= today.year:
+        return JsonResponse({"success": False, "error": "Invalid year"}, status=400)
+
+    user = await request.auser()
+    # Triggers bump these on every write the heatmap reads, so a revalidation
+    # answers 304 without building anything. Past years can still change (a
+    # late session, an import), hence no-cache for every year.
+    tasks, activity = await sync_to_async(DataVersion.of)(user.pk)
+    day = today.isoformat() if year == today.year else ""
+    etag = quote_etag(f"{user.pk}.{year}.{day}.{tasks}.{activity}")
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data = await sync_to_async(stats.activity_heatmap)(user, year, today)
+        body = json.dumps({"success": True, **data}, separators=(",", ":"))
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+@replica_reads
+async def task_analytics(request):
+    """Completion rates, overdue counts, weekly throughput and filter facets for the user's tasks."""
+    data = await sync_to_async(analytics.task_analytics)((await request.auser()).pk)
+    return JsonResponse({
+        "success": True,
+        **data,
+        "facets": analytics.facets(data, request.GET.get("category"), request.GET.get("difficulty")),
+    })
+
+
+# ============================================================
+# SEARCH
+# ============================================================
+@login_required
+@replica_reads
+async def search_view(request):
+    try:
+        page = int(request.GET.get("page", 1))
+        page_size = int(request.GET.get("page_size", 20))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid page"}, status=400)
+
+    query = request.GET.get("q", "")
+    results, has_more = await sync_to_async(search.search)(await request.auser(), query, page, page_size)
+    return JsonResponse({
+        "success": True,
+        "query": query,
+        "page": page,
+        "has_more": has_more,
+        "results": results,
+    })
+
+
+@login_required
+@replica_reads
+async def search_suggest(request):
+    titles = await sync_to_async(search.suggest)(await request.auser(), request.GET.get("q", ""))
+    return JsonResponse({"success": True, "suggestions": titles})
+
+
+# ============================================================
+# ACCOUNT EXPORT
+# ============================================================
+EXPORT_FORMATS = {
+    "ndjson": (transfer.export_ndjson, "application/x-ndjson"),
+    "zip": (transfer.export_zip, "application/zip"),
+}
+
+
+@login_required
+def export_account(request):
+    """Download the whole account (main.transfer), streamed: NDJSON, or a zip with ?format=zip."""
+    kind = request.GET.get("format", "ndjson")
+    if kind not in EXPORT_FORMATS:
+        return JsonResponse({"success": False, "error": "format must be ndjson or zip"}, status=400)
+
+    export, content_type = EXPORT_FORMATS[kind]
+    chunks = export(request.user)
+    if isinstance(request, ASGIRequest):
+        # ASGI would read a sync iterator into memory before sending it
+        chunks = transfer.aiterate(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="habitcanvas-{timezone.localdate().isoformat()}.{kind}"'
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
+# ============================================================
+# OFFLINE (SERVICE WORKER + WRITE QUEUE REPLAY)
+# ============================================================
+def service_worker(request):
+    """The service worker (main.offline), served from the root so it controls every page."""
+    response = render(
+        request, "main/sw.js", {"config": json.dumps(offline.worker_config())},
+        content_type="application/javascript",
+    )
+    # Browsers check for a new worker on navigation; never let a stale one stick
+    response["Cache-Control"] = "no-cache"
+    response["Service-Worker-Allowed"] = "/"
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def sync_mutations(request):
+    """
+    Replay writes queued offline: {"mutations": [{"id", "key", "method",
+    "url", "body", "content_type"}, ...]}, run in order. Each gets its own
+    status, so one rejected write doesn't fail the others.
+    """
+    try:
+        mutations = json.loads(request.body)["mutations"]
+        if not isinstance(mutations, list) or not all(isinstance(m, dict) for m in mutations):
+            raise TypeError
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+
+    if not mutations or len(mutations) > offline.MAX_BATCH:
+        return JsonResponse(
+            {"success": False, "error": f"Send between 1 and {offline.MAX_BATCH} writes"}, status=400
+        )
+
+    return JsonResponse({"success": True, "results": offline.replay_batch(request, mutations)})
+
+
+# ============================================================
+# METRICS
+# ============================================================
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (main.metrics). With METRICS_TOKEN set the
+    scraper must send "Authorization: Bearer <token>"; without one it is only
+    served when DEBUG is on.
+    """
+    if metrics.prometheus_client is None:
+        raise Http404("prometheus_client is not installed")
+
+    token = settings.METRICS_TOKEN
+    if token:
+        sent = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(sent.encode(), token.encode()):
+            return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+    elif not settings.DEBUG:
+        raise Http404()
+
+    response = HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+    response["Cache-Control"] = "no-store"
+    return response